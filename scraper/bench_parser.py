@@ -0,0 +1,262 @@
+# scraper/bench_parser.py
+"""
+Offline Benchmark ของ BookingParser (ไม่ต่อเน็ต ไม่ต่อ DB)
+
+Corpus: bench/corpus/<name>.html (+ <name>.json = Golden Output)
+  ใน Repo มีหน้าสังเคราะห์ให้แล้ว อัดหน้าจริงเพิ่มได้ด้วย ENRICH_FIXTURE_DIR=bench/corpus python enrich.py
+  หน้าไหนไม่มี Golden = FAIL (ตรวจผลเองก่อน แล้วค่อย --update-golden)
+  Baseline (bench/baseline.json, Commit ไว้ใน Repo): เก็บเวลาเป็น "เท่าของไม้บรรทัด" ไม่ใช่วินาที
+    ไม้บรรทัด = เวลาสร้าง Tree ด้วย BeautifulSoup html.parser เปล่าๆ (ไม่มีโค้ดเรา) วัดบนเครื่องเดียวกันในรอบเดียวกัน
+    -> เครื่องเร็ว/ช้าต่างกันก็เทียบกันได้ (CI กับเครื่อง Dev ใช้ Baseline เดียวกัน)
+
+    python bench_parser.py                  # วัดเวลา + เทียบ Golden + เทียบ Baseline
+    python bench_parser.py --ci             # แบบเดียวกัน แต่ไม่มี Baseline = FAIL
+    python bench_parser.py --update-golden  # ยอมรับผลลัพธ์ปัจจุบันเป็น Golden
+    python bench_parser.py --update-baseline
+
+รายงาน: เวลาต่อ Sub-parser, Peak Memory (tracemalloc), pages/s, ความตรงกับ Golden, lxml vs bs4
+Exit 1 เมื่อ Field ไม่ตรง Golden / ไม่มี Golden, Backend ให้ผลไม่เท่ากัน หรือช้ากว่า Baseline เกิน --tolerance
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+# Parser ไม่แตะ DB แต่ enrich.py สร้าง Engine ตอน import (ไม่ได้ต่อจริงจนกว่าจะ Query)
+os.environ.setdefault("DATABASE_URL", "postgresql://offline@localhost/bench")
+
+from bs4 import BeautifulSoup
+
+from enrich import BookingParser
+from utils.html_backend import BACKENDS, HAS_LXML
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench")
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def load_corpus(corpus_dir):
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)) if os.path.isdir(corpus_dir) else []:
+        if not name.endswith(".html"): continue
+        path = os.path.join(corpus_dir, name)
+        with open(path, encoding="utf-8") as f:
+            pages.append((name[:-5], path, f.read()))
+    return pages
+
+
+def normalize(data):
+    """ผ่าน JSON ไปกลับ (tuple -> list) ให้เทียบกับ Golden ได้ตรงๆ"""
+    return json.loads(json.dumps(data, ensure_ascii=False))
+
+
+def parse_quiet(html, backend, timings=None):
+    # Sub-parser print ทุกรอบ -> เก็บทิ้ง ไม่ให้ปนผลวัด
+    with redirect_stdout(io.StringIO()):
+        return BookingParser.parse_main_page(html, backend, timings)
+
+
+def bench_backend(pages, backend, repeat):
+    """
+    เวลาต่อ Sub-parser (ดีที่สุดจาก repeat รอบ) + Peak Memory + ผลลัพธ์ของแต่ละหน้า
+    relative = เวลาหารด้วยไม้บรรทัดที่วัดคู่กันในรอบเดียวกัน (Median ทุกรอบ)
+      -> เครื่องโดนงานอื่นแย่ง CPU กลางทางก็ช้าลงทั้งคู่ อัตราส่วนไม่เพี้ยน
+    """
+    per_parser = {}
+    relative_parsers = {}
+    total_best = 0.0
+    relative_total = 0.0
+    unit_total = 0.0
+    peak = 0
+    results = {}
+    for name, _, html in pages:
+        best_total, best_timings = None, None
+        ratios, parser_ratios, units = [], {}, []
+        for _ in range(repeat):
+            unit = yardstick_seconds(html)
+            timings = {}
+            started = time.perf_counter()
+            data = parse_quiet(html, backend, timings)
+            elapsed = time.perf_counter() - started
+            if best_total is None or elapsed < best_total:
+                best_total, best_timings = elapsed, timings
+            units.append(unit)
+            ratios.append(elapsed / unit)
+            for parser, seconds in timings.items():
+                parser_ratios.setdefault(parser, []).append(seconds / unit)
+        results[name] = normalize(data)
+        total_best += best_total
+        unit_total += min(units)
+        relative_total += statistics.median(ratios)
+        for parser, seconds in best_timings.items():
+            per_parser[parser] = per_parser.get(parser, 0.0) + seconds
+        for parser, values in parser_ratios.items():
+            relative_parsers[parser] = relative_parsers.get(parser, 0.0) + statistics.median(values)
+
+        # วัด Memory แยกรอบ (tracemalloc ทำให้ช้า ไม่เอามาปนกับเวลา)
+        # หมายเหตุ: tracemalloc เห็นแค่ฝั่ง Python (Tree ของ libxml2 อยู่ฝั่ง C)
+        tracemalloc.start()
+        parse_quiet(html, backend)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    count = len(pages)
+    return {
+        "pages": count,
+        "seconds_per_page": total_best / count,
+        "pages_per_second": count / total_best if total_best else 0.0,
+        "peak_mb": peak / (1024 * 1024),
+        "yardstick": unit_total / count,
+        "parsers": {parser: seconds / count for parser, seconds in per_parser.items()},
+        "relative": {
+            "seconds_per_page": relative_total / count,
+            "parsers": {parser: ratio / count for parser, ratio in relative_parsers.items()},
+        },
+    }, results
+
+
+def yardstick_seconds(html):
+    """งานอ้างอิงที่ไม่มีโค้ดเราเลย: สร้าง Tree ด้วย html.parser"""
+    started = time.perf_counter()
+    BeautifulSoup(html, "html.parser")
+    return time.perf_counter() - started
+
+
+def diff_fields(expected, actual):
+    """Field ระดับบนสุดที่ไม่ตรงกัน"""
+    keys = sorted(set(expected) | set(actual))
+    return [key for key in keys if expected.get(key) != actual.get(key)], len(keys)
+
+
+def check_golden(pages, results, update):
+    failures = []
+    matched = total = 0
+    for name, path, _ in pages:
+        golden_path = path[:-5] + ".json"
+        if update:
+            with open(golden_path, "w", encoding="utf-8") as f:
+                json.dump(results[name], f, ensure_ascii=False, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"   📝 Golden written: {os.path.basename(golden_path)}")
+            continue
+        if not os.path.exists(golden_path):
+            # ไม่มี Golden = ยังไม่มีใครตรวจผลของหน้านี้ -> ห้ามผ่าน (ตรวจแล้วค่อย --update-golden)
+            failures.append(f"{name}: no golden file (review the output, then run with --update-golden)")
+            continue
+        with open(golden_path, encoding="utf-8") as f:
+            golden = json.load(f)
+        bad, n = diff_fields(golden, results[name])
+        matched += n - len(bad)
+        total += n
+        if bad:
+            failures.append(f"{name}: {', '.join(bad)}")
+    if total:
+        print(f"🎯 Golden accuracy: {matched}/{total} fields ({matched / total:.1%})")
+    for failure in failures:
+        print(f"   ❌ Mismatch {failure}")
+    return not failures
+
+
+def check_parity(results_by_backend):
+    if len(results_by_backend) < 2: return True
+    (base_name, base), *others = results_by_backend.items()
+    ok = True
+    for other_name, other in others:
+        for page, data in base.items():
+            bad, _ = diff_fields(data, other[page])
+            if bad:
+                ok = False
+                print(f"   ❌ {base_name} vs {other_name} differ on {page}: {', '.join(bad)}")
+    if ok:
+        print(f"🤝 Backends agree: {', '.join(results_by_backend)}")
+    return ok
+
+
+def check_baseline(report, tolerance, update, ci=False):
+    current = {backend: stats["relative"] for backend, stats in report.items()}
+    if update:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📝 Baseline written: {BASELINE_PATH}")
+        return True
+    if not os.path.exists(BASELINE_PATH):
+        if ci:
+            print(f"   ❌ No baseline at {BASELINE_PATH} (record one with --update-baseline and commit it)")
+            return False
+        print(f"⚠️ No baseline at {BASELINE_PATH}: speed check skipped (record one with --update-baseline)")
+        return True
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    ok = True
+    for backend, stats in current.items():
+        before = baseline.get(backend)
+        if not before:
+            if ci:
+                ok = False
+                print(f"   ❌ Baseline has no entry for {backend}")
+            continue
+        checks = [("total", before["seconds_per_page"], stats["seconds_per_page"])]
+        checks += [(p, before["parsers"].get(p), s) for p, s in stats["parsers"].items()]
+        for label, old, new in checks:
+            # Sub-parser ที่เร็วมากๆ (<1ms จริง) แกว่งตามเครื่อง ไม่นับ
+            if not old or max(old, new) * report[backend]["yardstick"] < 0.001: continue
+            if new > old * (1 + tolerance):
+                ok = False
+                print(f"   🐢 {backend}/{label}: {old:.3f} -> {new:.3f} x yardstick (+{new / old - 1:.0%})")
+    if ok:
+        print(f"⚡ No speed regression vs baseline (tolerance {tolerance:.0%})")
+    return ok
+
+
+def print_report(report):
+    for backend, stats in report.items():
+        print(f"\n📦 {backend}: {stats['pages']} pages, {stats['seconds_per_page'] * 1000:.1f} ms/page, "
+              f"{stats['pages_per_second']:.1f} pages/s, peak {stats['peak_mb']:.1f} MB, "
+              f"yardstick {stats['yardstick'] * 1000:.1f} ms/page")
+        for parser, seconds in sorted(stats["parsers"].items(), key=lambda item: -item[1]):
+            print(f"   {parser:<16} {seconds * 1000:>9.2f} ms/page")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline BookingParser benchmark")
+    ap.add_argument("--corpus", default=CORPUS_DIR)
+    ap.add_argument("--backend", choices=BACKENDS, action="append",
+                    help="วัดเฉพาะ Backend นี้ (ใส่ซ้ำได้, ค่าเริ่มต้น = ทุกตัวที่ติดตั้ง)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="ช้ากว่า Baseline ได้ไม่เกินกี่ส่วน (0.25 = 25%%)")
+    ap.add_argument("--update-golden", action="store_true")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--ci", action="store_true", help="ไม่มี Baseline (หรือไม่มีของ Backend ที่วัด) = FAIL แทนการข้าม")
+    args = ap.parse_args(argv)
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"❌ No fixtures in {args.corpus} (record some with ENRICH_FIXTURE_DIR={args.corpus} python enrich.py)")
+        return 1
+
+    backends = args.backend or [b for b in BACKENDS if b != "lxml" or HAS_LXML]
+    print(f"🧪 Benchmarking {len(pages)} pages x {args.repeat} on {', '.join(backends)}...")
+
+    report, results_by_backend = {}, {}
+    for backend in backends:
+        report[backend], results_by_backend[backend] = bench_backend(pages, backend, args.repeat)
+    print_report(report)
+    print()
+
+    ok = check_golden(pages, results_by_backend[backends[0]], args.update_golden)
+    ok = check_parity(results_by_backend) and ok
+    ok = check_baseline(report, args.tolerance, args.update_baseline, args.ci) and ok
+    print("✅ PASS" if ok else "❌ FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
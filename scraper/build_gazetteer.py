@@ -0,0 +1,180 @@
+# scraper/build_gazetteer.py
+"""
+สร้าง data/th_gazetteer.npz (ไฟล์ที่ utils/enrichment/gazetteer.py โหลด) จาก CSV รายชื่อตำบลทั้งประเทศ
+
+CSV (UTF-8, มี Header) 1 แถว = 1 ตำบล:
+    province_th, province_en, amphoe_th, amphoe_en, tambon_th, tambon_en, postcode, latitude, longitude
+- แปลงมาจากข้อมูลกรมการปกครอง / ชุดข้อมูลเปิดที่ไหนก็ได้ ขอแค่ Column ตามนี้
+- *_en ไม่มีก็ได้ (Gazetteer ใช้ชื่อไทยแทน) / postcode / latitude / longitude ว่างได้ (ตำบลนั้นจะหาด้วย Postcode / พิกัดไม่เจอ)
+- Header แบบ thai_address_data.csv (province, district, subdistrict, zipcode, latitude, longitude) ใช้ได้เลย
+- --names: CSV ชื่ออังกฤษแยกอีกไฟล์ (จับคู่ด้วยชื่อไทย จังหวัด + อำเภอ + ตำบล / สำรองด้วย Postcode)
+  Header แบบ thai_addr.csv ของ thaiaddressclean (TambonThaiShort, TambonEngShort, ...) ใช้ได้เลย
+  ชื่อที่ชุดอังกฤษไม่มี (ข้อมูลคนละปี / สะกดไทยต่างกัน) ใช้ EXTRA_EN ด้านล่าง
+
+data/th_gazetteer.npz ใน Repo:
+- ตำบล + Postcode + พิกัด: thai_address_data.csv ของแพ็กเกจ thaiaddress 0.2.1 บน PyPI (Apache-2.0, 7,427 ตำบล/แขวง)
+- ชื่ออังกฤษ: thai_addr.csv ของแพ็กเกจ thaiaddressclean 0.0.3 บน PyPI (MIT, ชื่อถอดอักษรตามกรมการปกครอง)
+    pip download --no-deps thaiaddress==0.2.1 thaiaddressclean==0.0.3
+    tar xzf thaiaddress-0.2.1.tar.gz && unzip -q thaiaddressclean-0.0.3-py3-none-any.whl -d thaiaddressclean-0.0.3
+    python build_gazetteer.py thaiaddress-0.2.1/thaiaddress/data/thai_address_data.csv \
+        --names thaiaddressclean-0.0.3/thaiaddressclean/refs/thai_addr.csv
+
+    python build_gazetteer.py tambons.csv
+    python build_gazetteer.py tambons.csv --out data/th_gazetteer.npz
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+
+import numpy as np
+
+from utils.enrichment.gazetteer import DEFAULT_PATH, Gazetteer, StringTable
+
+REQUIRED = ("province_th", "amphoe_th", "tambon_th", "postcode", "latitude", "longitude")
+# ชื่อ Column ของชุดข้อมูลที่ใช้บ่อย -> ชื่อที่ build() ใช้
+ALIASES = {
+    "province": "province_th", "district": "amphoe_th", "subdistrict": "tambon_th", "zipcode": "postcode",
+    "ProvinceThai": "province_th", "ProvinceEng": "province_en", "DistrictThaiShort": "amphoe_th",
+    "DistrictEngShort": "amphoe_en", "TambonThaiShort": "tambon_th", "TambonEngShort": "tambon_en",
+    "PostCodeMain": "postcode",
+}
+# ชื่อไทย -> อังกฤษ (RTGS) ที่ชุดชื่ออังกฤษไม่มี (แขวงก่อนแยกเป็น เหนือ/ใต้, สะกดไทยต่างกัน)
+EXTRA_EN = {
+    "บางนา": "Bang Na", "บางนาใต้": "Bang Na Tai", "บางบอน": "Bang Bon", "ไผ่จำศิล": "Phai Cham Sin",
+    "ห้วยขะยูง": "Huai Khayung", "สมก๋าย": "Som Kai",
+}
+_KEY_RE = re.compile(r'\(.*?\)|[\s\-]')
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _key(name):
+    """ชื่อไทยสำหรับจับคู่ข้ามชุดข้อมูล: ไม่สนช่องว่าง / ขีด / วงเล็บ ("ปอภาร  (ปอพาน)" = "ปอภาร", "สุไหงโก-ลก" = "สุไหงโกลก")"""
+    return _KEY_RE.sub("", name)
+
+
+def _rows(csv_path, required):
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        columns = [ALIASES.get(column, column) for column in (reader.fieldnames or [])]
+        missing = [column for column in required if column not in columns]
+        if missing:
+            raise ValueError(f"{os.path.basename(csv_path)} is missing columns: {', '.join(missing)}")
+        for raw in reader:
+            row = dict.fromkeys(("province_en", "amphoe_en", "tambon_en"), "")
+            row.update((ALIASES.get(key, key), (value or "").strip()) for key, value in raw.items())
+            yield row
+
+
+def load_english(csv_path):
+    """CSV ชื่ออังกฤษ -> Lookup ตามชื่อไทยแต่ละระดับ"""
+    names = {"province": {}, "amphoe": {}, "tambon": {}, "tambon_postcode": {}}
+    for row in _rows(csv_path, ("province_th", "province_en", "amphoe_th", "amphoe_en", "tambon_th", "tambon_en")):
+        province, amphoe, tambon = _key(row["province_th"]), _key(row["amphoe_th"]), _key(row["tambon_th"])
+        names["province"].setdefault(province, row["province_en"])
+        names["amphoe"].setdefault((province, amphoe), row["amphoe_en"])
+        names["tambon"].setdefault((province, amphoe, tambon), row["tambon_en"])
+        names["tambon_postcode"].setdefault((province, tambon, row.get("postcode", "")), row["tambon_en"])
+    return names
+
+
+def fill_english(row, names):
+    """เติม *_en ที่ว่างของแถวจาก load_english() คืนค่า False ถ้ายังมีระดับที่หาชื่ออังกฤษไม่ได้"""
+    province, amphoe, tambon = _key(row["province_th"]), _key(row["amphoe_th"]), _key(row["tambon_th"])
+    lookups = {
+        "province_en": (names["province"].get(province), EXTRA_EN.get(row["province_th"])),
+        "amphoe_en": (names["amphoe"].get((province, amphoe)), EXTRA_EN.get(row["amphoe_th"])),
+        "tambon_en": (names["tambon"].get((province, amphoe, tambon)),
+                      names["tambon_postcode"].get((province, tambon, row["postcode"])),
+                      EXTRA_EN.get(row["tambon_th"])),
+    }
+    for column, candidates in lookups.items():
+        if not row[column]:
+            row[column] = next((name for name in candidates if name), "")
+    return all(row[column] for column in lookups)
+
+
+def build(csv_path, out_path, names_path=None):
+    provinces, amphoes = {}, {}            # key -> index
+    names = {(level, lang): [] for level in ("province", "amphoe", "tambon") for lang in ("th", "en")}
+    amphoe_province, tambon_amphoe, postcodes, lats, lngs = [], [], [], [], []
+    english = load_english(names_path) if names_path else None
+    unnamed = []
+
+    for row in _rows(csv_path, REQUIRED):
+        if english is not None and not fill_english(row, english):
+            unnamed.append(f"{row['tambon_th']} / {row['amphoe_th']} / {row['province_th']}")
+
+        province_key = row["province_th"]
+        if province_key not in provinces:
+            provinces[province_key] = len(provinces)
+            names[("province", "th")].append(row["province_th"])
+            names[("province", "en")].append(row["province_en"])
+
+        # ชื่ออำเภอซ้ำข้ามจังหวัดได้ ("เมือง...") -> Key ต้องมีจังหวัดด้วย
+        amphoe_key = (province_key, row["amphoe_th"])
+        if amphoe_key not in amphoes:
+            amphoes[amphoe_key] = len(amphoes)
+            names[("amphoe", "th")].append(row["amphoe_th"])
+            names[("amphoe", "en")].append(row["amphoe_en"])
+            amphoe_province.append(provinces[province_key])
+
+        names[("tambon", "th")].append(row["tambon_th"])
+        names[("tambon", "en")].append(row["tambon_en"])
+        tambon_amphoe.append(amphoes[amphoe_key])
+        postcodes.append(int(row["postcode"]) if row["postcode"].isdigit() else 0)
+        lats.append(_float(row["latitude"]))
+        lngs.append(_float(row["longitude"]))
+    if unnamed:
+        print(f"⚠️ {len(unnamed)} rows without an English name (add them to EXTRA_EN): {', '.join(unnamed[:10])}")
+
+    arrays = {
+        "amphoe_province": np.array(amphoe_province, dtype=np.int16),
+        "tambon_amphoe": np.array(tambon_amphoe, dtype=np.int16),
+        "tambon_postcode": np.array(postcodes, dtype=np.int32),
+        "tambon_lat": np.array(lats, dtype=np.float32),
+        "tambon_lng": np.array(lngs, dtype=np.float32),
+    }
+    for (level, lang), values in names.items():
+        arrays[f"{level}_{lang}_blob"], arrays[f"{level}_{lang}_offsets"] = StringTable.pack(values)
+
+    # Postcode Index: tambon เรียงตาม Postcode + จุดเริ่มของแต่ละ Postcode (searchsorted ตอนใช้)
+    postcode = arrays["tambon_postcode"]
+    order = np.argsort(postcode, kind="stable")
+    order = order[postcode[order] > 0]
+    keys, starts = np.unique(postcode[order], return_index=True)
+    arrays["postcode_keys"] = keys.astype(np.int32)
+    arrays["postcode_start"] = np.append(starts, len(order)).astype(np.int32)
+    arrays["postcode_tambons"] = order.astype(np.int32)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    np.savez_compressed(out_path, **arrays)
+    return len(provinces), len(amphoes), len(tambon_amphoe)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the offline Thai gazetteer used by LocationCleaner")
+    ap.add_argument("csv")
+    ap.add_argument("--names", help="CSV ชื่ออังกฤษ (ถ้า CSV หลักไม่มี *_en)")
+    ap.add_argument("--out", default=DEFAULT_PATH)
+    args = ap.parse_args(argv)
+
+    provinces, amphoes, tambons = build(args.csv, args.out, args.names)
+    size_kb = os.path.getsize(args.out) / 1024
+    print(f"✅ {provinces} provinces, {amphoes} amphoe, {tambons} tambon -> {args.out} ({size_kb:.0f} KB)")
+
+    # ลองโหลดกลับทันที (ไฟล์พังจะได้รู้ตอนสร้าง ไม่ใช่ตอน Enrich)
+    check = Gazetteer(args.out)
+    print(f"🔎 Reload OK: {len(check)} tambon")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,18 @@
+import argparse
 import asyncio
+import io
+import os
+import socket
+import time
 import re
 import random
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Third-party Libs ---
-from bs4 import BeautifulSoup
-from sqlalchemy import select, update, func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import select, update, func, bindparam, null, exists, or_, case
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy import cast
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -15,8 +21,17 @@ from playwright.async_api import async_playwright
 
 # --- Local Models ---
 # ตรวจสอบว่าไฟล์ models.py และ database.py อยู่ที่เดิมนะครับ
-from models import Villa
+from models import Villa, BookingImage, VillaEnrichState
 from database import DATABASE_URL
+from utils.parse_cache import ParseCache
+from utils.html_backend import DEFAULT_BACKEND, make_document, precompile
+from utils.resource_blocker import DEFAULT_PROFILE, ResourceBlocker
+from utils.page_pool import PagePool
+from utils.adaptive_limiter import AdaptiveLimiter
+from utils.metrics import METRICS, print_summary
+from utils.archive import PageArchive
+from utils.image_index import ImageIndex, extra_urls, parse_photo_url
+from utils.enrichment.address import cleaner
 
 # ==========================================
 # 1. CONFIGURATION & DATABASE SETUP
@@ -24,8 +39,41 @@ from database import DATABASE_URL
 CONFIG = {
     "MIN_SLEEP": 2,
     "MAX_SLEEP": 5,
-    "CONCURRENT_TABS": 5,
+    "CONCURRENT_TABS": 5,      # จำนวน Tab เริ่มต้น (AdaptiveLimiter ปรับขึ้นลงเองระหว่าง MIN_TABS - MAX_TABS)
+    "MIN_TABS": 1,
+    "MAX_TABS": 12,
+    "TARGET_P95": 20.0,        # วินาที: p95 เวลาโหลดหน้า ต่ำกว่านี้ถึงจะเพิ่ม Tab
     "TIMEOUT": 60000,
+    "FETCH_SIZE": 100,         # ดึง Candidate จาก DB ทีละกี่แถว (Keyset ตาม id)
+    "MAX_ATTEMPTS": 3,         # พังติดกันเกินนี้ พักไว้ GIVE_UP_COOLDOWN (นับใน VillaEnrichState ข้าม Restart / ข้ามเครื่อง)
+    "RETRY_BACKOFF": 30,       # วินาที (x2 ทุกครั้งที่พังซ้ำ)
+    "WORKER_MODE": os.getenv("ENRICH_WORKER_MODE", "single"), # "single" = เครื่องเดียว / "lease" = หลายเครื่องแบ่งงานกันผ่าน Lease
+    "WORKER_ID": f"{socket.gethostname()}-{os.getpid()}",
+    "LEASE_SECONDS": 600,      # Lease หมดอายุถ้า Worker ตาย (เครื่องอื่นเอาไปทำต่อได้)
+    "LEASE_POLL": 60,          # ไม่มีงานให้ Claim แต่เครื่องอื่นยังถือ Lease อยู่ -> รอแล้วลองใหม่
+    "GIVE_UP_COOLDOWN": 6 * 3600, # พังครบ MAX_ATTEMPTS แล้ว พักไว้นานเท่าไหร่ก่อนให้ใคร Claim ใหม่
+    "RECHECK_COOLDOWN": 7 * 24 * 3600, # เช็คสำเร็จแล้วแต่ยังไม่มีรูป (เช่น Booking ไม่มี Gallery) พักไว้นานเท่าไหร่ก่อนเช็คใหม่
+    "SINK_BATCH_SIZE": 50,     # เขียนผลลัพธ์ลง DB ทีละกี่แถว (1 Transaction)
+    "SINK_FLUSH_SECONDS": 3.0, # หรือเขียนเมื่อรอครบกี่วิ
+    "SINK_MAX_PENDING": 200,   # เพดานคิวรอเขียน (เต็มแล้ว Tab ต้องรอ)
+    "PAGE_MAX_NAVIGATIONS": 30, # Tab หนึ่งใช้ซ้ำได้กี่ Villa ก่อนปิดเปิดใหม่
+    "CONTEXT_MAX_PAGES": 150,   # เปิด Tab ครบเท่านี้แล้วเปลี่ยน BrowserContext ใหม่ (ล้าง Cookie/Cache)
+    "PAGE_MAX_HEAP_MB": 400,    # JS Heap ของ Tab เกินนี้ เปลี่ยน Context ใหม่ทันที
+    "PARSE_CACHE_PATH": os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "parse_cache.sqlite3"),
+    "PARSE_CACHE_MAX_MB": 512,
+    "PARSER_BACKEND": DEFAULT_BACKEND, # "lxml" (เร็ว) หรือ "bs4" (แบบเดิม)
+    "PARSE_WORKERS": os.cpu_count() or 1, # จำนวน Process สำหรับ Parse HTML (0 = Parse ใน Event Loop แบบเดิม)
+    "EXTRACT_MODE": "regions", # "regions" = ดึงเฉพาะส่วนที่ Parser ใช้ / "full" = page.content() ทั้งหน้า
+    "BLOCK_RESOURCES": True,   # ตัดรูป/วิดีโอ/ฟอนต์/Analytics ทิ้ง (ดู utils/resource_blocker.py)
+    "RESOURCE_PROFILE": DEFAULT_PROFILE,
+    "RESOURCE_SIZES_PATH": os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "blocked_sizes.json"), # ขนาดเฉลี่ยที่วัดด้วย --measure-resources
+    "ARCHIVE_PAGES": True,     # เก็บ HTML ทุกหน้า (zstd) ไว้ให้ `python enrich.py reparse` Backfill โดยไม่ต้อง Crawl ใหม่
+    "ARCHIVE_DIR": os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "archive"),
+    "ARCHIVE_LEVEL": 10,       # zstd level (สูง = เล็กลงแต่ช้าลง)
+    "INDEX_IMAGES": True,      # เก็บรูปลง BookingImage (1 แถวต่อ Photo ID ทั้งระบบ) + imageIds ของแต่ละ Villa (images เหลือแค่ URL ที่ไม่มี Photo ID)
+    "FIXTURE_DIR": os.getenv("ENRICH_FIXTURE_DIR"), # เก็บ HTML ที่ส่งให้ Parser ไว้เป็น Corpus ของ bench_parser.py (None = ไม่เก็บ)
+    "METRICS_PORT": int(os.getenv("ENRICH_METRICS_PORT", "9108")), # Prometheus /metrics (0 = ปิด)
+    "METRICS_DIR": os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics"), # JSON สรุปตอนจบรอบ
     "USER_AGENT": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 }
 
@@ -44,16 +92,29 @@ engine = create_async_engine(
 )
 AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+RESOURCE_BLOCKER = None  # สร้างใน run_enricher
+
+# Parse Cache / Archive สร้างตอนใช้จริง (run_enricher / run_reparse) ไม่ใช่ตอน import:
+# Test, bench_parser.py และ Process ลูกแบบ spawn import enrich ได้โดยไม่สร้าง .cache/ หรือเปิด SQLite
+def open_parse_cache():
+    return ParseCache(CONFIG["PARSE_CACHE_PATH"], CONFIG["PARSE_CACHE_MAX_MB"] * 1024 * 1024)
+
+def open_archive():
+    """ARCHIVE_PAGES ปิด = None"""
+    return PageArchive(CONFIG["ARCHIVE_DIR"], CONFIG["ARCHIVE_LEVEL"]) if CONFIG["ARCHIVE_PAGES"] else None
+
 
 # ==========================================
 # 2. UTILITY & STEALTH TOOLS
 # ==========================================
+_WHITESPACE_RE = re.compile(r'\s+')
+
 class ScraperUtils:
     @staticmethod
     def clean_text(text):
         """Clean whitespace and strip text."""
         if not text: return ""
-        return re.sub(r'\s+', ' ', text).strip()
+        return _WHITESPACE_RE.sub(' ', text).strip()
 
     @staticmethod
     async def apply_stealth(page):
@@ -65,11 +126,125 @@ class ScraperUtils:
             Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
         """)
 
+    @staticmethod
+    async def is_blocked(page):
+        """โดน CAPTCHA / Bot Challenge หรือเปล่า"""
+        if "captcha" in page.url or "challenge" in page.url: return True
+        try:
+            found = await page.query_selector('#px-captcha, iframe[src*="captcha"], form#challenge-form')
+            return found is not None
+        except:
+            return False
+
+    @staticmethod
+    async def extract_regions(page, selectors):
+        """
+        ดึง outerHTML เฉพาะส่วนที่ต้องใช้ (ใน Browser) แทน page.content() ทั้งหน้า
+        - ตัวที่ซ้อนอยู่ในตัวที่เลือกแล้วจะไม่ถูกเอามาซ้ำ (กัน Parser นับซ้ำ)
+        - เรียงตามลำดับในเอกสารเดิม แล้วห่อเป็น HTML ก้อนเดียว
+        """
+        fragments = await page.evaluate("""(selectors) => {
+            const picked = [];
+            for (const sel of selectors) {
+                for (const el of document.querySelectorAll(sel)) {
+                    if (picked.some(p => p.contains(el))) continue;
+                    for (let i = picked.length - 1; i >= 0; i--) {
+                        if (el.contains(picked[i])) picked.splice(i, 1);
+                    }
+                    picked.push(el);
+                }
+            }
+            picked.sort((a, b) => (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1);
+            return picked.map(el => el.outerHTML);
+        }""", selectors)
+        if not fragments: return ""
+        return "<html><body>" + "".join(fragments) + "</body></html>"
+
 
 # ==========================================
 # 3. PARSING LOGIC (Final Boss Edition 🦾)
 # ==========================================
+# ==========================================
+# 3.1 COMPILED EXTRACTION PLAN (Compile ครั้งเดียวตอน import ไม่ใช่ทุก Element)
+# ==========================================
+_BEDROOMS_RE = re.compile(r'(\d+)\s*(?:ห้องนอน|Bedroom)', re.IGNORECASE)
+_GUESTS_RE = re.compile(r'[x×]\s*(\d+)')
+_PRICE_RE = re.compile(r'(\d{1,3}(?:,\d{3})*)')
+_SCORE_RE = re.compile(r'(\d+\.?\d*)')
+_DISTANCE_RE = re.compile(r'\d.*(?:กม\.|m|km|เมตร)')
+_REVIEW_COUNT_RE = re.compile(r'(\d+)\s*(?:reviews|ความคิดเห็น)', re.IGNORECASE)
+_IMG_SIZE_RE = re.compile(r'(?<=/images/hotel/)[^/]+(?=/)|max\d+[x\d+]*') # square60 / max500 / ... -> ขนาดเดียวกันหมด
+_IMG_KEY_RE = re.compile(r'k=[a-f0-9]+')
+_THAI_ADDRESS_RE = re.compile("ไทย")
+_COMMA_SPACING_RE = re.compile(r'\s+,\s+')
+
+SEL = {
+    # Room Table
+    "room_table": '#hprt-table',
+    "room_rows": 'tbody > tr',
+    "room_rows_fallback": 'table.hprt-table tbody > tr',
+    "room_cells": 'th, td',
+    "room_name": '.hprt-roomtype-icon-link, .hprt-roomtype-link',
+    "room_name_any": '.hprt-roomtype-icon-link, .hprt-roomtype-link, a.hprt-roomtype-link',
+    "room_beds": '.rt-bed-type, .bedroom_bed_type, .room-config li',
+    "room_bed_wrapper": '.hprt-roomtype-bed, .bed-types-wrapper',
+    "room_guest_icons": '.bicon-occupancy, .bicon-person, i',
+    "room_price": '.bui-price-display__value',
+    # Facilities
+    "facility_score": '#hp_facilities_box .da8a6fe12c',
+    "facility_popular": '[data-testid="property-most-popular-facilities-wrapper"] .f6b6d2a959',
+    "facility_groups": '[data-testid="facility-group-container"]',
+    "facility_group_name": '.e7addce19e, .d31c9df771',
+    "facility_items": 'li .f6b6d2a959',
+    "facility_desc": '.fdf31a9fa1',
+    # Policies
+    "policy_box": '#hp_policies_box',
+    "policy_rows": 'div.b0400e5749',
+    "policy_topic": '.e7addce19e',
+    "policy_content": '.c92998be48',
+    # Nearby Places
+    "poi_blocks": 'div[data-testid="poi-block"], .hp-poi-content-container__column',
+    "poi_text": 'div, span',
+    # Reviews
+    "review_score": '[data-testid="review-score-component"]',
+    "review_score_value": 'div[aria-hidden="true"]',
+    "review_subscores": '[data-testid="review-subscore"]',
+    "review_sub_name": '.d96a4619c0, span:first-child',
+    "review_sub_name_fallback": 'div:first-child',
+    "review_sub_value": '[aria-hidden="true"]',
+    # Images
+    "gallery": '[data-testid="GalleryUnifiedDesktop-wrapper"]',
+    "gallery_fallback": '#photo_wrapper',
+    # Main page
+    "description": '[data-testid="property-description"], #property_description_content',
+    "address_header": '[data-testid="PropertyHeaderAddressDesktop-wrapper"]',
+    "address_tooltip": '[data-node_tt_id="location_score_tooltip"]',
+    "address_subtitle": '.hp_address_subtitle',
+    "map_link": 'a[data-atlas-latlng]',
+}
+_IMG_ATTRS = ('src', 'data-lazy', 'data-src', 'srcset')
+_ADDRESS_NOISE = ("แสดงบนแผนที่", "Show on map", "ทำเลดีเยี่ยม", "Excellent location", "–")
+precompile(SEL.values())
+
 class BookingParser:
+
+    # เพิ่มเลขนี้ทุกครั้งที่ผลลัพธ์ของ parse_main_page เปลี่ยน (เป็นส่วนหนึ่งของ Key ใน Parse Cache)
+    PARSER_VERSION = 4
+
+    # ส่วนของหน้าที่ _parse_*_logic อ่านจริง (ใช้กับ EXTRACT_MODE = "regions")
+    REGION_SELECTORS = [
+        '#hprt-table', 'table.hprt-table',                                   # Room Table
+        '#hp_facilities_box', '[data-testid="property-most-popular-facilities-wrapper"]',
+        '[data-testid="facility-group-container"]',                          # Facilities
+        '#hp_policies_box',                                                  # Policies
+        'div[data-testid="poi-block"]', '.hp-poi-content-container__column', # Nearby Places
+        '[data-testid="review-score-component"]', '[data-testid="review-subscore"]', # Reviews
+        '[data-testid="GalleryUnifiedDesktop-wrapper"]', '#photo_wrapper',   # Images
+        '[data-testid="property-description"]', '#property_description_content', # Description
+        '[data-testid="PropertyHeaderAddressDesktop-wrapper"]',
+        '[data-node_tt_id="location_score_tooltip"]', '.hp_address_subtitle', # Address
+        'a[data-atlas-latlng]',                                              # Coordinates
+    ]
     
     @staticmethod
     def _parse_room_table_logic(soup):
@@ -88,11 +263,11 @@ class BookingParser:
         }
 
         # 1. หา Table
-        table = soup.select_one('#hprt-table')
+        table = soup.select_one(SEL["room_table"])
         if not table:
-            rows = soup.select('table.hprt-table tbody > tr')
+            rows = soup.select(SEL["room_rows_fallback"])
         else:
-            rows = table.select('tbody > tr')
+            rows = table.select(SEL["room_rows"])
         
         if not rows: return data
 
@@ -101,12 +276,12 @@ class BookingParser:
         best_score = -1
         
         for row in rows:
-            cols = row.select('th, td')
+            cols = row.select(SEL["room_cells"])
             if len(cols) < 2: continue 
             
             # Scoring
             temp_name = ""
-            name_el = cols[0].select_one('.hprt-roomtype-icon-link, .hprt-roomtype-link')
+            name_el = cols[0].select_one(SEL["room_name"])
             if name_el: temp_name = ScraperUtils.clean_text(name_el.get_text())
             
             score = 0
@@ -120,7 +295,7 @@ class BookingParser:
         if not best_row: best_row = rows[0]
 
         # 3. Extraction
-        cols = best_row.select('th, td')
+        cols = best_row.select(SEL["room_cells"])
         col_name = cols[0]
         
         # --- 🛏️ Collect Layout First (เพื่อเอาไปนับห้องนอน) ---
@@ -128,7 +303,7 @@ class BookingParser:
         # เก็บ Text เตียงเพื่อเอาไปลบออกจากชื่อห้องทีหลัง
         bed_texts_to_remove = [] 
         
-        bed_containers = col_name.select('.rt-bed-type, .bedroom_bed_type, .room-config li')
+        bed_containers = col_name.select(SEL["room_beds"])
         if bed_containers:
             for item in bed_containers:
                 txt = ScraperUtils.clean_text(item.get_text())
@@ -136,17 +311,17 @@ class BookingParser:
                     bed_items.append(txt)
                     bed_texts_to_remove.append(txt)
         else:
-            bed_wrapper = col_name.select_one('.hprt-roomtype-bed, .bed-types-wrapper')
+            bed_wrapper = col_name.select_one(SEL["room_bed_wrapper"])
             if bed_wrapper:
                 txt = ScraperUtils.clean_text(bed_wrapper.get_text())
                 if txt: 
                     bed_items.append(txt)
                     bed_texts_to_remove.append(txt)
 
-        data['layout']['rooms'] = list(set(bed_items))
+        data['layout']['rooms'] = list(dict.fromkeys(bed_items))
 
         # --- 🏷️ Name Extraction (Cleanup Mode) ---
-        name_el = col_name.select_one('.hprt-roomtype-icon-link, .hprt-roomtype-link, a.hprt-roomtype-link')
+        name_el = col_name.select_one(SEL["room_name_any"])
         if name_el:
             data['name'] = ScraperUtils.clean_text(name_el.get_text())
         
@@ -171,7 +346,7 @@ class BookingParser:
             data['specs']['bedrooms'] = bedroom_count
         else:
             # ถ้าไม่เจอคำว่าห้องนอนในลิสต์ ลองหาจากชื่อห้อง
-            match = re.search(r'(\d+)\s*(?:ห้องนอน|Bedroom)', data['name'], re.IGNORECASE)
+            match = _BEDROOMS_RE.search(data['name'])
             if match:
                 data['specs']['bedrooms'] = int(match.group(1))
             elif len(data['layout']['rooms']) > 0:
@@ -182,23 +357,22 @@ class BookingParser:
         if len(cols) > 1:
             col_guest = cols[1]
             raw_text = ScraperUtils.clean_text(col_guest.get_text())
-            match_num = re.search(r'[x×]\s*(\d+)', raw_text)
+            match_num = _GUESTS_RE.search(raw_text)
             if match_num:
                 data['specs']['maxGuests'] = int(match_num.group(1))
             else:
-                icons = col_guest.select('.bicon-occupancy, .bicon-person, i')
-                valid = [i for i in icons if 'occupancy' in str(i) or 'person' in str(i)]
+                icons = (str(i) for i in col_guest.select(SEL["room_guest_icons"]))
+                valid = [markup for markup in icons if 'occupancy' in markup or 'person' in markup]
                 if valid: data['specs']['maxGuests'] = len(valid)
 
         if len(cols) > 2:
             col_price = cols[2]
             price_text = ScraperUtils.clean_text(col_price.get_text())
-            cur_price = col_price.select_one('.bui-price-display__value')
+            cur_price = col_price.select_one(SEL["room_price"])
             if cur_price: price_text = cur_price.get_text()
             
-            digits = re.findall(r'(\d{1,3}(?:,\d{3})*)', price_text)
-            valid_prices = [int(d.replace(',', '')) for d in digits if int(d.replace(',', '')) > 500]
-            if valid_prices: data['priceDaily'] = valid_prices[0]
+            prices = (int(d.replace(',', '')) for d in _PRICE_RE.findall(price_text))
+            data['priceDaily'] = next((p for p in prices if p > 500), data['priceDaily'])
 
         return data
 
@@ -213,22 +387,20 @@ class BookingParser:
 
         # 1. Score - เจาะจงที่ div ที่อยู่ใต้ h2 ใน section นี้เท่านั้น
         # จาก HTML: <div class="da8a6fe12c fb14de7f14">9.7 คะแนน...</div>
-        score_section = soup.select_one('#hp_facilities_box .da8a6fe12c')
+        score_section = soup.select_one(SEL["facility_score"])
         if score_section:
-            m = re.search(r'(\d+\.?\d*)', score_section.get_text())
+            m = _SCORE_RE.search(score_section.get_text())
             if m: 
                 data['score'] = float(m.group(1))
                 # print(f"      ✅ Found Score: {data['score']}")
 
         # 2. Popular Facilities - ดึงจากจุดที่ถูกต้อง
-        pop_items = []
-        for el in soup.select('[data-testid="property-most-popular-facilities-wrapper"] .f6b6d2a959'):
-            pop_items.append(el.get_text(strip=True))
-        data['popular'] = list(set(pop_items))
+        pop_items = [el.get_text(strip=True) for el in soup.select(SEL["facility_popular"])]
+        data['popular'] = list(dict.fromkeys(pop_items))
 
         # 3. Categories - ใช้โครงสร้างข้อมูลแบบพี่น้อง (Sibling)
         # เพราะบางอันเป็น h3 เปล่าๆ แล้วตามด้วยคำบรรยาย หรือตามด้วย ul
-        all_group_containers = soup.select('[data-testid="facility-group-container"]')
+        all_group_containers = soup.select(SEL["facility_groups"])
         
         for container in all_group_containers:
             # หาหัวข้อ (h3)
@@ -237,14 +409,14 @@ class BookingParser:
             
             # Clean หัวข้อ: เอาเฉพาะ Text ไม่เอา Icon ใน SVG
             # เทคนิค: ดึง text จาก div ชั้นในสุดที่เก็บชื่อหมวด
-            category_name = h3.select_one('.e7addce19e, .d31c9df771')
+            category_name = h3.select_one(SEL["facility_group_name"])
             category_name = category_name.get_text(strip=True) if category_name else h3.get_text(strip=True)
 
             items = []
             
             # กรณีที่ 1: มีรายการเป็น list (li)
             # เจาะจงไปที่ span class .f6b6d2a959 ที่คุณส่งมา
-            li_elements = container.select('li .f6b6d2a959')
+            li_elements = container.select(SEL["facility_items"])
             for li in li_elements:
                 txt = li.get_text(strip=True)
                 if txt: items.append(txt)
@@ -252,14 +424,14 @@ class BookingParser:
             # กรณีที่ 2: ไม่มี list แต่มีคำบรรยายใต้ h3 (เช่น อินเทอร์เน็ต, ที่จอดรถ)
             # จาก HTML: <div class="b99b6ef58f fb14de7f14 fdf31a9fa1">...</div>
             if not items:
-                desc_tag = container.select_one('.fdf31a9fa1')
+                desc_tag = container.select_one(SEL["facility_desc"])
                 if desc_tag:
                     items.append(desc_tag.get_text(strip=True))
 
             if items:
                 data['categories'].append({
                     "name": category_name,
-                    "items": list(set(items))
+                    "items": list(dict.fromkeys(items))
                 })
 
         return data
@@ -269,13 +441,13 @@ class BookingParser:
         print("   📋 Scanning House Rules (Raw Mode)...")
         policies = [] # 👈 เปลี่ยนจาก Dict {} เป็น List []
         
-        box = soup.select_one('#hp_policies_box')
+        box = soup.select_one(SEL["policy_box"])
         if not box: return []
 
-        rows = box.select('div.b0400e5749')
+        rows = box.select(SEL["policy_rows"])
         for row in rows:
-            header_el = row.select_one('.e7addce19e')
-            content_el = row.select_one('.c92998be48')
+            header_el = row.select_one(SEL["policy_topic"])
+            content_el = row.select_one(SEL["policy_content"])
             
             if header_el and content_el:
                 # เก็บดิบๆ เลยครับ เว็บเขียนว่าไง เราเอางั้น
@@ -295,17 +467,19 @@ class BookingParser:
         """Logic แกะ Nearby Places (อันใหม่ล่าสุด)"""
         print("   📍 Scanning Nearby Places...")
         nearby_places = []
-        poi_blocks = soup.select('div[data-testid="poi-block"], .hp-poi-content-container__column')
+        poi_blocks = soup.select(SEL["poi_blocks"])
+        clean_text = ScraperUtils.clean_text
         
         for block in poi_blocks:
             header = block.find('h3') or block.find('div', class_='poi-list__title')
-            category = ScraperUtils.clean_text(header.get_text()) if header else "General"
+            category = clean_text(header.get_text()) if header else "General"
             
             for li in block.select('li'):
-                texts = [ScraperUtils.clean_text(t.get_text()) for t in li.select('div, span') if ScraperUtils.clean_text(t.get_text())]
                 name, dist = "", ""
-                for t in texts:
-                    if re.search(r'\d.*(?:กม\.|m|km|เมตร)', t): dist = t
+                for el in li.select(SEL["poi_text"]):
+                    t = clean_text(el.get_text()) # Clean ครั้งเดียวต่อ Element
+                    if not t: continue
+                    if _DISTANCE_RE.search(t): dist = t
                     elif len(t) > 2 and not name: name = t
                 
                 if name and dist:
@@ -325,10 +499,10 @@ class BookingParser:
         }
 
         # 1. Total Score & Count
-        score_comp = soup.select_one('[data-testid="review-score-component"]')
+        score_comp = soup.select_one(SEL["review_score"])
         if score_comp:
             # Rating
-            score_val_el = score_comp.select_one('div[aria-hidden="true"]')
+            score_val_el = score_comp.select_one(SEL["review_score_value"])
             if score_val_el:
                 try:
                     result['rating'] = float(score_val_el.get_text().strip())
@@ -336,15 +510,15 @@ class BookingParser:
             
             # Review Count
             count_text = score_comp.get_text()
-            match = re.search(r'(\d+)\s*(?:reviews|ความคิดเห็น)', count_text, re.IGNORECASE)
+            match = _REVIEW_COUNT_RE.search(count_text)
             if match:
                 result['reviewCount'] = int(match.group(1))
 
         # 2. Categories (Loop เก็บลง List)
-        subscores = soup.select('[data-testid="review-subscore"]')
+        subscores = soup.select(SEL["review_subscores"])
         for row in subscores:
-            name_el = row.select_one('.d96a4619c0, span:first-child') or row.select_one('div:first-child')
-            val_el = row.select_one('[aria-hidden="true"]')
+            name_el = row.select_one(SEL["review_sub_name"]) or row.select_one(SEL["review_sub_name_fallback"])
+            val_el = row.select_one(SEL["review_sub_value"])
             
             if name_el and val_el:
                 key = ScraperUtils.clean_text(name_el.get_text())
@@ -361,50 +535,68 @@ class BookingParser:
         return result
 
     @staticmethod
-    def _parse_images_logic(soup):
+    def _parse_images_logic(soup, records=None):
         """
         Hydra Photo Miner 🐉 (Headed & Lazy-load Proof)
+        - ลบรูปซ้ำตาม Photo ID ของ Booking (ขนาด/k ต่างกันแต่รูปเดียวกัน = ใบเดียว)
+        - ส่ง dict มาที่ records = ได้ {photo_id: {"photoId", "url", "variants"}} ไว้ทำ Image Index
         """
         print("   🖼️  Scanning Images (Hardcore Mode)...")
         images = []
+        records = {} if records is None else records
 
         # 1. เล็งเป้าที่ Gallery ก้อนใหญ่
-        gallery = soup.select_one('[data-testid="GalleryUnifiedDesktop-wrapper"]')
+        gallery = soup.select_one(SEL["gallery"])
         if not gallery:
-            gallery = soup.select_one('#photo_wrapper')
+            gallery = soup.select_one(SEL["gallery_fallback"])
 
         if gallery:
             # 2. กวาดทุกจุดที่ URL อาจจะแอบอยู่ (แงะทีละใบ)
             for img_tag in gallery.select('img'):
-                # แงะ src, data-lazy, data-src และ srcset
-                candidates = [
-                    img_tag.get('src'),
-                    img_tag.get('data-lazy'),
-                    img_tag.get('data-src'),
-                    img_tag.get('srcset', '').split(',')[0].split(' ')[0] if img_tag.get('srcset') else None
-                ]
+                # แงะ src, data-lazy, data-src และ srcset (อ่าน Attribute ครั้งเดียวต่อตัว)
+                src, lazy, data_src, srcset = (img_tag.get(attr) for attr in _IMG_ATTRS)
+                candidates = [src, lazy, data_src, srcset.split(',')[0].split(' ')[0] if srcset else None]
                 
                 for src in candidates:
                     if src and 'http' in src and '.jpg' in src:
                         # 🚀 แปลงเป็น High-Res 1280x900 ทันที
-                        high_res = re.sub(r'max\d+[x\d+]*', 'max1280x900', src)
+                        high_res = _IMG_SIZE_RE.sub('max1280x900', src)
                         
                         # คลีน URL ให้เหลือแค่ตัวแปร k (ป้องกันลิ้งค์เสีย)
                         if '?' in high_res:
                             base = high_res.split('?')[0]
-                            k_param = re.search(r'k=[a-f0-9]+', high_res)
+                            k_param = _IMG_KEY_RE.search(high_res)
                             high_res = f"{base}?{k_param.group(0)}" if k_param else base
-                        
-                        images.append(high_res)
+
+                        photo = parse_photo_url(src)
+                        if photo:
+                            photo_id, size = photo
+                            record = records.get(photo_id)
+                            if record is None:
+                                record = records[photo_id] = {"photoId": photo_id, "url": high_res, "variants": []}
+                            elif size.startswith('max') and not any(v.startswith('max') for v in record["variants"]):
+                                record["url"] = high_res # URL มาตรฐานเอาจากไซส์ max* ก่อน Thumbnail (square60 ฯลฯ)
+                            if size not in record["variants"]: record["variants"].append(size)
+                            images.append(photo_id) # แทน URL ทีหลัง (URL มาตรฐานอาจเปลี่ยนตอนเจอไซส์ที่ดีกว่า)
+                        else:
+                            images.append(high_res)
 
         # 3. ลบรูปซ้ำ
-        final_images = list(dict.fromkeys(images))
+        final_images = list(dict.fromkeys(records[image]["url"] if isinstance(image, int) else image for image in images))
         return final_images
     
     @staticmethod
-    def parse_main_page(html):
-        """Main entry point"""
-        soup = BeautifulSoup(html, "html.parser")
+    def parse_main_page(html, backend=None, timings=None):
+        """Main entry point (ส่ง dict มาที่ timings = จับเวลาแต่ละ Sub-parser เป็นวินาที)"""
+        def timed(name, fn, *args):
+            if timings is None: return fn(*args)
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings[name] = time.perf_counter() - started
+
+        soup = timed("make_document", make_document, html, backend or CONFIG["PARSER_BACKEND"])
         
         data = {
             "description": "", "address": "", "priceDaily": 0,
@@ -421,39 +613,41 @@ class BookingParser:
         }
 
         # --- ⚡ CALL ALL SUB-PARSERS ---
-        data['features'] = BookingParser._parse_room_table_logic(soup)
-        data['facilities'] = BookingParser._parse_facilities_logic(soup)
-        data['policies'] = BookingParser._parse_policies_logic(soup)
-        data['nearbyPlaces'] = BookingParser._parse_nearby_places_logic(soup) # ✅ เรียกใช้งานตรงนี้
+        data['features'] = timed("room_table", BookingParser._parse_room_table_logic, soup)
+        data['facilities'] = timed("facilities", BookingParser._parse_facilities_logic, soup)
+        data['policies'] = timed("policies", BookingParser._parse_policies_logic, soup)
+        data['nearbyPlaces'] = timed("nearby_places", BookingParser._parse_nearby_places_logic, soup) # ✅ เรียกใช้งานตรงนี้
         # -------------------------------
 
         # Basic Info
-        desc_el = soup.select_one('[data-testid="property-description"], #property_description_content')
+        desc_el = soup.select_one(SEL["description"])
         if desc_el: data['description'] = ScraperUtils.clean_text(desc_el.get_text(" "))
 
         # Address
         addr_el = None
-        header_wrapper = soup.select_one('[data-testid="PropertyHeaderAddressDesktop-wrapper"]')
+        header_wrapper = soup.select_one(SEL["address_header"])
         if header_wrapper:
-            target_text = header_wrapper.find(string=re.compile("ไทย"))
+            target_text = header_wrapper.find(string=_THAI_ADDRESS_RE)
             if target_text and target_text.parent:
                 addr_container = target_text.parent
                 for hidden in addr_container.select('[aria-hidden="true"]'): hidden.decompose()
                 addr_el = addr_container
-        if not addr_el: addr_el = soup.select_one('[data-node_tt_id="location_score_tooltip"]')
-        if not addr_el: addr_el = soup.select_one('.hp_address_subtitle')
+        if not addr_el: addr_el = soup.select_one(SEL["address_tooltip"])
+        if not addr_el: addr_el = soup.select_one(SEL["address_subtitle"])
 
         if addr_el:
             raw_addr = ScraperUtils.clean_text(addr_el.get_text(" ")) 
-            for bad in ["แสดงบนแผนที่", "Show on map", "ทำเลดีเยี่ยม", "Excellent location", "–"]:
+            for bad in _ADDRESS_NOISE:
                 raw_addr = raw_addr.replace(bad, "")
-            data['address'] = re.sub(r'\s+,\s+', ', ', raw_addr).strip()
+            data['address'] = _COMMA_SPACING_RE.sub(', ', raw_addr).strip()
 
         # Images
-        data['images'] = BookingParser._parse_images_logic(soup)
+        image_records = {}
+        data['images'] = timed("images", BookingParser._parse_images_logic, soup, image_records)
+        data['imageRecords'] = list(image_records.values())
 
         # Coordinates
-        map_link = soup.select_one('a[data-atlas-latlng]')
+        map_link = soup.select_one(SEL["map_link"])
         if map_link:
             try:
                 lat, lng = map_link.get('data-atlas-latlng').split(',')
@@ -461,7 +655,7 @@ class BookingParser:
             except: pass
 
         # Reviews
-        reviews = BookingParser._parse_reviews_logic(soup)
+        reviews = timed("reviews", BookingParser._parse_reviews_logic, soup)
         data['rating'] = reviews['rating']
         data['reviewCount'] = reviews['reviewCount']
         data['reviewData'] = reviews['categories']
@@ -472,10 +666,261 @@ class BookingParser:
 # 4. WORKER (Updated for Nearby Places)
 # ==========================================
 
-async def process_villa(sem, context, villa):
-    async with sem:
-        page = await context.new_page()
-        await ScraperUtils.apply_stealth(page)
+# Process Pool สำหรับ Parse (สร้างใน run_enricher) -> Event Loop ไม่ค้างตอน Parse หน้าใหญ่ๆ
+PARSE_EXECUTOR = None
+
+def parse_page_worker(html, backend):
+    """รันใน Process ลูก: รับแค่ HTML string คืนแค่ (dict ผลลัพธ์, เวลาแต่ละ Sub-parser)"""
+    timings = {}
+    return BookingParser.parse_main_page(html, backend, timings), timings
+
+async def parse_off_loop(html):
+    if PARSE_EXECUTOR is None:
+        data, timings = parse_page_worker(html, CONFIG["PARSER_BACKEND"])
+    else:
+        loop = asyncio.get_running_loop()
+        data, timings = await loop.run_in_executor(PARSE_EXECUTOR, parse_page_worker, html, CONFIG["PARSER_BACKEND"])
+    # Metrics อยู่ใน Process หลัก -> บันทึกเวลาที่ Process ลูกส่งกลับมา
+    for name, seconds in timings.items():
+        METRICS.histogram("parser_seconds", "Time per BookingParser sub-parser").observe(seconds, parser=name)
+    return data
+
+def build_villa_values(villa, data):
+    """Field ที่ Enricher เขียนลง DB (อยากเปิด Field ไหนเพิ่ม แก้ที่นี่ที่เดียว)"""
+    room_specs = data['features'].get('specs', {})
+    room_price = data['features'].get('priceDaily', 0)
+    values = {
+        # "description": data.get('description'),
+        # "address": data.get('address') or villa.address,
+        # "latitude": data.get('latitude'),
+        # "longitude": data.get('longitude'),
+        "images": data.get('images'),
+        # "features": data.get('features'),
+        "facilities": data.get('facilities'),
+        # "policies": data.get('policies'),
+        "nearbyPlaces": data.get('nearbyPlaces'),
+        # "rating": data.get('rating'),
+        # "reviewCount": data.get('reviewCount'),
+        # "reviewData": data.get('reviewData'),
+        # "priceDaily": data.get('priceDaily') or room_price or villa.priceDaily,
+        # "bedrooms": data.get('bedrooms') or room_specs.get('bedrooms') or villa.bedrooms,
+        # "bathrooms": data.get('bathrooms') or room_specs.get('bathrooms') or villa.bathrooms,
+        # "maxGuests": data.get('maxGuests') or room_specs.get('maxGuests') or villa.maxGuests,
+    }
+    values["imageIds"] = [record["photoId"] for record in data['imageRecords']]
+    if CONFIG["INDEX_IMAGES"]:
+        # รูปที่มี Photo ID อยู่ใน BookingImage แล้ว ไม่ต้องเก็บ URL ซ้ำในแถว Villa (ประกอบกลับด้วย image_urls)
+        values["images"] = extra_urls(data.get('images') or [])
+
+    # ตำบล + ลำดับชั้นการปกครองจาก Gazetteer (district / province เดิมไม่แตะ: เป็นชื่อที่เราใช้ Search)
+    location = cleaner.locate(data.get('address') or villa.address, None, data.get('latitude'), data.get('longitude'))
+    if location["subDistrict"]:
+        values["subDistrict"] = location["subDistrict"]
+        values["locationHierarchy"] = location["locationHierarchy"]
+    return values
+
+def diff_villa_values(villa, values):
+    """เทียบกับค่าใน DB (villa ที่โหลดมา) เหลือเฉพาะ Field ที่ต่างจริง"""
+    return {key: value for key, value in values.items() if getattr(villa, key) != value}
+
+class EnrichmentSink:
+    """
+    รวมผลลัพธ์จากทุก Tab แล้วให้ Writer ตัวเดียวเขียนเป็นก้อน (1 Transaction ต่อ Batch)
+    - Queue มีเพดาน (max_pending) = Backpressure: DB ช้า Tab ก็รอ ไม่กองใน RAM
+    - แถวที่มี Field ชุดเดียวกันยิงเป็น executemany ครั้งเดียว
+    - close() เขียนของที่ค้างให้หมดก่อนปิด
+    - lastCheckedAt อยู่ใน VillaEnrichState: Villa ที่ไม่มีอะไรเปลี่ยน (และไม่มี Lease ต้องคืน) ไม่โดน UPDATE เลย
+    - touch_checked=False: ไม่แตะ lastCheckedAt (Reparse จาก Archive ไม่ได้เช็คกับ Booking จริง)
+    - รูปใหม่ที่ยังไม่อยู่ใน Image Index เขียนลง BookingImage ใน Transaction เดียวกัน
+    - Batch พัง: เขียนทีละ Villa (SAVEPOINT) ตัวที่ยังพัง = record_failure + คืน Lease (ไม่เงียบหาย)
+    """
+    def __init__(self, batch_size=50, flush_seconds=3.0, max_pending=200, touch_checked=True, image_index=None):
+        self.batch_size = batch_size
+        self.touch_checked = touch_checked
+        self.image_index = image_index
+        self.flush_seconds = flush_seconds
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.stats = {"written": 0, "unchanged": 0, "batches": 0, "failed": 0}
+        self._task = None
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, villa_id, changed, release_lease=False, images=()):
+        await self.queue.put((villa_id, changed, release_lease, images))
+
+    async def close(self):
+        await self.queue.join()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        print(f"   💾 Sink closed: {self.stats}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    @staticmethod
+    def _statement(keys, release_lease):
+        table = Villa.__table__
+        values = {key: bindparam(f"v_{key}", type_=table.c[key].type) for key in keys}
+        # ไม่มีอะไรเปลี่ยน = updatedAt คงเดิม (กัน onupdate ขยับให้เอง)
+        values["updatedAt"] = func.now() if keys else table.c.updatedAt
+        if release_lease:
+            values["enrichLeaseOwner"] = null()
+            values["enrichLeaseUntil"] = null()
+        return update(table).where(table.c.id == bindparam("b_id")).values(values)
+
+    @staticmethod
+    def _checked_statement():
+        # เช็คสำเร็จ = ล้างตัวนับครั้งที่พังด้วย
+        stmt = insert(VillaEnrichState).values(lastCheckedAt=func.now(), attempts=0)
+        return stmt.on_conflict_do_update(index_elements=["villaId"], set_={
+            "lastCheckedAt": stmt.excluded.lastCheckedAt, "attempts": 0
+        })
+
+    async def _apply(self, session, batch):
+        """เขียน entries ชุดนี้ใน Transaction ที่เปิดอยู่ คืนแถว BookingImage ที่เขียน (photoId -> แถว)"""
+        groups = {}
+        images = {}  # photoId -> แถว BookingImage (Villa แรกใน Batch ได้เป็น firstVillaId)
+        for villa_id, changed, release_lease, new_images in batch:
+            group = groups.setdefault((tuple(sorted(changed)), release_lease), [])
+            group.append({"b_id": villa_id, **{f"v_{key}": value for key, value in changed.items()}})
+            for record in new_images:
+                images.setdefault(record["photoId"], {**record, "firstVillaId": villa_id})
+
+        if images:
+            # เครื่องอื่นเขียนรูปเดียวกันไปก่อนแล้วก็ไม่เป็นไร (ของเดิมชนะ)
+            stmt = insert(BookingImage).on_conflict_do_nothing(index_elements=["photoId"])
+            await session.execute(stmt, list(images.values()))
+        for (keys, release_lease), rows in groups.items():
+            if not (keys or release_lease):
+                continue # ไม่มี Field เปลี่ยน / มีแค่รูปใหม่ -> ไม่ต้องแตะแถว Villa
+            await session.execute(self._statement(keys, release_lease), rows)
+        if self.touch_checked:
+            # เรียงตาม id กัน Deadlock กับ Worker เครื่องอื่นที่เขียน Batch ทับกัน
+            checked = sorted({villa_id for villa_id, *_ in batch})
+            await session.execute(self._checked_statement(), [{"villaId": villa_id} for villa_id in checked])
+        return images
+
+    async def _write(self, batch):
+        try:
+            with METRICS.timer("stage_seconds", stage="db_update"):
+                async with AsyncSessionLocal() as session:
+                    async with session.begin():
+                        images = await self._apply(session, batch)
+            written, failed = batch, []
+        except Exception as e:
+            # แถวเสียแถวเดียวทำทั้ง Batch พัง -> ถอยไปเขียนทีละ Villa (แบบ SnapshotWriter ของ Harvester)
+            print(f"      ❌ Sink Error (batch of {len(batch)}): {e} -> retrying row by row")
+            written, images, failed = await self._write_rows(batch)
+
+        if failed:
+            self.stats["failed"] += len(failed)
+            METRICS.counter("sink_rows_total", "Rows handled by the enrichment sink").inc(len(failed), result="failed")
+            await self._give_back(failed)
+        if not written: return
+
+        self.stats["batches"] += 1
+        if self.image_index is not None:
+            self.image_index.mark(images)
+        METRICS.histogram("sink_batch_rows", "Rows per sink transaction", buckets=(1, 5, 10, 25, 50, 100, 200)).observe(len(written))
+        for _, changed, _, _ in written:
+            result = "written" if changed else "unchanged"
+            self.stats[result] += 1
+            METRICS.counter("sink_rows_total", "Rows handled by the enrichment sink").inc(result=result)
+
+    async def _write_rows(self, batch):
+        """ทีละ Villa ด้วย SAVEPOINT (ยังอยู่ใน Transaction เดียว) คืน (entries ที่เขียนได้, รูปที่เขียน, entries ที่ยังพัง)"""
+        written, images, failed = [], {}, []
+        try:
+            with METRICS.timer("stage_seconds", stage="db_update_rows"):
+                async with AsyncSessionLocal() as session:
+                    async with session.begin():
+                        for entry in batch:
+                            try:
+                                async with session.begin_nested():
+                                    entry_images = await self._apply(session, [entry])
+                            except Exception as e:
+                                print(f"      ❌ Sink Error (villa {entry[0]}): {e}")
+                                failed.append(entry)
+                                continue
+                            written.append(entry)
+                            for photo_id, record in entry_images.items():
+                                images.setdefault(photo_id, record)
+        except Exception as e:
+            print(f"      ❌ Sink Error (row fallback): {e}")
+            return [], {}, list(batch)
+        return written, images, failed
+
+    async def _give_back(self, entries):
+        """
+        เขียนไม่ได้จริงๆ (process_villa ตอบไปแล้วว่าสำเร็จ): นับเป็นการพังใน VillaEnrichState
+        + คืน Lease ทันที (ไม่ต้องรอหมดอายุ / พังครบ MAX_ATTEMPTS แล้วล็อกไว้ GIVE_UP_COOLDOWN)
+        """
+        for villa_id, _, release, _ in entries:
+            try:
+                attempts = await record_failure(villa_id)
+                if release:
+                    await release_lease(villa_id, CONFIG["GIVE_UP_COOLDOWN"] if attempts >= CONFIG["MAX_ATTEMPTS"] else 0)
+            except Exception as e:
+                print(f"      ⚠️ Failed write not recorded (villa {villa_id}): {e}")
+
+# Writer กลางของ Enricher (สร้างใน run_enricher)
+ENRICH_SINK = None
+# Photo ID ที่อยู่ใน BookingImage แล้ว (โหลดตอนเริ่มรัน)
+IMAGE_INDEX = ImageIndex() if CONFIG["INDEX_IMAGES"] else None
+
+async def load_image_index():
+    if not IMAGE_INDEX: return
+    async with AsyncSessionLocal() as session:
+        IMAGE_INDEX.mark((await session.execute(select(BookingImage.photoId))).scalars())
+    print(f"🖼️ Image index: {len(IMAGE_INDEX.known)} photos known")
+
+def check_gazetteer():
+    """ไม่มีไฟล์ Gazetteer = subDistrict / locationHierarchy ไม่ถูกเติมเลย (ไม่ Error) -> เตือนให้เห็นตั้งแต่เริ่มรอบ"""
+    gazetteer = cleaner.gazetteer
+    if gazetteer is None or gazetteer.available: return
+    print("⚠️" * 3 + f" Gazetteer data not found at {gazetteer.path}")
+    print("   subDistrict / locationHierarchy will NOT be filled. Rebuild it with build_gazetteer.py (see its docstring).")
+
+def new_images(data):
+    """รูปของหน้านี้ที่ยังไม่อยู่ใน Index (ที่อยู่แล้วข้ามไปเลย ไม่ต้องเขียนซ้ำ)"""
+    if not IMAGE_INDEX: return []
+    return IMAGE_INDEX.unseen(data.get('imageRecords', []))
+
+async def save_villa(villa, data):
+    """
+    - มี Field เปลี่ยน: UPDATE เฉพาะ Field นั้น + updatedAt
+    - ไม่มีอะไรเปลี่ยน: ไม่แตะแถว Villa (ขยับแค่ lastCheckedAt ใน VillaEnrichState)
+    โหมด Lease: คืน Lease ใน UPDATE เดียวกันเลย (ไม่มีช่วงที่คืนแล้วแต่ยังไม่ได้เขียน)
+    """
+    changed = diff_villa_values(villa, build_villa_values(villa, data))
+    await ENRICH_SINK.put(villa.id, changed, release_lease=CONFIG["WORKER_MODE"] == "lease", images=new_images(data))
+    return list(changed)
+
+async def process_villa(limiter, pool, villa, parse_cache, archive=None):
+    async with limiter:
+        page = await pool.acquire()
+        healthy = True
+        started = time.monotonic()
+        load_time = None
+        outcome = "ok"  # ผลการโหลดหน้า ส่งให้ AdaptiveLimiter: ok / timeout / blocked
 
         try:
             future_date = datetime.now() + timedelta(days=120) 
@@ -491,14 +936,25 @@ async def process_villa(sem, context, villa):
             )
 
             print(f"   ⛏️  Opening: {villa.slug}")
-            await page.goto(target_url, timeout=CONFIG["TIMEOUT"], wait_until="domcontentloaded")
+            with METRICS.timer("stage_seconds", stage="navigation"):
+                response = await page.goto(target_url, timeout=CONFIG["TIMEOUT"], wait_until="domcontentloaded")
+            if response and response.status in (403, 429):
+                print(f"      🚫 HTTP {response.status}: {villa.slug}")
+                outcome = "blocked"
+                return False
             
             try:
-                await page.wait_for_selector('[data-testid="property-description"]', timeout=15000)
+                with METRICS.timer("stage_seconds", stage="wait_description"):
+                    await page.wait_for_selector('[data-testid="property-description"]', timeout=15000)
             except:
-                print(f"      ⚠️ Timeout (Content Load): {villa.slug}")
-                await page.close()
-                return
+                if await ScraperUtils.is_blocked(page):
+                    print(f"      🚫 CAPTCHA: {villa.slug}")
+                    outcome = "blocked"
+                else:
+                    print(f"      ⚠️ Timeout (Content Load): {villa.slug}")
+                    outcome = "timeout"
+                return False
+            load_time = time.monotonic() - started
 
             # await page.evaluate("window.scrollTo(0, 3000)") 
             await page.evaluate("""
@@ -507,88 +963,439 @@ async def process_villa(sem, context, villa):
             """)
             
             try:
-                await page.wait_for_selector('div[data-testid="facility-group-container"]', state="visible", timeout=10000)
+                with METRICS.timer("stage_seconds", stage="wait_facilities"):
+                    await page.wait_for_selector('div[data-testid="facility-group-container"]', state="visible", timeout=10000)
             except:
                 print("      ⚠️ Facilities not visible, scrolling might be needed...")
 
             # --- PARSING ---
-            content = await page.content()
-            data = BookingParser.parse_main_page(content)
-
-            # --- SAVING ---
-            async with AsyncSessionLocal() as session:
-                room_specs = data['features'].get('specs', {})
-                room_price = data['features'].get('priceDaily', 0)
-
-                stmt = update(Villa).where(Villa.id == villa.id).values(
-                    # description=data.get('description'),
-                    # address=data.get('address') or Villa.address,
-                    # latitude=data.get('latitude'),
-                    # longitude=data.get('longitude'),
-                    images=data.get('images'),
-                    # features=data.get('features'),   
-                    facilities=data.get('facilities'), 
-                    # policies=data.get('policies'),
-                    nearbyPlaces=data.get('nearbyPlaces'), 
-                    # rating=data.get('rating'),
-                    # reviewCount=data.get('reviewCount'),
-                    # reviewData=data.get('reviewData'),
-                    # priceDaily=data.get('priceDaily') or room_price or Villa.priceDaily,
-                    # bedrooms=data.get('bedrooms') or room_specs.get('bedrooms') or Villa.bedrooms,
-                    # bathrooms=data.get('bathrooms') or room_specs.get('bathrooms') or Villa.bathrooms,
-                    # maxGuests=data.get('maxGuests') or room_specs.get('maxGuests') or Villa.maxGuests,
-                    updatedAt=func.now()
-                )
-                await session.execute(stmt)
-                await session.commit()
-            print(f"      ✅ Saved: {villa.slug}")
+            content = ""
+            with METRICS.timer("stage_seconds", stage="extract_html"):
+                if CONFIG["EXTRACT_MODE"] == "regions":
+                    content = await ScraperUtils.extract_regions(page, BookingParser.REGION_SELECTORS)
+                if not content:
+                    content = await page.content()
+            METRICS.histogram("html_bytes", "Size of HTML handed to the parser",
+                              buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000)).observe(len(content))
+            if CONFIG["FIXTURE_DIR"]:
+                os.makedirs(CONFIG["FIXTURE_DIR"], exist_ok=True)
+                with open(os.path.join(CONFIG["FIXTURE_DIR"], f"{villa.slug}.html"), "w", encoding="utf-8") as f:
+                    f.write(content)
+            if archive:
+                with METRICS.timer("stage_seconds", stage="archive"):
+                    archive.put(villa.id, villa.slug, content)
+            digest = ParseCache.content_hash(content, BookingParser.PARSER_VERSION, CONFIG["PARSER_BACKEND"])
+            data = parse_cache.get(digest)
+            METRICS.counter("parse_cache_total", "Parse cache lookups").inc(result="miss" if data is None else "hit")
+            if data is None:
+                with METRICS.timer("stage_seconds", stage="parse"):
+                    data = await parse_off_loop(content)
+                parse_cache.put(digest, data)
+
+            # --- SAVING (เขียนเฉพาะ Field ที่เปลี่ยนจริง) ---
+            changed = await save_villa(villa, data)
+            if changed:
+                print(f"      ✅ Saved: {villa.slug} ({', '.join(changed)})")
+            else:
+                print(f"      💤 Unchanged: {villa.slug}")
+            METRICS.counter("villas_total", "Villas processed by outcome").inc(outcome="saved" if changed else "unchanged")
+            return True
 
         except Exception as e:
             print(f"      ❌ Error in {villa.slug}: {str(e)}")
+            healthy = False # Tab ที่ Error อาจค้างครึ่งๆ กลางๆ ปิดทิ้งดีกว่า
+            if load_time is None and "Timeout" in str(e):
+                outcome = "timeout" # goto() เองก็ Timeout ได้
+            elif load_time is None:
+                outcome = None # Error อื่นที่ไม่เกี่ยวกับความเร็วเว็บ ไม่นับ
+            return False
         finally:
-            await page.close()
+            if outcome:
+                await limiter.record(load_time or (time.monotonic() - started), outcome)
+            if outcome != "ok":
+                METRICS.counter("villas_total", "Villas processed by outcome").inc(outcome=outcome or "error")
+            METRICS.histogram("villa_seconds", "Wall time per villa (navigation to save)").observe(time.monotonic() - started)
+            if RESOURCE_BLOCKER:
+                network = RESOURCE_BLOCKER.pop_stats(page)
+                METRICS.counter("page_bytes_total", "Bytes downloaded by browser tabs (CDP encodedDataLength)").inc(network["bytes"])
+                if network["blocked"]:
+                    METRICS.counter("blocked_requests_total", "Requests aborted by the resource blocker").inc(network["blocked"])
+                    METRICS.counter("blocked_bytes_saved_total", "Estimated bytes not downloaded thanks to the resource blocker").inc(network["saved"])
+                    print(f"      🧹 Blocked {network['blocked']} requests (~{network['saved'] / 1024:.0f} KB saved, {network['bytes'] / 1024:.0f} KB downloaded)")
+                if RESOURCE_BLOCKER.ready_to_block:
+                    await RESOURCE_BLOCKER.start_blocking()
+            await pool.release(page, healthy)
 
-async def run_enricher():
+# ==========================================
+# 5. WORK QUEUE (Producer / Consumer)
+# ==========================================
+
+def enrich_candidates():
+    """
+    Villa ที่ยังไม่เคย Enrich (ยังไม่มีรูปทั้ง images และ imageIds) และไม่ได้พักอยู่ใน VillaEnrichState:
+    - เพิ่งเช็คสำเร็จไป (หน้าไม่มีรูปจริงๆ) -> ไม่ Claim / Scrape ซ้ำวนไปเรื่อยๆ จนกว่าจะครบ RECHECK_COOLDOWN
+    - พังครบ MAX_ATTEMPTS -> รอ GIVE_UP_COOLDOWN
+    """
+    state = VillaEnrichState
+    resting = exists().where(state.villaId == Villa.id, or_(
+        state.lastCheckedAt > func.now() - timedelta(seconds=CONFIG["RECHECK_COOLDOWN"]),
+        (state.attempts >= CONFIG["MAX_ATTEMPTS"]) & (state.lastFailedAt > func.now() - timedelta(seconds=CONFIG["GIVE_UP_COOLDOWN"]))
+    ))
+    no_urls = (Villa.images == cast([], JSONB)) | (Villa.images == None)
+    no_ids = (Villa.imageIds == cast([], JSONB)) | (Villa.imageIds == None)
+    return no_urls & no_ids & ~resting
+
+async def keyset_producer(queue):
+    """
+    ไล่ Candidate ตาม id (Keyset Pagination) -> ไม่ Scan ซ้ำ ไม่วนเจอแถวที่พังเดิมๆ
+    queue มี maxsize = Backpressure (ดึงจาก DB เท่าที่ Tab ทำทัน)
+    """
+    last_id, total = 0, 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            stmt = select(Villa).where(
+                enrich_candidates(), Villa.id > last_id
+            ).order_by(Villa.id).limit(CONFIG["FETCH_SIZE"])
+            villas = (await session.execute(stmt)).scalars().all()
+
+        if not villas: return total
+
+        print(f"\n🚀 Queued: {len(villas)} villas (id > {last_id})")
+        for villa in villas:
+            await queue.put(villa)
+        last_id = villas[-1].id
+        total += len(villas)
+
+# --- 🔐 LEASE MODE (หลาย Worker / หลายเครื่อง) ---
+async def claim_villas(limit):
+    """
+    จอง Villa ที่ยังไม่มีใครถือ Lease (หรือ Lease หมดอายุแล้ว) ด้วย FOR UPDATE SKIP LOCKED
+    -> 2 เครื่อง Claim พร้อมกันจะไม่ได้แถวเดียวกัน
+    """
+    candidates = select(Villa.id).where(
+        enrich_candidates(),
+        (Villa.enrichLeaseUntil == None) | (Villa.enrichLeaseUntil < func.now())
+    ).order_by(Villa.id).limit(limit).with_for_update(skip_locked=True)
+
+    stmt = update(Villa).where(Villa.id.in_(candidates.scalar_subquery())).values(
+        enrichLeaseOwner=CONFIG["WORKER_ID"],
+        enrichLeaseUntil=func.now() + timedelta(seconds=CONFIG["LEASE_SECONDS"]),
+        updatedAt=Villa.updatedAt # Lease ไม่ใช่การแก้ข้อมูล ไม่ต้องขยับ updatedAt
+    ).returning(Villa).execution_options(synchronize_session=False)
+
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            result = await session.execute(stmt)
+            return result.scalars().all()
+
+async def count_foreign_leases():
+    """จำนวน Candidate ที่เครื่องอื่นยังถือ Lease อยู่ (ยังไม่หมดอายุ)"""
+    async with AsyncSessionLocal() as session:
+        stmt = select(func.count(Villa.id)).where(
+            enrich_candidates(),
+            Villa.enrichLeaseUntil >= func.now(),
+            Villa.enrichLeaseOwner != CONFIG["WORKER_ID"]
+        )
+        return (await session.execute(stmt)).scalar()
+
+async def set_leases(villa_ids, seconds, owner):
+    """ต่ออายุ / ปล่อย / พัก Lease (เฉพาะแถวที่เราถืออยู่)"""
+    if not villa_ids: return
+    until = func.now() + timedelta(seconds=seconds) if seconds else None
+    stmt = update(Villa).where(
+        Villa.id.in_(list(villa_ids)),
+        Villa.enrichLeaseOwner == CONFIG["WORKER_ID"]
+    ).values(
+        enrichLeaseOwner=owner,
+        enrichLeaseUntil=until,
+        updatedAt=Villa.updatedAt
+    ).execution_options(synchronize_session=False)
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            await session.execute(stmt)
+
+async def renew_leases(villa_ids):
+    await set_leases(villa_ids, CONFIG["LEASE_SECONDS"], CONFIG["WORKER_ID"])
+
+async def release_lease(villa_id, cooldown=0):
+    # cooldown > 0 = ปล่อยแต่ยังล็อกเวลาไว้ (ตัวที่พังซ้ำๆ จะได้ไม่ถูก Claim วนทันที)
+    await set_leases([villa_id], cooldown, None)
+
+async def lease_keeper(held):
+    """ต่ออายุ Lease ของทุกตัวที่ถืออยู่ (ทั้งที่รอในคิวและกำลังทำ) ทุก 1/3 ของอายุ Lease"""
+    while True:
+        await asyncio.sleep(CONFIG["LEASE_SECONDS"] / 3)
+        try:
+            await renew_leases(held)
+        except Exception as e:
+            print(f"      ⚠️ Lease renew failed: {e}")
+
+async def lease_producer(queue, held):
+    total = 0
+    while True:
+        villas = await claim_villas(CONFIG["CONCURRENT_TABS"])
+        if not villas:
+            waiting = await count_foreign_leases()
+            if not waiting: return total
+            print(f"   ⏳ {waiting} villas leased by other workers. Polling again in {CONFIG['LEASE_POLL']}s...")
+            await asyncio.sleep(CONFIG["LEASE_POLL"])
+            continue
+
+        print(f"\n🔐 Claimed: {len(villas)} villas ({CONFIG['WORKER_ID']})")
+        for villa in villas:
+            held.add(villa.id)
+            await queue.put(villa)
+        total += len(villas)
+
+async def record_failure(villa_id):
+    """
+    นับครั้งที่พังลง VillaEnrichState (Restart / เครื่องอื่นก็นับต่อจากเดิม) คืนจำนวนครั้งล่าสุด
+    พังครั้งล่าสุดนานกว่า GIVE_UP_COOLDOWN แล้ว = เริ่มนับ 1 ใหม่
+    """
+    state = VillaEnrichState
+    stmt = insert(state).values(villaId=villa_id, attempts=1, lastFailedAt=func.now())
+    stale = (state.lastFailedAt == None) | (state.lastFailedAt < func.now() - timedelta(seconds=CONFIG["GIVE_UP_COOLDOWN"]))
+    stmt = stmt.on_conflict_do_update(index_elements=["villaId"], set_={
+        "attempts": case((stale, 1), else_=state.attempts + 1),
+        "lastFailedAt": stmt.excluded.lastFailedAt,
+    }).returning(state.attempts)
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            return (await session.execute(stmt)).scalar_one()
+
+async def retry_later(queue, villa, delay):
+    await asyncio.sleep(delay)
+    await queue.put(villa)
+    queue.task_done() # ปิดงานรอบที่แล้ว หลังจากใส่รอบใหม่เข้าคิวแล้ว (join จะได้ไม่จบก่อน)
+
+async def finish_villa(villa, held, ok, gave_up=False):
+    """จบงานของ Villa นี้ (โหมด Lease = คืน Lease / ถ้าสำเร็จ Sink คืนให้ตอนเขียน หรือตอนเขียนพังใน _give_back)"""
+    if held is None: return
+    held.discard(villa.id)
+    if ok: return
+    try:
+        await release_lease(villa.id, CONFIG["GIVE_UP_COOLDOWN"] if gave_up else 0)
+    except Exception as e:
+        print(f"      ⚠️ Lease release failed ({villa.slug}): {e}")
+
+async def enrich_worker(limiter, pool, queue, attempts, parse_cache, archive=None, held=None):
+    retries = set()  # เก็บ reference ของ Task ไว้ กันโดน GC
+    while True:
+        villa = await queue.get()
+        ok = await process_villa(limiter, pool, villa, parse_cache, archive)
+        if limiter.backoff_level:
+            # โดนลด Concurrency มา = พักนานขึ้นตามระดับ backoff
+            await asyncio.sleep(random.uniform(CONFIG["MIN_SLEEP"], CONFIG["MAX_SLEEP"]) * limiter.backoff_level)
+        gave_up = False
+        if not ok:
+            try:
+                attempts[villa.id] = await record_failure(villa.id)
+            except Exception as e:
+                print(f"      ⚠️ Failure count not saved ({villa.slug}): {e}")
+                attempts[villa.id] = attempts.get(villa.id, 0) + 1
+            if attempts[villa.id] < CONFIG["MAX_ATTEMPTS"]:
+                delay = CONFIG["RETRY_BACKOFF"] * 2 ** (attempts[villa.id] - 1) + random.uniform(0, 5)
+                print(f"      🔁 Retry #{attempts[villa.id]} in {delay:.0f}s: {villa.slug}")
+                task = asyncio.create_task(retry_later(queue, villa, delay))
+                retries.add(task)
+                task.add_done_callback(retries.discard)
+                continue
+            print(f"      🛑 Gave up after {attempts[villa.id]} attempts: {villa.slug}")
+            gave_up = True
+        await finish_villa(villa, held, ok, gave_up)
+        queue.task_done()
+
+async def run_enricher(measure_pages=0):
+    global PARSE_EXECUTOR, ENRICH_SINK, RESOURCE_BLOCKER
     print("🌙 Hydra Miner V3.5 (Refactored) Started...")
+    METRICS.serve(CONFIG["METRICS_PORT"])
+
+    if CONFIG["BLOCK_RESOURCES"]:
+        RESOURCE_BLOCKER = ResourceBlocker(CONFIG["RESOURCE_PROFILE"], CONFIG["RESOURCE_SIZES_PATH"], measure_pages)
+        if measure_pages:
+            print(f"📏 Measuring resource sizes on the first {measure_pages} pages (nothing blocked until then)")
+
+    if CONFIG["PARSE_WORKERS"] > 0:
+        PARSE_EXECUTOR = ProcessPoolExecutor(max_workers=CONFIG["PARSE_WORKERS"])
+    ENRICH_SINK = EnrichmentSink(CONFIG["SINK_BATCH_SIZE"], CONFIG["SINK_FLUSH_SECONDS"], CONFIG["SINK_MAX_PENDING"],
+                                 image_index=IMAGE_INDEX)
+    ENRICH_SINK.start()
+    parse_cache = open_parse_cache()
+    archive = open_archive()
+    await load_image_index()
+    check_gazetteer()
     
     async with async_playwright() as p:
 
         browser = await p.chromium.launch(headless=True) # Headless ยังใช้ได้ครับ
         
-        context = await browser.new_context(
-            user_agent=CONFIG["USER_AGENT"],
-            locale="th-TH"
+        async def new_context():
+            context = await browser.new_context(
+                user_agent=CONFIG["USER_AGENT"],
+                locale="th-TH"
+            )
+            return context
+
+        async def setup_page(page):
+            await ScraperUtils.apply_stealth(page)
+            if RESOURCE_BLOCKER:
+                await RESOURCE_BLOCKER.install(page)
+
+        pool = PagePool(
+            new_context,
+            setup_page=setup_page,
+            size=CONFIG["MAX_TABS"],
+            warm=CONFIG["CONCURRENT_TABS"],
+            max_navigations=CONFIG["PAGE_MAX_NAVIGATIONS"],
+            max_pages_per_context=CONFIG["CONTEXT_MAX_PAGES"],
+            max_heap_mb=CONFIG["PAGE_MAX_HEAP_MB"]
         )
+        await pool.start()
 
-        sem = asyncio.Semaphore(CONFIG["CONCURRENT_TABS"])
-
-        while True:
-            async with AsyncSessionLocal() as session:
-                stmt = select(Villa).where(
-                    (Villa.images == cast([], JSONB)) | (Villa.images == None)
-                ).limit(10)
-                # stmt = select(Villa).where(
-                #     Villa.id.in_([6473, 4331, 6378])
-                # ).limit(10)
-                result = await session.execute(stmt)
-                villas = result.scalars().all()
-
-                if not villas:
-                    print("🎉 Mission Complete! No more villas to process.")
-                    break
-
-                print(f"\n🚀 Processing Batch: {len(villas)} villas")
-                
-                tasks = [process_villa(sem, context, v) for v in villas]
-                await asyncio.gather(*tasks)
-                
-                print(f"--- Batch Finished ---")
-                await asyncio.sleep(2)
+        limiter = AdaptiveLimiter(
+            initial=CONFIG["CONCURRENT_TABS"],
+            min_limit=CONFIG["MIN_TABS"],
+            max_limit=CONFIG["MAX_TABS"],
+            target_p95=CONFIG["TARGET_P95"]
+        )
+        queue = asyncio.Queue(maxsize=CONFIG["MAX_TABS"] * 2)
+        METRICS.gauge("concurrency_limit", "Current AdaptiveLimiter tab limit", fn=lambda: limiter.limit)
+        METRICS.gauge("tabs_in_flight", "Villas being processed right now", fn=lambda: limiter.in_flight)
+        METRICS.gauge("work_queue_depth", "Villas waiting in the work queue", fn=queue.qsize)
+        METRICS.gauge("sink_pending", "Results waiting to be written", fn=ENRICH_SINK.queue.qsize)
+        attempts = {}
+        lease_mode = CONFIG["WORKER_MODE"] == "lease"
+        held = set() if lease_mode else None  # id ที่เราถือ Lease อยู่
+
+        workers = [
+            asyncio.create_task(enrich_worker(limiter, pool, queue, attempts, parse_cache, archive, held))
+            for _ in range(CONFIG["MAX_TABS"]) # Worker เกินไว้ได้ AdaptiveLimiter เป็นตัวคุมจำนวนที่ทำพร้อมกันจริง
+        ]
+        if lease_mode:
+            print(f"🔐 Lease mode as {CONFIG['WORKER_ID']}")
+            workers.append(asyncio.create_task(lease_keeper(held)))
+            total = await lease_producer(queue, held)
+        else:
+            total = await keyset_producer(queue)
+        await queue.join()  # รอจนทุกตัวเสร็จ (รวมตัวที่รอ Retry อยู่)
+        for worker in workers:
+            worker.cancel()
 
-                # print("🛑 Test run complete. Stopping script.")
-                # break
+        print(f"🎉 Mission Complete! {total} villas queued, {sum(1 for n in attempts.values() if n >= CONFIG['MAX_ATTEMPTS'])} gave up.")
 
+        await ENRICH_SINK.close()
+        print(f"🗂️ Page pool: {pool.stats}")
+        print(f"🎚️ Concurrency: final {limiter.limit} tabs, {limiter.stats}")
+        await pool.close()
         await browser.close()
+        if PARSE_EXECUTOR:
+            PARSE_EXECUTOR.shutdown()
+        if RESOURCE_BLOCKER:
+            network = RESOURCE_BLOCKER.total
+            print(f"🧹 Blocked {network['blocked']} requests, ~{network['saved'] / 1048576:.1f} MB saved, {network['bytes'] / 1048576:.1f} MB downloaded")
+        print(f"🧠 Parse cache: {parse_cache.hits} hits / {parse_cache.misses} misses")
+        parse_cache.close()
+        if IMAGE_INDEX:
+            print(f"🖼️ Image index: {IMAGE_INDEX.stats['new']} new / {IMAGE_INDEX.stats['skipped']} already indexed")
+        if archive:
+            stats = archive.stats()
+            print(f"🗄️ Archive: {stats['objects']} pages, {stats['stored_mb']:.1f} MB stored (x{stats['ratio']:.1f} compression)")
+            archive.close()
+
+        print_summary(METRICS, "stage_seconds")
+        print_summary(METRICS, "parser_seconds")
+        path = METRICS.dump_json(os.path.join(CONFIG["METRICS_DIR"], f"enrich-{datetime.now():%Y%m%d-%H%M%S}.json"))
+        print(f"📊 Metrics summary: {path}")
+        METRICS.shutdown()
+
+# ==========================================
+# 6. REPARSE (Backfill จาก Archive: ไม่ต่อเน็ต ไม่เปิด Browser)
+# ==========================================
+_WORKER_ARCHIVE = None  # Archive ของ Process ลูก (SQLite Connection ใช้ข้าม fork ไม่ได้)
+
+def reparse_worker(digest, backend):
+    """รันใน Process ลูก: อ่าน + แตกไฟล์ + Parse เอง (Process หลักส่งแค่ digest ไม่ต้องส่ง HTML ข้าม Process)"""
+    global _WORKER_ARCHIVE
+    if _WORKER_ARCHIVE is None:
+        _WORKER_ARCHIVE = PageArchive(CONFIG["ARCHIVE_DIR"])
+    html = _WORKER_ARCHIVE.get(digest)
+    if html is None: return None
+    with redirect_stdout(io.StringIO()): # Sub-parser print ทุกหน้า รก Log ตอนทำเป็นพันๆ หน้า
+        return BookingParser.parse_main_page(html, backend)
+
+async def run_reparse(villa_ids=None):
+    """
+    รัน BookingParser ใหม่กับหน้าล่าสุดของแต่ละ Villa ใน Archive แล้วเขียนเฉพาะ Field ที่เปลี่ยน
+    (ใช้หลังแก้ Parser หรือเปิด Field ใหม่ใน build_villa_values)
+    """
+    global PARSE_EXECUTOR, ENRICH_SINK
+    archive = open_archive()
+    if not archive:
+        print("❌ ARCHIVE_PAGES is off: nothing to reparse.")
+        return
+
+    entries = archive.latest(villa_ids)
+    print(f"♻️ Reparse: {len(entries)} archived villas {archive.stats()}")
+    PARSE_EXECUTOR = ProcessPoolExecutor(max_workers=max(1, CONFIG["PARSE_WORKERS"]))
+    ENRICH_SINK = EnrichmentSink(CONFIG["SINK_BATCH_SIZE"], CONFIG["SINK_FLUSH_SECONDS"], CONFIG["SINK_MAX_PENDING"],
+                                 touch_checked=False, image_index=IMAGE_INDEX)
+    ENRICH_SINK.start()
+    await load_image_index()
+    check_gazetteer()
+    loop = asyncio.get_running_loop()
+    counts = {"changed": 0, "unchanged": 0, "missing": 0, "failed": 0}
+
+    for start in range(0, len(entries), CONFIG["FETCH_SIZE"]):
+        chunk = entries[start:start + CONFIG["FETCH_SIZE"]]
+        async with AsyncSessionLocal() as session:
+            stmt = select(Villa).where(Villa.id.in_([villa_id for villa_id, *_ in chunk]))
+            villas = {villa.id: villa for villa in (await session.execute(stmt)).scalars()}
+
+        jobs = [(villas[villa_id], digest) for villa_id, _, digest, _ in chunk if villa_id in villas]
+        counts["missing"] += len(chunk) - len(jobs)
+        results = await asyncio.gather(*[
+            loop.run_in_executor(PARSE_EXECUTOR, reparse_worker, digest, CONFIG["PARSER_BACKEND"])
+            for _, digest in jobs
+        ], return_exceptions=True)
+
+        for (villa, _), data in zip(jobs, results):
+            if data is None or isinstance(data, Exception):
+                counts["failed"] += 1
+                print(f"      ❌ Reparse failed: {villa.slug} ({data})")
+                continue
+            changed = diff_villa_values(villa, build_villa_values(villa, data))
+            images = new_images(data)
+            if not changed and not images:
+                counts["unchanged"] += 1
+                continue
+            counts["changed" if changed else "unchanged"] += 1
+            await ENRICH_SINK.put(villa.id, changed, images=images)
+            if not changed: continue
+            print(f"      ✅ Reparsed: {villa.slug} ({', '.join(changed)})")
+        print(f"   ♻️ {start + len(chunk)}/{len(entries)} done")
+
+    await ENRICH_SINK.close()
+    PARSE_EXECUTOR.shutdown()
+    archive.close()
+    print(f"🎉 Reparse complete: {counts}")
 
 if __name__ == "__main__":
-    asyncio.run(run_enricher())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Hydra Miner: enrich villas from Booking")
+    parser.add_argument("command", nargs="?", default="enrich", choices=["enrich", "reparse", "train-dict"],
+                        help="enrich = Crawl ตามปกติ / reparse = Parse ใหม่จาก Archive / train-dict = Train zstd Dictionary ของ Archive")
+    parser.add_argument("--villa-id", type=int, action="append", help="reparse เฉพาะ Villa นี้ (ใส่ซ้ำได้)")
+    parser.add_argument("--measure-resources", type=int, default=0, metavar="PAGES",
+                        help="enrich: ไม่ตัด Resource N หน้าแรก วัดขนาดเฉลี่ยต่อชนิดไว้ประมาณ Byte ที่ประหยัดได้ แล้วค่อยเริ่มตัด")
+    args = parser.parse_args()
+
+    if args.command == "reparse":
+        asyncio.run(run_reparse(args.villa_id))
+    elif args.command == "train-dict":
+        archive = open_archive()
+        if not archive:
+            print("❌ ARCHIVE_PAGES is off: no archived pages to train on.")
+            raise SystemExit(1)
+        print(f"📚 Trained archive dictionary {archive.train_dictionary()}")
+        archive.close()
+    else:
+        asyncio.run(run_enricher(args.measure_resources))
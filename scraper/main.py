@@ -3,15 +3,19 @@ import re
 import random
 import json
 import os
+import time
 import urllib.parse
 from datetime import datetime, timedelta
 from playwright.async_api import async_playwright
+from sqlalchemy import literal_column, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from database import DATABASE_URL
 from models import Villa
+from utils.seen_index import open_seen_index, villa_key
+from utils.metrics import METRICS, print_summary
 
 engine = create_async_engine(
     DATABASE_URL, 
@@ -40,36 +44,182 @@ TARGET_LOCATIONS = [
 BASE_URL = "https://www.booking.com/searchresults.th.html"
 IMG_BASE_URL = "https://cf.bstatic.com"
 
-PROCESSED_IDS = set()
+# --- 🧠 SEEN INDEX (จำข้ามรอบรัน: ข้าม villa ที่เพิ่งเก็บไปภายใน TTL) ---
+SEEN_BACKEND = os.getenv("SEEN_BACKEND", "sqlite")  # sqlite | memory
+SEEN_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "seen_ids.sqlite3")
+SEEN_TTL_HOURS = 12
+
+SEEN = open_seen_index(SEEN_BACKEND, SEEN_INDEX_PATH, SEEN_TTL_HOURS)
+
+# --- 📦 BATCH WRITER CONFIG ---
+SNAPSHOT_BATCH_SIZE = 50      # flush เมื่อสะสมครบกี่แถว
+SNAPSHOT_FLUSH_SECONDS = 5.0  # หรือ flush เมื่อค้างใน buffer นานเกินกี่วิ
+
+# --- 🧵 WORKER POOL CONFIG ---
+CONCURRENT_LOCATIONS = int(os.getenv("HARVEST_CONCURRENCY", "1")) # จำนวน Location ที่รันพร้อมกัน (1 = ทีละที่แบบเดิม)
+LOCATION_COOLDOWN = (5, 8)    # พักระหว่าง Location ของแต่ละ worker (วินาที) -> rate ต่อ context เท่าเดิม
+WORKER_START_STAGGER = 3      # เปิด worker ถัดไปห่างกันกี่วิ
+
+# --- ⚡ JSON-FIRST CONFIG ---
+JSON_FIRST = True             # ได้ Request ค้นหาแล้วให้ Replay ตรงแทนการ Scroll
+JSON_REPLAY_MAX_PAGES = 40    # กันวนไม่จบ
+JSON_REPLAY_DELAY = (0.5, 1.2)
+SEARCH_CAPTURE_TIMEOUT = 8    # วินาที: รอ XHR ค้นหาตัวแรกตอนเปิดหน้า (เพดาน: หน้าเงียบแล้วเลิกรอทันที)
+
+# --- 📊 METRICS ---
+METRICS_PORT = int(os.getenv("HARVEST_METRICS_PORT", "9109"))  # Prometheus /metrics (0 = ปิด)
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics")
 
 # --- 💾 DATABASE FUNCTION ---
-async def save_snapshot(data):
-    async with AsyncSessionLocal() as session:
+def _snapshot_upsert(rows):
+    """สร้าง Multi-row Upsert (คืนค่า externalId + inserted/updated ผ่าน xmax)"""
+    stmt = insert(Villa).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Villa.externalId], # เช็คตัวหลัก
+        set_={
+            "priceDaily": stmt.excluded.priceDaily,
+            "rating": stmt.excluded.rating,
+            "reviewCount": stmt.excluded.reviewCount,
+            "updatedAt": datetime.now(),
+            "isActive": True
+        }
+    )
+    # xmax = 0 แปลว่าแถวนี้เพิ่งถูก Insert ใหม่ (ไม่ได้โดน Update)
+    return stmt.returning(Villa.externalId, literal_column("(xmax = 0)").label("inserted"))
+
+def _rekey_by_slug(row):
+    """
+    แถวเก่าที่ slug เดียวกันแต่ externalId คนละแบบ (JSON เคยใช้เลข Booking / HTML ใช้ slug)
+    -> ย้ายมาใช้ externalId กลาง (villa_key) + อัปเดตราคาเหมือน Upsert ปกติ
+    """
+    return update(Villa).where(Villa.slug == row["slug"], Villa.externalId != row["externalId"]).values(
+        externalId=row["externalId"],
+        priceDaily=row["priceDaily"],
+        rating=row["rating"],
+        reviewCount=row["reviewCount"],
+        updatedAt=datetime.now(),
+        isActive=True,
+    )
+
+def _is_duplicate_error(e):
+    return "UniqueViolationError" in str(e) or "duplicate key" in str(e)
+
+class SnapshotWriter:
+    """
+    Buffered Writer: สะสม villa dict แล้ว flush เป็น INSERT ... ON CONFLICT ก้อนเดียว
+    - flush เมื่อครบ batch_size, ค้างนานเกิน flush_seconds หรือตอน close()
+    - ผลลัพธ์รายแถว: inserted / updated / rekeyed (แถวเก่าย้ายมาใช้ externalId กลาง) / slug_conflict / failed
+    """
+    def __init__(self, batch_size=SNAPSHOT_BATCH_SIZE, flush_seconds=SNAPSHOT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.buffer = {}  # villa_key -> villa dict (ตัวล่าสุดชนะ กัน ON CONFLICT ชนแถวเดิมซ้ำใน statement เดียว)
+        self.stats = {"inserted": 0, "updated": 0, "rekeyed": 0, "slug_conflict": 0, "failed": 0}
+        self._lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self._ticker = None
+
+    def is_pending(self, key):
+        return key in self.buffer
+
+    async def add(self, key, data):
+        self.buffer[key] = data
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            await self.flush()
+
+    def start(self):
+        """เปิด Ticker คอย flush ของที่ค้าง buffer (กรณีหน้าเว็บนิ่ง ไม่มีของใหม่เข้ามา)"""
+        if not self._ticker:
+            self._ticker = asyncio.create_task(self._tick())
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            if self.buffer and time.monotonic() - self._last_flush >= self.flush_seconds:
+                await self.flush()
+
+    async def close(self):
+        if self._ticker:
+            self._ticker.cancel()
+            self._ticker = None
+        await self.flush()
+        print(f"   💾 Writer closed: {self.stats}")
+
+    async def flush(self):
+        async with self._lock:
+            self._last_flush = time.monotonic()
+            if not self.buffer: return {}
+            keys = {data["externalId"]: key for key, data in self.buffer.items()}
+            rows = list(self.buffer.values())
+            self.buffer = {}
+
+            with METRICS.timer("stage_seconds", stage="db_upsert"):
+                outcomes = await self._write(rows)
+            done = []
+            for external_id, outcome in outcomes.items():
+                self.stats[outcome] += 1
+                METRICS.counter("snapshot_rows_total", "Snapshot upsert results").inc(result=outcome)
+                # slug ซ้ำ = ถือว่าบันทึกแล้ว (บอทไปทำตัวถัดไปได้ ไม่ต้องหยุด)
+                if outcome != "failed":
+                    done.append(keys[external_id])
+            SEEN.mark(done)
+            return outcomes
+
+    async def _write(self, rows):
+        # Multi-row VALUES ต้องมี key ชุดเดียวกัน (JSON มี address แต่ HTML ไม่มี) เลยแยกกลุ่มตาม key
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        outcomes = {}
+        async with AsyncSessionLocal() as session:
+            try:
+                async with session.begin():
+                    for group in groups.values():
+                        result = await session.execute(_snapshot_upsert(group))
+                        for external_id, inserted in result.all():
+                            outcomes[external_id] = "inserted" if inserted else "updated"
+                return outcomes
+            except Exception as e:
+                if not _is_duplicate_error(e):
+                    print(f"      ❌ DB Error (batch of {len(rows)}): {e}")
+                    return {row["externalId"]: "failed" for row in rows}
+
+        # มี slug ซ้ำในก้อน -> ทั้ง statement พัง: ถอยไปทำทีละแถวด้วย SAVEPOINT (ยังอยู่ใน Transaction เดียว)
+        return await self._write_rows(rows)
+
+    async def _write_rows(self, rows):
+        outcomes = {}
+        async with AsyncSessionLocal() as session:
+            try:
+                async with session.begin():
+                    for row in rows:
+                        try:
+                            async with session.begin_nested():
+                                result = await session.execute(_snapshot_upsert([row]))
+                                _, inserted = result.one()
+                            outcomes[row["externalId"]] = "inserted" if inserted else "updated"
+                        except Exception as e:
+                            if _is_duplicate_error(e):
+                                outcomes[row["externalId"]] = await self._rekey(session, row)
+                            else:
+                                print(f"      ❌ DB Error: {e}")
+                                outcomes[row["externalId"]] = "failed"
+            except Exception as e:
+                print(f"      ❌ DB Error (row fallback): {e}")
+                return {row["externalId"]: "failed" for row in rows}
+        return outcomes
+
+    async def _rekey(self, session, row):
+        """slug ชนแถวเดิม: ย้ายแถวนั้นมาใช้ externalId กลาง (ครั้งเดียวต่อแถวเก่า รอบหน้า Upsert ตรงเลย)"""
         try:
-            async with session.begin():
-                stmt = insert(Villa).values(**data)
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=[Villa.externalId], # เช็คตัวหลัก
-                    set_={
-                        "priceDaily": stmt.excluded.priceDaily,
-                        "rating": stmt.excluded.rating,
-                        "reviewCount": stmt.excluded.reviewCount,
-                        "updatedAt": datetime.now(),
-                        "isActive": True
-                    }
-                )
-                await session.execute(stmt)
-            await session.commit()
-            return True
+            async with session.begin_nested():
+                result = await session.execute(_rekey_by_slug(row))
+            return "rekeyed" if result.rowcount else "slug_conflict"
         except Exception as e:
-            await session.rollback()
-            # --- แก้ตรงนี้: ถ้าเจอว่า slug ซ้ำ ให้ถือว่า "บันทึกสำเร็จ (ในแง่ของบอท)" เพื่อให้รันต่อได้ ---
-            if "UniqueViolationError" in str(e) or "duplicate key" in str(e):
-                # print(f"      ℹ️  Skipped duplicate slug: {data.get('slug')}")
-                return True # คืนค่า True เพื่อให้บอทไปทำตัวถัดไป ไม่ต้องหยุดทำงาน
-            
-            print(f"      ❌ DB Error: {e}")
-            return False
+            if not _is_duplicate_error(e):
+                print(f"      ❌ DB Error (rekey): {e}")
+            return "slug_conflict"
 
 # --- 🛡️ POPUP KILLER ---
 async def handle_genius_popup(page):
@@ -86,16 +236,21 @@ async def handle_genius_popup(page):
         for sel in popup_selectors:
             if await page.is_visible(sel):
                 print(f"      🔫 Bang! Popup killed ({sel})")
+                METRICS.counter("popups_killed_total", "Genius/sign-in popups dismissed").inc()
                 await page.click(sel)
                 await page.wait_for_timeout(300) # รอ Animation ปิดนิดนึง
                 return # ยิงตัวเดียวพอ
     except: pass
 
 # --- 🕵️‍♂️ ENGINE 1: JSON LISTENER ---
-async def process_json_data(json_data, location_context):
+def extract_search_results(json_data):
+    results = json_data.get("data", {}).get("searchQueries", {}).get("search", {}).get("results", [])
+    if not results: results = json_data.get("results", [])
+    return results or []
+
+async def process_json_data(json_data, location_context, writer, engine="json"):
     try:
-        results = json_data.get("data", {}).get("searchQueries", {}).get("search", {}).get("results", [])
-        if not results: results = json_data.get("results", [])
+        results = extract_search_results(json_data)
         if not results: return 0
         
         count = 0
@@ -103,10 +258,13 @@ async def process_json_data(json_data, location_context):
             basic_info = item.get("basicPropertyData", {})
             if not basic_info: continue
             
-            external_id = str(basic_info.get("id"))
-            if external_id in PROCESSED_IDS: continue
+            booking_id = str(basic_info.get("id"))
+            slug = basic_info.get("pageName", f"villa-{booking_id}")
+            key = villa_key(slug) # externalId กลาง: HTML Engine ไม่เห็นเลข Booking เลยใช้ slug ทั้งสองทาง
+            if SEEN.is_fresh(key) or writer.is_pending(key):
+                METRICS.counter("items_duplicate_total", "Items skipped as already seen").inc(engine=engine)
+                continue
 
-            slug = basic_info.get("pageName", f"villa-{external_id}")
             title = item.get("displayName", {}).get("text", "Unknown")
             
             loc_data = basic_info.get("location", {})
@@ -128,7 +286,7 @@ async def process_json_data(json_data, location_context):
             except: pass
 
             villa_data = {
-                "externalId": external_id,
+                "externalId": key,
                 "slug": slug,
                 "title": title,
                 "province": location_context["province"],
@@ -146,19 +304,121 @@ async def process_json_data(json_data, location_context):
                 "updatedAt": datetime.now()
             }
             
-            if await save_snapshot(villa_data):
-                PROCESSED_IDS.add(external_id)
-                count += 1
+            await writer.add(key, villa_data)
+            count += 1
         
         if count > 0:
             print(f"      ⚡ (JSON) Captured {count} items.")
+            METRICS.counter("items_captured_total", "New items queued for upsert").inc(count, engine=engine)
         return count
 
     except Exception:
         return 0
 
+# --- ⚡ ENGINE 1.5: JSON REPLAY (ยิง GraphQL ตรง ไม่ต้อง Scroll/กดปุ่ม) ---
+def _find_pagination(node):
+    """หา dict ที่มี offset + rowsPerPage ใน payload (อยู่ลึกแค่ไหนก็เจอ)"""
+    if isinstance(node, dict):
+        if "offset" in node and "rowsPerPage" in node: return node
+        node = list(node.values())
+    if isinstance(node, list):
+        for child in node:
+            found = _find_pagination(child)
+            if found is not None: return found
+    return None
+
+async def capture_search_request(request, json_body, location_context):
+    """เก็บ Request ค้นหาตัวแรกของ Location ไว้ Replay (เฉพาะ POST ที่มี pagination และมีผลลัพธ์)"""
+    if location_context.get("search_request") or request.method != "POST": return
+    post_data = request.post_data
+    if not post_data or '"offset"' not in post_data: return
+    if not extract_search_results(json_body): return
+    # เอา Header เดิมไปด้วย (csrf/x-booking-*) ยกเว้นพวกที่ context.request ใส่ให้เอง
+    headers = {
+        k: v for k, v in (await request.all_headers()).items()
+        if not k.startswith(":") and k not in ("host", "cookie", "content-length", "accept-encoding")
+    }
+    location_context["search_request"] = {"url": request.url, "post_data": post_data, "headers": headers}
+    if location_context.get("search_captured"):
+        location_context["search_captured"].set()
+    print("      🎯 Captured search request (JSON replay ready)")
+
+async def wait_for_search_request(page, location_context, timeout):
+    """
+    รอ XHR ค้นหาตัวแรกของหน้า (Booking ยิงตอน Hydrate ผลหน้า 1) ให้ handle_response เก็บไว้
+    ได้แล้ว = Replay ตั้งแต่หน้าถัดจาก XHR นั้นเลย (ผลใน XHR เองเข้า process_json_data ไปแล้ว) ไม่ต้อง Scroll หน้า 1
+    หน้าเงียบ (networkidle) แล้วยังไม่มี = หน้านี้ Render จาก Server ล้วน ไม่ต้องรอจนครบ timeout
+    """
+    if location_context.get("search_request"): return True
+    event = location_context.get("search_captured")
+    if event is None: return False
+    waiters = [asyncio.ensure_future(event.wait()), asyncio.ensure_future(page.wait_for_load_state("networkidle"))]
+    done, pending = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    for waiter in pending:
+        waiter.cancel()
+    for waiter in done:
+        waiter.exception()  # Timeout ของ networkidle ไม่ต้องโยนต่อ
+    if not event.is_set():
+        try:
+            # networkidle มาก่อน handle_response อ่าน JSON เสร็จได้ -> เผื่อเวลาอีกนิด
+            await asyncio.wait_for(event.wait(), 1)
+        except asyncio.TimeoutError:
+            print("      ⏳ No search XHR on first load. Scrolling until one shows up...")
+            METRICS.counter("failures_total", "Failures by stage").inc(stage="search_capture")
+            return False
+    return True
+
+async def replay_search_pages(context, location_context, writer):
+    """
+    ยิง Request ค้นหาซ้ำด้วย offset ถัดไปผ่าน context.request (Cookie ชุดเดียวกับ Browser)
+    คืนค่า True ถ้าไล่จนหมดหน้า / False ถ้า Replay พัง (ให้กลับไปใช้ Scroll Loop)
+    """
+    captured = location_context.get("search_request")
+    if not captured: return False
+
+    try:
+        payload = json.loads(captured["post_data"])
+    except ValueError:
+        return False
+    pagination = _find_pagination(payload)
+    if pagination is None: return False
+
+    rows_per_page = int(pagination.get("rowsPerPage") or 25)
+    offset = int(pagination.get("offset") or 0)
+    print(f"      ⚡ JSON Replay from offset {offset + rows_per_page} ({rows_per_page}/page)...")
+
+    for _ in range(JSON_REPLAY_MAX_PAGES):
+        offset += rows_per_page
+        pagination["offset"] = offset
+        try:
+            with METRICS.timer("stage_seconds", stage="replay_request"):
+                response = await context.request.post(
+                    captured["url"],
+                    data=json.dumps(payload),
+                    headers=captured["headers"],
+                    timeout=30000
+                )
+                if not response.ok:
+                    print(f"      ⚠️ Replay HTTP {response.status} at offset {offset}")
+                    METRICS.counter("failures_total", "Failures by stage").inc(stage="replay")
+                    return False
+                json_body = await response.json()
+        except Exception as e:
+            print(f"      ⚠️ Replay Error at offset {offset}: {e}")
+            METRICS.counter("failures_total", "Failures by stage").inc(stage="replay")
+            return False
+
+        if not extract_search_results(json_body):
+            print(f"      🏁 Replay reached the end (offset {offset}).")
+            return True
+
+        await process_json_data(json_body, location_context, writer, engine="replay")
+        await asyncio.sleep(random.uniform(*JSON_REPLAY_DELAY))
+
+    return True
+
 # --- 🕵️‍♂️ ENGINE 2: HTML SCRAPER ---
-async def scan_current_page_html(page, location_context):
+async def scan_current_page_html(page, location_context, writer):
     try:
         await page.wait_for_selector('[data-testid="property-card"]', timeout=3000)
     except: pass
@@ -179,9 +439,11 @@ async def scan_current_page_html(page, location_context):
             if ".html" not in clean_url and "booking.com" not in clean_url: continue
 
             slug = clean_url.split('/')[-1].replace('.th.html', '').replace('.html', '')
-            external_id = slug
+            key = villa_key(slug) # externalId กลาง (ตัวเดียวกับ JSON Engine)
             
-            if external_id in PROCESSED_IDS: continue
+            if SEEN.is_fresh(key) or writer.is_pending(key):
+                METRICS.counter("items_duplicate_total", "Items skipped as already seen").inc(engine="html")
+                continue
 
             title_el = await card.query_selector('[data-testid="title"]')
             title = await title_el.inner_text() if title_el else "Unknown"
@@ -202,7 +464,7 @@ async def scan_current_page_html(page, location_context):
             except: rating = 0.0
 
             villa_data = {
-                "externalId": external_id,
+                "externalId": key,
                 "slug": slug,
                 "title": title,
                 "province": location_context["province"],
@@ -219,15 +481,15 @@ async def scan_current_page_html(page, location_context):
                 "updatedAt": datetime.now()
             }
             
-            if await save_snapshot(villa_data):
-                PROCESSED_IDS.add(external_id)
-                new_items += 1
+            await writer.add(key, villa_data)
+            new_items += 1
             
         except Exception:
             continue
     
     if new_items > 0:
         print(f"      🔨 (HTML) Swept {new_items} unique items.")
+        METRICS.counter("items_captured_total", "New items queued for upsert").inc(new_items, engine="html")
     return new_items
 
 # --- 🌪️ FORCE SCROLL HELPER ---
@@ -300,7 +562,7 @@ async def gentle_scroll_to_bottom(page):
     print("      🏁 Reached bottom.")
 
 # --- 🚜 CORE LOGIC ---
-async def process_location(page, location):
+async def process_location(page, location, writer):
     city = location["name"]
     print(f"\n🌍 Traveling to: {city} ({location['province']})...")
     
@@ -330,23 +592,38 @@ async def process_location(page, location):
     url = f"{BASE_URL}?{urllib.parse.urlencode(params)}"
     
     try:
-        await page.goto(url, timeout=60000)
+        with METRICS.timer("stage_seconds", stage="navigation"):
+            await page.goto(url, timeout=60000)
         await handle_genius_popup(page)
     except Exception as e:
         print(f"❌ Connection Failed: {e}")
+        METRICS.counter("failures_total", "Failures by stage").inc(stage="navigation")
         return
 
+    if JSON_FIRST:
+        with METRICS.timer("stage_seconds", stage="search_capture"):
+            await wait_for_search_request(page, location, SEARCH_CAPTURE_TIMEOUT)
+
     # Loop การกดปุ่ม
     total_rounds = 0
     max_rounds = 50 # กันบอทค้าง
     
     while total_rounds < max_rounds:
+        # ⚡ JSON-first: พอได้ Request ค้นหามาแล้ว ยิงตรงเลย (พังค่อยกลับมา Scroll ต่อ)
+        if JSON_FIRST and location.get("search_request") and not location.get("replay_failed"):
+            if await replay_search_pages(page.context, location, writer):
+                break
+            location["replay_failed"] = True
+            print("      ↩️ Replay failed. Falling back to scroll mode...")
+
         print(f"   🔄 Round {total_rounds + 1}: Scanning...")
 
-        await gentle_scroll_to_bottom(page)
+        with METRICS.timer("stage_seconds", stage="scroll_round"):
+            await gentle_scroll_to_bottom(page)
         
         # 1. เก็บของที่มีอยู่ตอนนี้ก่อน
-        await scan_current_page_html(page, location)
+        with METRICS.timer("stage_seconds", stage="html_scan"):
+            await scan_current_page_html(page, location, writer)
         
         # 2. นับจำนวนการ์ดปัจจุบัน (เพื่อใช้เช็คว่ากดติดไหม)
         current_card_count = await page.locator('[data-testid="property-card"]').count()
@@ -372,10 +649,11 @@ async def process_location(page, location):
                 # 🔥 KEY FIX: รอจนกว่าจำนวนการ์ดจะเพิ่มขึ้น (Timeout 15วิ)
                 # ถ้ากดแล้วการ์ดไม่เพิ่มใน 15 วิ ถือว่าเน็ตช้าหรือสุดทางแล้ว
                 try:
-                    await page.wait_for_function(
-                        f"document.querySelectorAll('[data-testid=\"property-card\"]').length > {current_card_count}",
-                        timeout=15000
-                    )
+                    with METRICS.timer("stage_seconds", stage="load_more_wait"):
+                        await page.wait_for_function(
+                            f"document.querySelectorAll('[data-testid=\"property-card\"]').length > {current_card_count}",
+                            timeout=15000
+                        )
                     print("      ✅ New items loaded!")
                 except:
                     print("      ⚠️ Clicked but no new items appeared (Might be end of list).")
@@ -391,41 +669,87 @@ async def process_location(page, location):
         total_rounds += 1
         await asyncio.sleep(random.uniform(2, 4)) # พักหายใจ
 
+# --- 🧵 WORKER (1 worker = 1 BrowserContext + 1 Page + Location Context ของตัวเอง) ---
+async def open_worker_context(browser, writer):
+    context = await browser.new_context(
+        viewport={'width': 1366, 'height': 768},
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+    )
+    page = await context.new_page()
+    location_ctx = {"name": "", "province": ""}
+
+    # Listener ผูกกับ location_ctx ของ worker นี้เท่านั้น (ไม่แชร์กับ worker อื่น)
+    async def handle_response(response):
+        if "graphql" in response.url or "searchresults" in response.url:
+            try:
+                ctype = response.headers.get("content-type", "")
+                if "application/json" in ctype:
+                    json_body = await response.json()
+                    await capture_search_request(response.request, json_body, location_ctx)
+                    await process_json_data(json_body, location_ctx, writer)
+            except: pass
+
+    page.on("response", handle_response)
+    return context, page, location_ctx
+
+async def location_worker(worker_id, browser, queue, writer):
+    # เปิด worker แบบเหลื่อมเวลา กันทุกตัวยิง Booking พร้อมกันตอนเริ่ม
+    await asyncio.sleep(worker_id * WORKER_START_STAGGER)
+    context, page, location_ctx = await open_worker_context(browser, writer)
+
+    try:
+        while not queue.empty():
+            location = queue.get_nowait()
+            location_ctx["name"] = location["name"]
+            location_ctx["province"] = location["province"]
+            location_ctx["search_request"] = None
+            location_ctx["search_captured"] = asyncio.Event()
+            location_ctx["replay_failed"] = False
+
+            try:
+                with METRICS.timer("location_seconds", location=location["name"]):
+                    await process_location(page, location_ctx, writer)
+            except Exception as e:
+                print(f"   ❌ [W{worker_id}] Failed at {location['name']}: {e}")
+                METRICS.counter("failures_total", "Failures by stage").inc(stage="location")
+
+            cooldown = random.uniform(*LOCATION_COOLDOWN)
+            print(f"   💤 [W{worker_id}] Cooling down {cooldown:.0f}s...")
+            await asyncio.sleep(cooldown)
+    finally:
+        await context.close()
+
 # --- 🚀 MAIN ENTRY POINT ---
-async def run_harvester():
-    print(f"🔥 Hydra Harvester V2.4 (The Zombie) Started...")
+async def run_harvester(concurrency=CONCURRENT_LOCATIONS):
+    print(f"🔥 Hydra Harvester V2.5 (The Hydra) Started... ({concurrency} worker(s))")
+    METRICS.serve(METRICS_PORT)
     
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            viewport={'width': 1366, 'height': 768},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-        )
-        
-        page = await context.new_page()
-        current_location_ctx = {"name": "", "province": ""}
-
-        async def handle_response(response):
-            if "graphql" in response.url or "searchresults" in response.url:
-                try:
-                    ctype = response.headers.get("content-type", "")
-                    if "application/json" in ctype:
-                        json_body = await response.json()
-                        await process_json_data(json_body, current_location_ctx)
-                except: pass
 
-        page.on("response", handle_response)
+        writer = SnapshotWriter()
+        writer.start()
+        METRICS.gauge("snapshot_buffer", "Rows waiting in the snapshot writer", fn=lambda: len(writer.buffer))
 
+        queue = asyncio.Queue()
         for location in TARGET_LOCATIONS:
-            current_location_ctx["name"] = location["name"]
-            current_location_ctx["province"] = location["province"]
-            
-            await process_location(page, location)
-            print("   💤 Cooling down 5s...")
-            await asyncio.sleep(5)
+            queue.put_nowait(location)
+
+        workers = [
+            location_worker(worker_id, browser, queue, writer)
+            for worker_id in range(max(1, min(concurrency, len(TARGET_LOCATIONS))))
+        ]
+        await asyncio.gather(*workers)
 
+        await writer.close()
+        SEEN.close()
         await browser.close()
         print("\n🎉 Mission Complete! All locations scanned.")
 
+        print_summary(METRICS, "stage_seconds")
+        path = METRICS.dump_json(os.path.join(METRICS_DIR, f"harvest-{datetime.now():%Y%m%d-%H%M%S}.json"))
+        print(f"📊 Metrics summary: {path}")
+        METRICS.shutdown()
+
 if __name__ == "__main__":
-    asyncio.run(run_harvester())
\ No newline at end of file
+    asyncio.run(run_harvester())
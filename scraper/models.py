@@ -1,6 +1,6 @@
 # scraper/models.py
 import os
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, Boolean, DateTime, ARRAY
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
@@ -33,6 +33,7 @@ class Villa(Base):
     maxGuests = Column(Integer, nullable=False, default=2)
     bedrooms = Column(Integer, nullable=False, default=1)
     bathrooms = Column(Integer, nullable=False, default=1)
+    price_per_person = Column(Integer, nullable=True) # priceDaily / maxGuests (retag.py)
 
     # --- Content (Rich Data) ---
     description = Column(Text, nullable=True)
@@ -42,12 +43,14 @@ class Villa(Base):
 
     # --- Visuals ---
     coverImage = Column(String, nullable=True)
-    images = Column(JSONB, default=[], nullable=False)
+    images = Column(JSONB, default=[], nullable=False) # เฉพาะ URL ที่ไม่มี Photo ID (รูป Booking อยู่ใน imageIds)
+    imageIds = Column(JSONB, default=[], nullable=False) # Photo ID ของ Booking ตามลำดับ Gallery (ดู BookingImage)
 
     # --- Complex Data (The JSONB Magic) ---
     features = Column(JSONB, default={}, nullable=False) # {hasPool: true, ...}
     facilities = Column(JSONB, default={}, nullable=False) # {popular: [], categories: []}
     policies = Column(JSONB, default={}, nullable=False) # checkIn, checkOut, rules
+    facility_tags = Column(JSONB, default=[], nullable=True) # [{id, label, icon, color}] จาก get_facility_tags (retag.py)
     nearbyPlaces = Column(JSONB, default=[], nullable=False) # list of places
     
     # --- Social Proof ---
@@ -63,11 +66,38 @@ class Villa(Base):
     tags = Column(ARRAY(String), nullable=True)
     isActive = Column(Boolean, default=True, nullable=False)
 
+    # --- Enrichment Lease (หลายเครื่องช่วยกัน Enrich ไม่ให้แย่งแถวเดียวกัน) ---
+    enrichLeaseOwner = Column(String, nullable=True)
+    enrichLeaseUntil = Column(DateTime(timezone=True), nullable=True)
+
     # --- Timestamps ---
     createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
+class VillaEnrichState(Base):
+    # สถานะของ Enricher แยกจากแถว Villa (เช็คแล้วไม่มีอะไรเปลี่ยน = ไม่ต้องเขียนแถว Villa ทั้งแถวใหม่)
+    __tablename__ = "VillaEnrichState"
+    __table_args__ = {"schema": "public"}
+
+    villaId = Column(Integer, primary_key=True, autoincrement=False)
+    lastCheckedAt = Column(DateTime(timezone=True), nullable=True) # Enricher เช็คล่าสุดเมื่อไหร่ (ไม่ต้องมีอะไรเปลี่ยนก็ขยับ)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False) # พังติดกันกี่ครั้ง (สำเร็จแล้วกลับเป็น 0)
+    lastFailedAt = Column(DateTime(timezone=True), nullable=True)
+
+
+class BookingImage(Base):
+    # 1 แถว = 1 รูปของ Booking (หลาย Villa ใช้รูปเดียวกันได้)
+    __tablename__ = "BookingImage"
+    __table_args__ = {"schema": "public"}
+
+    photoId = Column(BigInteger, primary_key=True, autoincrement=False) # เลขชื่อไฟล์ .../max500/<photoId>.jpg
+    url = Column(String, nullable=False)              # URL มาตรฐาน (max1280x900 + k=)
+    variants = Column(JSONB, default=[], nullable=False) # ขนาดที่เคยเจอ เช่น ["max500", "max1024x768"]
+    firstVillaId = Column(Integer, nullable=True)     # Villa แรกที่เจอรูปนี้
+    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class Scoop(Base):
     # ชื่อ Table ต้องตรงกับในรูป (Postgres อาจมองเป็น scoop หรือ "Scoop" แล้วแต่ setup)
     # ถ้าสร้างผ่าน Prisma มักจะเป็น "Scoop"
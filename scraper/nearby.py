@@ -0,0 +1,109 @@
+# scraper/nearby.py
+"""
+Spatial Index ของ Villa (utils/spatial.py) จาก DB + คำสั่ง Query จาก Command line
+
+    python nearby.py build                         # โหลดพิกัดทุกหลังจาก DB -> Snapshot
+    python nearby.py update                        # ดึงเฉพาะแถวที่ updatedAt ใหม่กว่า Snapshot
+    python nearby.py near 12.93 100.88 --km 5      # Villa ในรัศมี 5 km
+    python nearby.py related 123 456 --k 10        # 10 หลังที่ใกล้ที่สุดของ Villa 123, 456
+    python nearby.py geocode 12.93 100.88          # พิกัด -> District / Province / ตำบล
+
+ใช้ Snapshot ที่มีอยู่เสมอ (ไม่มีก็ build ให้ก่อน) ไม่ต้อง Scan ตารางทุกครั้งที่ Query
+"""
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+
+from database import DATABASE_URL
+from utils.enrichment.address import cleaner
+from utils.spatial import SpatialIndex
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "spatial", "villas.npz")
+
+# isActive = false ก็ต้องดึงมาด้วย (เอาออกจาก Index ตอน update)
+SELECT_SQL = """
+    SELECT "id", "latitude", "longitude", "district", "province", "isActive",
+           EXTRACT(EPOCH FROM "updatedAt")
+    FROM "Villa"
+    {where}
+"""
+
+
+def sync(index, conn, since=None, chunk_size=5000):
+    """ดึงแถวจาก DB เข้า Index (since = epoch ของ updatedAt -> ดึงเฉพาะที่ใหม่กว่า) คืนจำนวนแถวที่ดึง"""
+    where, params = ('WHERE "updatedAt" > to_timestamp(%s)', (since,)) if since is not None else ("", ())
+    count = 0
+    with conn.cursor(name="villa_spatial_stream") as cur:
+        cur.itersize = chunk_size
+        cur.execute(SELECT_SQL.format(where=where), params)
+        for villa_id, lat, lng, district, province, active, updated_at in cur:
+            if active:
+                index.upsert(villa_id, lat, lng, district, province)
+            else:
+                index.remove(villa_id)
+            index.synced_at = max(index.synced_at or 0.0, float(updated_at))
+            count += 1
+    conn.rollback()  # อ่านอย่างเดียว ปิด Transaction ของ Named cursor
+    return count
+
+
+def open_index(path=SNAPSHOT_PATH, refresh=False):
+    """โหลด Snapshot (ไม่มี -> build จาก DB) / refresh=True -> ดึงแถวที่เปลี่ยนแล้วบันทึกทับ"""
+    if os.path.exists(path) and not refresh:
+        return SpatialIndex.load(path)
+    index = SpatialIndex.load(path) if os.path.exists(path) else SpatialIndex()
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        started = time.perf_counter()
+        count = sync(index, conn, index.synced_at)
+        print(f"🗺️  Synced {count} villas ({len(index)} indexed) in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+    index.save(path)
+    return index
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Villa spatial index")
+    ap.add_argument("--snapshot", default=SNAPSHOT_PATH)
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="สร้าง Index ใหม่ทั้งหมดจาก DB")
+    sub.add_parser("update", help="ดึงเฉพาะ Villa ที่เปลี่ยนตั้งแต่ Snapshot ล่าสุด")
+    near = sub.add_parser("near", help="Villa ในรัศมี")
+    near.add_argument("lat", type=float)
+    near.add_argument("lng", type=float)
+    near.add_argument("--km", type=float, default=5.0)
+    related = sub.add_parser("related", help="k หลังที่ใกล้ที่สุดของ Villa")
+    related.add_argument("villa_ids", type=int, nargs="+")
+    related.add_argument("--k", type=int, default=10)
+    related.add_argument("--max-km", type=float)
+    geocode = sub.add_parser("geocode", help="พิกัด -> District / Province / ตำบล")
+    geocode.add_argument("lat", type=float)
+    geocode.add_argument("lng", type=float)
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        if os.path.exists(args.snapshot): os.remove(args.snapshot)
+        open_index(args.snapshot, refresh=True)
+        return 0
+    if args.command == "update":
+        open_index(args.snapshot, refresh=True)
+        return 0
+
+    index = open_index(args.snapshot)
+    if args.command == "near":
+        for villa_id, km in index.within(args.lat, args.lng, args.km):
+            print(f"   {villa_id:>8}  {km:6.2f} km")
+    elif args.command == "related":
+        for villa_id, neighbours in index.related(args.villa_ids, args.k, args.max_km).items():
+            print(f"🏠 {villa_id}: " + ", ".join(f"{other} ({km:.1f} km)" for other, km in neighbours))
+    elif args.command == "geocode":
+        print(index.reverse_geocode_many([args.lat], [args.lng], cleaner)[0])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
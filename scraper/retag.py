@@ -0,0 +1,122 @@
+# scraper/retag.py
+"""
+Retag ทั้งตาราง Villa: คำนวณคอลัมน์ที่ Derive มาใหม่หมดในรอบเดียว
+- facility_tags     <- get_facility_tags(facilities)
+- maxGuests         <- get_guest_data (เกลาจำนวนแขก)
+- price_per_person  <- priceDaily / maxGuests
+
+อ่านแบบ Stream (Server-side cursor) ทีละ Chunk -> COPY ลง Temp Table -> UPDATE ... FROM ครั้งเดียว
+ทั้งหมดอยู่ใน Transaction เดียว (พังกลางทางก็ไม่มีแถวไหนถูกแก้ครึ่งๆ กลางๆ)
+
+    python retag.py              # เขียนจริง
+    python retag.py --dry-run    # นับอย่างเดียว แล้ว Rollback
+"""
+import argparse
+import io
+import json
+import math
+import time
+
+import psycopg2
+
+from database import DATABASE_URL
+from utils.enrichment.facilities import get_facility_tags_many
+from utils.enrichment.guests import get_guest_data_many
+
+CHUNK_SIZE = 5000
+
+SELECT_SQL = """
+    SELECT "id", "facilities"::text, "bedrooms", "maxGuests", "priceDaily"
+    FROM "Villa"
+    ORDER BY "id"
+"""
+
+CREATE_TEMP_SQL = """
+    CREATE TEMP TABLE villa_retag (
+        id integer PRIMARY KEY,
+        facility_tags jsonb NOT NULL,
+        max_guests integer NOT NULL,
+        price_per_person integer
+    ) ON COMMIT DROP
+"""
+
+# เขียนเฉพาะแถวที่ค่าเปลี่ยนจริง (ไม่ให้ GIN Index / WAL บวมจากการเขียนค่าเดิมทับ)
+UPDATE_SQL = """
+    UPDATE "Villa" AS v
+    SET "facility_tags" = t.facility_tags,
+        "maxGuests" = t.max_guests,
+        "price_per_person" = t.price_per_person
+    FROM villa_retag AS t
+    WHERE v."id" = t.id
+      AND (v."facility_tags" IS DISTINCT FROM t.facility_tags
+           OR v."maxGuests" IS DISTINCT FROM t.max_guests
+           OR v."price_per_person" IS DISTINCT FROM t.price_per_person)
+"""
+
+
+def _copy_text(value):
+    # COPY แบบ text: backslash ต้อง escape (JSON จาก json.dumps ไม่มี Tab / ขึ้นบรรทัดใหม่ดิบๆ อยู่แล้ว)
+    return value.replace("\\", "\\\\")
+
+
+def compute_chunk(rows):
+    """[(id, facilities_json, bedrooms, maxGuests, priceDaily)] -> ข้อมูล COPY (text format)"""
+    ids, facilities, bedrooms, guests, prices = zip(*rows)
+    tags = get_facility_tags_many(facilities)
+    max_guests, price_pp = get_guest_data_many(guests, bedrooms, prices)
+
+    # ชุด Tag ซ้ำกันเยอะมาก -> แปลงเป็น JSON ครั้งเดียวต่อชุด
+    encoded = {}
+    lines = []
+    for villa_id, villa_tags, villa_guests, villa_price in zip(ids, tags, max_guests.tolist(), price_pp.tolist()):
+        key = tuple(tag["id"] for tag in villa_tags)
+        if key not in encoded:
+            encoded[key] = _copy_text(json.dumps(villa_tags, ensure_ascii=False))
+        price = "\\N" if math.isnan(villa_price) else int(villa_price)
+        lines.append(f"{villa_id}\t{encoded[key]}\t{villa_guests}\t{price}\n")
+    return io.StringIO("".join(lines))
+
+
+def run_retag(chunk_size=CHUNK_SIZE, dry_run=False):
+    started = time.perf_counter()
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_TEMP_SQL)
+
+        # Named cursor = Server-side: ดึงทีละ chunk_size แถว ไม่โหลดทั้งตารางเข้า Memory
+        total = 0
+        with conn.cursor(name="villa_retag_stream") as stream, conn.cursor() as writer:
+            stream.itersize = chunk_size
+            stream.execute(SELECT_SQL)
+            while True:
+                rows = stream.fetchmany(chunk_size)
+                if not rows: break
+                writer.copy_expert("COPY villa_retag FROM STDIN", compute_chunk(rows))
+                total += len(rows)
+                print(f"   🏷️  Tagged {total} villas ({time.perf_counter() - started:.1f}s)")
+
+        with conn.cursor() as cur:
+            cur.execute(UPDATE_SQL)
+            changed = cur.rowcount
+
+        if dry_run:
+            conn.rollback()
+            print(f"🧪 Dry run: {changed}/{total} villas would change (rolled back)")
+        else:
+            conn.commit()
+            print(f"✅ Retagged {total} villas, {changed} changed in {time.perf_counter() - started:.1f}s")
+        return total, changed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Recompute facility_tags / maxGuests / price_per_person for every villa")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--dry-run", action="store_true", help="คำนวณ + นับแถวที่จะเปลี่ยน แล้ว Rollback")
+    args = ap.parse_args()
+    run_retag(args.chunk_size, args.dry_run)
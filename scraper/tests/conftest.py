@@ -0,0 +1,9 @@
+# scraper/tests/conftest.py
+import os
+import sys
+
+# โค้ดใน scraper/ import กันแบบ `from utils...` (รันจากโฟลเดอร์ scraper) -> ให้ Test เห็น Path เดียวกัน
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Parser ไม่แตะ DB แต่ enrich.py สร้าง Engine ตอน import (ไม่ได้ต่อจริงจนกว่าจะ Query)
+os.environ.setdefault("DATABASE_URL", "postgresql://offline@localhost/tests")
@@ -0,0 +1,38 @@
+# scraper/tests/test_gazetteer.py
+"""
+Gazetteer ที่ Commit ไว้ใน Repo (data/th_gazetteer.npz): ที่อยู่อังกฤษ / ไทย ต้อง Resolve ได้ และ Field ต้องเป็นอังกฤษ
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils.enrichment.address import LocationCleaner
+from utils.enrichment.gazetteer import gazetteer
+
+
+@pytest.fixture(scope="module")
+def cleaner():
+    if not gazetteer.available:
+        pytest.skip("data/th_gazetteer.npz not found")
+    return LocationCleaner(gazetteer)
+
+
+@pytest.mark.parametrize("address, current, expected", [
+    ("Rawai, Mueang Phuket, Phuket 83130", "Phuket", ("Mueang Phuket", "Phuket", "Rawai")),
+    ("Nong Prue, Bang Lamung, Chon Buri 20150", None, ("Pattaya", "Chonburi", "Nong Prue")),
+    ("หนองปรือ บางละมุง ชลบุรี 20150", None, ("Pattaya", "Chonburi", "Nong Prue")),
+])
+def test_resolves_to_english_names(cleaner, address, current, expected):
+    assert cleaner.process(address, current) == expected
+
+
+def test_every_tambon_has_an_english_name():
+    if not gazetteer.available:
+        pytest.skip("data/th_gazetteer.npz not found")
+    for level, count in (("province", 77), ("tambon", len(gazetteer))):
+        assert all(gazetteer.name(level, index, fallback=False) for index in range(count)), level
+
+
+def test_hierarchy_keeps_thai_and_english(cleaner):
+    hierarchy = cleaner.locate("Rawai, Phuket 83130", None, None, None)["locationHierarchy"]
+    assert hierarchy[-1] == {"level": "tambon", "th": "ราไวย์", "en": "Rawai", "postcode": "83130"}
@@ -0,0 +1,17 @@
+# scraper/tests/test_image_index.py
+"""
+images ในแถว Villa เหลือแค่ URL ที่ไม่มี Photo ID -> ประกอบ Gallery กลับจาก imageIds + BookingImage ได้ครบตามลำดับ
+"""
+from utils.image_index import extra_urls, image_urls
+
+HOTEL = "https://cf.bstatic.com/xdata/images/hotel/max1280x900/{}.jpg?k=abc"
+OTHER = "https://example.com/cover.jpg"
+
+
+def test_extra_urls_keeps_only_urls_without_photo_id():
+    assert extra_urls([HOTEL.format(1), OTHER, HOTEL.format(2)]) == [OTHER]
+
+
+def test_image_urls_rebuilds_gallery_in_order():
+    urls_by_id = {1: HOTEL.format(1), 2: HOTEL.format(2)}
+    assert image_urls([2, 1, 3], urls_by_id, [OTHER]) == [HOTEL.format(2), HOTEL.format(1), OTHER]
@@ -0,0 +1,109 @@
+# scraper/tests/test_parser_parity.py
+"""
+lxml กับ bs4 ต้องให้ผลเหมือนกันทุก Field (Fixture เป็นหน้าสังเคราะห์หน้าตาแบบ Booking ไม่มีข้อมูลจริง)
+"""
+import glob
+import io
+import json
+import os
+import re
+from contextlib import redirect_stdout
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+pytest.importorskip("cssselect")
+
+from enrich import BookingParser, ScraperUtils
+from utils.html_backend import make_document
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+BACKENDS = ("lxml", "bs4")
+
+
+def parse(html, backend):
+    with redirect_stdout(io.StringIO()):
+        data = BookingParser.parse_main_page(html, backend)
+    return json.loads(json.dumps(data, ensure_ascii=False))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=[os.path.basename(p)[:-5] for p in FIXTURES])
+def test_parse_main_page_backends_agree(path):
+    html = read(path)
+    lxml_data, bs4_data = parse(html, "lxml"), parse(html, "bs4")
+    assert sorted(lxml_data) == sorted(bs4_data)
+    for key in lxml_data:
+        assert lxml_data[key] == bs4_data[key], key
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pool_villa_fields(backend):
+    data = parse(read(os.path.join(FIXTURE_DIR, "pool_villa.html")), backend)
+    # find(string=) + decompose ของ aria-hidden
+    assert data["address"] == "99/9 หมู่ 9 ถนนตัวอย่าง, บางละมุง, ชลบุรี 20150, ประเทศไทย"
+    # Comment / script ใน Description ไม่ติดมา
+    assert data["description"] == "Sunny Test Pool Villa อยู่ห่างจาก หาดจอมเทียน 900 เมตร มีสระว่ายน้ำส่วนตัว และ Wi-Fi ฟรี"
+    assert data["policies"][1] == {"topic": "สัตว์เลี้ยง", "content": "ไม่อนุญาตให้นำสัตว์เลี้ยงเข้าพัก"}
+    # span:first-child / div:first-child
+    assert [r["category"] for r in data["reviewData"]] == ["ความสะอาด", "ทำเลที่ตั้ง", "ความคุ้มค่า"]
+    assert data["features"]["specs"] == {"bedrooms": 3, "bathrooms": 1, "maxGuests": 6}
+    assert data["features"]["priceDaily"] == 12500
+    assert data["images"][0] == "https://cf.bstatic.com/xdata/images/hotel/max1280x900/111111.jpg?k=bbb222"
+    assert data["imageRecords"][0]["variants"] == ["square60", "max1024x768"]
+
+
+# --- API ที่ _parse_*_logic ใช้ ต้องทำงานเหมือนกันทั้งสอง Backend ---
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("html, text, parent", [
+    ('<p>ที่อยู่ <b>ชลบุรี, ประเทศไทย</b> ท้าย</p>', "ชลบุรี, ประเทศไทย", "b"),
+    # bs4 เห็น Comment / script / style เป็น String ด้วย (ตัวแรกที่เจอชนะ)
+    ('<!-- ประเทศไทย --><p>ประเทศไทย</p>', " ประเทศไทย ", "div"),
+    ('<script>var c = "ประเทศไทย";</script><p>ประเทศไทย</p>', 'var c = "ประเทศไทย";', "script"),
+    ('<p>ก <style>/* ประเทศไทย */</style>ประเทศไทย</p>', "/* ประเทศไทย */", "style"),
+    ('<p>ก</p>ประเทศไทย', "ประเทศไทย", "div"),
+])
+def test_find_string(backend, html, text, parent):
+    soup = make_document(f'<div id="w">{html}</div>', backend)
+    found = soup.select_one("#w").find(string=re.compile("ไทย"))
+    assert str(found) == text
+    assert found.parent.name == parent
+    assert soup.select_one("#w").find(string=re.compile("ไม่มีคำนี้")) is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decompose_keeps_tail_text(backend):
+    soup = make_document('<p id="a">ถนน 1 <span aria-hidden="true">ซ่อน</span>ตำบล 2 <i aria-hidden="true">x</i></p>', backend)
+    container = soup.select_one("#a")
+    for hidden in container.select('[aria-hidden="true"]'):
+        hidden.decompose()
+    assert ScraperUtils.clean_text(container.get_text(" ")) == "ถนน 1 ตำบล 2"
+    assert container.select('[aria-hidden="true"]') == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_first_child_selector(backend):
+    soup = make_document(
+        '<div class="row"><span>หนึ่ง</span><span>สอง</span></div>'
+        '<div class="row"><b>x</b><span>สาม</span></div>'
+        '<div class="row"><div><div>สี่</div></div><div>ห้า</div></div>', backend)
+    assert [el.get_text() for el in soup.select(".row span:first-child")] == ["หนึ่ง"]
+    rows = soup.select(".row")
+    assert rows[2].select_one("div:first-child").get_text() == "สี่"
+    assert [el.get_text() for el in rows[2].select("div:first-child")] == ["สี่", "สี่"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_get_text_skips_comment_and_script(backend):
+    soup = make_document(
+        '<div id="d">ก<!-- comment --><script>var s = 1;</script><style>p {}</style>ข <b>ค</b> ง</div>', backend)
+    el = soup.select_one("#d")
+    assert el.get_text() == "กข ค ง"
+    assert el.get_text(" ", strip=True) == "ก ข ค ง"
@@ -0,0 +1,36 @@
+# scraper/tests/test_resource_blocker.py
+"""
+ตัด / ปล่อย ตามชนิดจริงของ Request + allow_patterns (ไม่มี Browser: เช็คแค่ตัวตัดสินใจ)
+"""
+import pytest
+
+from utils.resource_blocker import ResourceBlocker
+
+
+@pytest.mark.parametrize("url, kind, blocked", [
+    ("https://cf.bstatic.com/xdata/images/hotel/max1024x768/1.jpg?k=a", "image", True),
+    ("https://cf.bstatic.com/static/fonts/a.woff2", "font", True),
+    # นามสกุลรูปอยู่ใน URL แต่เป็น XHR/JSON -> ต้องปล่อย
+    ("https://www.booking.com/api/photos.png.json", "xhr", False),
+    ("https://www.booking.com/fetch?file=cover.jpg", "fetch", False),
+    # Domain Tracker ตัดตาม Host ไม่ใช่แค่มีชื่ออยู่ใน Query
+    ("https://static.hotjar.com/c/hotjar.js", "script", True),
+    ("https://www.booking.com/hotel/th/a.html?ref=hotjar.com", "document", False),
+    # allow_patterns ชนะทุกกฎ
+    ("https://cf.bstatic.com/psb/capla/static/js/facilities.png", "image", False),
+    ("https://www.booking.com/dml/graphql?lang=th", "xhr", False),
+])
+def test_should_block(url, kind, blocked):
+    assert ResourceBlocker().should_block(url, kind) is blocked
+
+
+def test_block_patterns_are_whole_url_globs():
+    blocker = ResourceBlocker({"block_patterns": ["*bstatic.com/*/lottie/*.json"]})
+    assert blocker.should_block("https://cf.bstatic.com/psb/lottie/spinner.json", "xhr")
+    assert not blocker.should_block("https://cf.bstatic.com/psb/lottie/spinner.json?v=2", "xhr")
+
+
+def test_fetch_patterns_use_resource_types():
+    patterns = ResourceBlocker().fetch_patterns
+    assert {"urlPattern": "*", "resourceType": "Image"} in patterns
+    assert not any(".jpg" in p["urlPattern"] or ".png" in p["urlPattern"] for p in patterns)
@@ -0,0 +1,84 @@
+# scraper/utils/adaptive_limiter.py
+"""
+Adaptive Limiter (AIMD) ใช้แทน asyncio.Semaphore ที่ล็อกจำนวน Tab ตายตัว
+- ทุก window ที่ p95 เวลาโหลดหน้า และอัตรา Timeout ยังดีอยู่ -> เพิ่มทีละ 1 (Additive Increase)
+- เจอ Timeout / CAPTCHA / HTTP 429, 403 -> คูณลด (Multiplicative Decrease) แล้วพักตามระดับ backoff
+- ลดได้ไม่เกิน 1 ครั้งต่อ cooldown วินาที (Error ที่มาเป็นชุดจากเหตุเดียวกันจะได้ไม่ลดซ้ำจนเหลือ 1)
+"""
+import asyncio
+import time
+from collections import deque
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial=5, min_limit=1, max_limit=12, target_p95=20.0,
+                 max_timeout_rate=0.1, window=20, decrease_factor=0.5, cooldown=30.0):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_p95 = target_p95
+        self.max_timeout_rate = max_timeout_rate
+        self.window = window
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.backoff_level = 0          # เพิ่มเมื่อโดนลด ลดลงเมื่อได้เพิ่ม (ใช้คูณเวลาพัก)
+        self.samples = deque(maxlen=window)
+        self._since_adjust = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+        self.stats = {"ok": 0, "timeout": 0, "blocked": 0, "increases": 0, "decreases": 0}
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def p95(self):
+        latencies = sorted(latency for latency, _ in self.samples)
+        if not latencies: return 0.0
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def timeout_rate(self):
+        if not self.samples: return 0.0
+        return sum(1 for _, timed_out in self.samples if timed_out) / len(self.samples)
+
+    async def record(self, latency, outcome):
+        """outcome: "ok" | "timeout" | "blocked" (CAPTCHA / 429 / 403)"""
+        self.stats[outcome] += 1
+        if outcome != "blocked":
+            self.samples.append((latency, outcome == "timeout"))
+        self._since_adjust += 1
+
+        if outcome in ("blocked", "timeout"):
+            await self._decrease(outcome)
+        elif self._since_adjust >= self.window and self.p95() <= self.target_p95 \
+                and self.timeout_rate() <= self.max_timeout_rate:
+            await self._increase()
+
+    async def _increase(self):
+        self._since_adjust = 0
+        self.backoff_level = max(0, self.backoff_level - 1)
+        if self.limit >= self.max_limit: return
+        async with self._cond:
+            self.limit += 1
+            self.stats["increases"] += 1
+            self._cond.notify_all()
+        print(f"   📈 Concurrency -> {self.limit} (p95 {self.p95():.1f}s)")
+
+    async def _decrease(self, reason):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown: return
+        self._last_decrease = now
+        self._since_adjust = 0
+        self.backoff_level += 1
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self.stats["decreases"] += 1
+        print(f"   📉 Concurrency -> {self.limit} ({reason}, backoff x{self.backoff_level})")
@@ -0,0 +1,146 @@
+# scraper/utils/archive.py
+"""
+Page Archive: เก็บ HTML ทุกหน้าที่ Enricher โหลดมา ไว้ Re-parse ภายหลังโดยไม่ต้อง Crawl ใหม่
+- Content-addressed: objects/<sha256[:2]>/<sha256> (หน้าเดิมเป๊ะเก็บครั้งเดียว)
+- บีบอัดด้วย zstd (+ Dictionary ที่ Train จากหน้าที่เก็บไว้แล้ว: หน้า Booking หน้าตาคล้ายกันมาก)
+  ไม่มี `zstandard` -> ใช้ gzip แทน (อ่านได้ทั้งสองแบบ)
+- Index (SQLite): villa_id + เวลา fetch -> digest, ดึงหน้าล่าสุดของแต่ละ Villa ได้ทันที
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+class PageArchive:
+    def __init__(self, root, level=10):
+        self.root = root
+        self.level = level
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "dictionaries"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite3"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "digest TEXT PRIMARY KEY, codec TEXT NOT NULL, dict_id INTEGER, raw_size INTEGER NOT NULL, stored_size INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetches ("
+            "villa_id INTEGER NOT NULL, slug TEXT, digest TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS fetches_villa ON fetches (villa_id, fetched_at)")
+        self._dicts = {}     # dict_id -> ZstdCompressionDict
+        self._compressor = None
+        self._active_dict = self._latest_dictionary() if HAS_ZSTD else None
+
+    # --- เขียน ---
+    def put(self, villa_id, slug, html, fetched_at=None):
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if not exists:
+                codec, dict_id, blob = self._compress(raw)
+                path = self._object_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, path)
+                self.conn.execute(
+                    "INSERT INTO objects (digest, codec, dict_id, raw_size, stored_size) VALUES (?, ?, ?, ?, ?)",
+                    (digest, codec, dict_id, len(raw), len(blob))
+                )
+            self.conn.execute(
+                "INSERT INTO fetches (villa_id, slug, digest, fetched_at) VALUES (?, ?, ?, ?)",
+                (villa_id, slug, digest, fetched_at or time.time())
+            )
+        return digest
+
+    def _compress(self, raw):
+        if not HAS_ZSTD:
+            return "gzip", None, gzip.compress(raw, compresslevel=6)
+        if self._compressor is None:
+            self._compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._active_dict)
+        dict_id = self._active_dict.dict_id() if self._active_dict else None
+        return "zstd", dict_id, self._compressor.compress(raw)
+
+    # --- อ่าน ---
+    def get(self, digest):
+        row = self.conn.execute("SELECT codec, dict_id FROM objects WHERE digest = ?", (digest,)).fetchone()
+        if not row: return None
+        codec, dict_id = row
+        with open(self._object_path(digest), "rb") as f:
+            blob = f.read()
+        if codec == "gzip":
+            return gzip.decompress(blob).decode("utf-8")
+        if not HAS_ZSTD:
+            raise ImportError("archive object is zstd-compressed; install `zstandard` to read it")
+        dict_data = self._load_dictionary(dict_id) if dict_id else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(blob).decode("utf-8")
+
+    def latest(self, villa_ids=None):
+        """[(villa_id, slug, digest, fetched_at)] หน้าล่าสุดของแต่ละ Villa เรียงตาม villa_id"""
+        rows = self.conn.execute(
+            "SELECT villa_id, slug, digest, MAX(fetched_at) FROM fetches GROUP BY villa_id ORDER BY villa_id"
+        ).fetchall()
+        if villa_ids is not None:
+            wanted = set(villa_ids)
+            rows = [row for row in rows if row[0] in wanted]
+        return rows
+
+    def stats(self):
+        objects, raw, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM objects"
+        ).fetchone()
+        fetches = self.conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+        return {"objects": objects, "fetches": fetches, "raw_mb": raw / 1048576, "stored_mb": stored / 1048576,
+                "ratio": raw / stored if stored else 0.0}
+
+    # --- Dictionary ---
+    def train_dictionary(self, samples=500, dict_size=112 * 1024):
+        """
+        Train zstd Dictionary จากหน้าล่าสุดที่เก็บไว้ (ของเก่ายังอ่านได้ด้วย Dictionary เดิม)
+        หน้าที่เก็บหลังจากนี้จะใช้ Dictionary ใหม่
+        """
+        if not HAS_ZSTD:
+            raise ImportError("training a dictionary needs `zstandard` installed")
+        digests = [row[0] for row in self.conn.execute(
+            "SELECT digest FROM fetches GROUP BY digest ORDER BY MAX(fetched_at) DESC LIMIT ?", (samples,)
+        )]
+        corpus = [self.get(digest).encode("utf-8") for digest in digests]
+        if len(corpus) < 10:
+            raise ValueError(f"need at least 10 archived pages to train a dictionary (have {len(corpus)})")
+        trained = zstandard.train_dictionary(dict_size, corpus)
+        with open(os.path.join(self.root, "dictionaries", f"{trained.dict_id()}.zdict"), "wb") as f:
+            f.write(trained.as_bytes())
+        self._dicts[trained.dict_id()] = trained
+        self._active_dict = trained
+        self._compressor = None
+        return trained.dict_id()
+
+    def _latest_dictionary(self):
+        folder = os.path.join(self.root, "dictionaries")
+        paths = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".zdict")]
+        if not paths: return None
+        newest = max(paths, key=os.path.getmtime)
+        return self._load_dictionary(int(os.path.basename(newest)[:-len(".zdict")]))
+
+    def _load_dictionary(self, dict_id):
+        if dict_id not in self._dicts:
+            with open(os.path.join(self.root, "dictionaries", f"{dict_id}.zdict"), "rb") as f:
+                self._dicts[dict_id] = zstandard.ZstdCompressionDict(f.read())
+        return self._dicts[dict_id]
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def close(self):
+        self.conn.close()
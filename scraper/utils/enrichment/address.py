@@ -1,7 +1,13 @@
 import re
 
+from utils.enrichment.gazetteer import gazetteer as default_gazetteer
+from utils.enrichment.matcher import KeywordMatcher
+
 class LocationCleaner:
-    def __init__(self):
+    def __init__(self, gazetteer=default_gazetteer):
+        # 0. Gazetteer ทั้งประเทศ (โหลดตอนใช้ครั้งแรก) -> subDistrict / locationHierarchy / Postcode ที่ไม่อยู่ใน Map
+        self.gazetteer = gazetteer
+
         # 1. POSTCODE MAP (แม่นยำที่สุด - ใช้ระบุ District/Province หลัก)
         self.POSTCODE_MAP = {
             # ชลบุรี
@@ -110,11 +116,25 @@ class LocationCleaner:
         self.postcode_regex = re.compile(r'\b(\d{5})\b')
         self.prefix_cleaner = re.compile(r'^(Tambon|Amphoe|Sub-district|District|ต\.|อ\.|ตำบล|อำเภอ)\s*', re.IGNORECASE)
 
-    def process(self, address, current_district=None):
+        # Index ของ KEYWORD_MAP (lowercase, สร้างครั้งเดียว):
+        # - Automaton ค้นทุก Keyword ในข้อความรอบเดียว (O(ความยาวข้อความ) ไม่ใช่ O(จำนวน Keyword))
+        # - Dict สำหรับเทียบทั้งคำ (ขั้นที่ 3)
+        self.keyword_matcher = KeywordMatcher(self.KEYWORD_MAP).build()
+        self.keyword_exact = {key.lower(): value for key, value in self.KEYWORD_MAP.items()}
+
+    def process(self, address, current_district=None, latitude=None, longitude=None):
         """
-        Input: Address, Current District
+        Input: Address, Current District (+ พิกัด ถ้ามี)
         Output: (New District, New Province, New SubDistrict)
         """
+        result = self.locate(address, current_district, latitude, longitude)
+        return result["district"], result["province"], result["subDistrict"]
+
+    def locate(self, address, current_district=None, latitude=None, longitude=None):
+        """
+        เหมือน process แต่คืน dict ครบ: district, province, subDistrict, locationHierarchy
+        (subDistrict / locationHierarchy มาจาก Gazetteer ถ้ามีไฟล์ข้อมูล ไม่มีก็ได้ None / [] เหมือนเดิม)
+        """
         dist, prov, sub = None, None, None
 
         # 1. ลองหาจาก Postcode ก่อน (แม่นสุด)
@@ -128,22 +148,53 @@ class LocationCleaner:
         # 2. ถ้าไม่มี Postcode ให้หาจาก Keyword (Dictionary)
         if not dist:
             # เช็คใน Address
+            # เจอหลายคำ -> เอาคำที่ยาวที่สุด (เช่น "Koh Chang Tai" ชนะ "Koh Chang") ไม่ขึ้นกับลำดับใน Map
             target_text = (address or "") + " " + (current_district or "")
-            for key, (d, p) in self.KEYWORD_MAP.items():
-                if key.lower() in target_text.lower():
-                    dist, prov = d, p
-                    break
+            best = self.keyword_matcher.best(target_text)
+            if best:
+                dist, prov = best[3]
+
+        # 2.5 Gazetteer: ตำบลจาก Postcode / ชื่อ / พิกัด (ชื่ออำเภอที่เราตั้งเองใน Map ข้างบนยังชนะ)
+        place, hierarchy = None, []
+        if self.gazetteer is not None and self.gazetteer.available and (address or latitude is not None):
+            place = self.gazetteer.resolve(address, latitude, longitude)
+            if place:
+                hierarchy = self.gazetteer.hierarchy(place)
+                # ทุก Field ใช้ชื่ออังกฤษเท่านั้น (ไม่ปนภาษาในแถวเดียวกัน) ชื่อไทยอยู่ใน locationHierarchy
+                if place.tambon is not None:
+                    sub = self.gazetteer.name("tambon", place.tambon, fallback=False) or None
+                if not dist and self.gazetteer.name("amphoe", place.amphoe, fallback=False):
+                    dist = self.gazetteer.name("amphoe", place.amphoe)
+                    prov = self.gazetteer.name("province", place.province)
 
         # 3. ถ้าหา District ไม่ได้จริงๆ ให้ใช้ของเดิม แต่ Clean Prefix
         if not dist and current_district:
             dist = self.prefix_cleaner.sub('', current_district).strip()
             # ตรวจสอบว่าของเดิมอยู่ใน Keyword Map หรือไม่ (เผื่อเป็นภาษาไทยที่หลุดมา)
-            for key, (d, p) in self.KEYWORD_MAP.items():
-                if key.lower() == dist.lower():
-                    dist, prov = d, p
-                    break
+            exact = self.keyword_exact.get(dist.lower())
+            if exact:
+                dist, prov = exact
+
+        return {"district": dist, "province": prov, "subDistrict": sub, "locationHierarchy": hierarchy}
 
-        return dist, prov, sub # SubDistrict เว้นไว้ก่อนได้ หรือจะเพิ่ม Logic Regex ก็ได้
+    def process_many(self, addresses, current_districts=None, latitudes=None, longitudes=None):
+        """
+        Batch: ทั้งคอลัมน์ address (+ district เดิม, พิกัด) -> [(District, Province, SubDistrict)] ตามลำดับเดิม
+        ชุดข้อมูลที่ซ้ำกันคำนวณครั้งเดียว
+        """
+        return [(r["district"], r["province"], r["subDistrict"])
+                for r in self.locate_many(addresses, current_districts, latitudes, longitudes)]
+
+    def locate_many(self, addresses, current_districts=None, latitudes=None, longitudes=None):
+        """Batch ของ locate -> [dict]"""
+        blank = [None] * len(addresses)
+        seen = {}
+        results = []
+        for key in zip(addresses, current_districts or blank, latitudes or blank, longitudes or blank):
+            if key not in seen:
+                seen[key] = self.locate(*key)
+            results.append(seen[key])
+        return results
 
 # สร้าง Instance ไว้รอเรียกใช้งาน
 cleaner = LocationCleaner()
\ No newline at end of file
@@ -1,4 +1,7 @@
 import json
+from functools import lru_cache
+
+from utils.enrichment.matcher import KeywordMatcher
 
 # นิยามกลุ่มของสิ่งอำนวยความสะดวก เพื่อให้ง่ายต่อการขยายผลและเลือกใช้สี
 # แบ่งเป็นกลุ่ม: Fun (กิจกรรม), Wellness (สุขภาพ), Food (กิน), Logistics (การเดินทาง), Room (ห้องพัก)
@@ -69,10 +72,19 @@ FACILITY_MAP = {
     },
 }
 
-def get_facility_tags(raw_data):
-    """
-    ฟังก์ชันเดียวที่กวาดทุกอย่างจาก JSON
-    """
+# Matcher ตัวเดียว Compile ครั้งเดียวตอน import (เพิ่ม Keyword ใน FACILITY_MAP แล้วได้ผลทันทีรอบถัดไป)
+FACILITY_MATCHER = KeywordMatcher()
+for _tag_id, _config in FACILITY_MAP.items():
+    for _keyword in _config["keywords"]:
+        FACILITY_MATCHER.add(_keyword, _tag_id)
+FACILITY_MATCHER.build()
+
+# ลำดับ Tag ตาม FACILITY_MAP (ผลลัพธ์เรียงเหมือนเดิม)
+_TAG_ORDER = {tag_id: i for i, tag_id in enumerate(FACILITY_MAP)}
+
+
+def _collect_items(raw_data):
+    """JSON facilities -> ข้อความทุกรายการที่จะค้นหา ([] ถ้าอ่านไม่ได้)"""
     if not raw_data:
         return []
 
@@ -85,30 +97,61 @@ def get_facility_tags(raw_data):
     else:
         data = raw_data
 
-    # 1. รวบรวมข้อความทั้งหมดที่จะค้นหา (Flatten Everything)
+    # รวบรวมข้อความทั้งหมดที่จะค้นหา (Flatten Everything)
     search_text = []
     
     # ดึงจากยอดนิยม (Popular)
-    search_text.extend([str(item).lower() for item in data.get("popular", [])])
+    search_text.extend([str(item) for item in data.get("popular", [])])
     
     # ดึงจากหมวดหมู่ (Categories) ลึกเข้าไปถึงรายการย่อย
     for cat in data.get("categories", []):
-        search_text.append(str(cat.get("name", "")).lower())
-        search_text.extend([str(item).lower() for item in cat.get("items", [])])
-
-    # รวมเป็นประโยคยาวๆ ประโยคเดียวเพื่อให้ค้นหาง่าย
-    all_text = " ".join(search_text)
-
-    # 2. ทำการ Match กับ Map
-    matched_tags = []
-    for tag_id, config in FACILITY_MAP.items():
-        if any(keyword in all_text for keyword in config["keywords"]):
-            # ส่งออกเฉพาะข้อมูลที่ใช้โชว์หน้า UI
-            matched_tags.append({
-                "id": tag_id,
-                "label": config["label"],
-                "icon": config["icon"],
-                "color": config["color"]
-            })
-
-    return matched_tags
\ No newline at end of file
+        search_text.append(str(cat.get("name", "")))
+        search_text.extend([str(item) for item in cat.get("items", [])])
+
+    return search_text
+
+
+@lru_cache(maxsize=65536)
+def _item_tags(text):
+    # รายการอย่าง "Free WiFi" / "ที่จอดรถ" ซ้ำกันแทบทุกหลัง -> Match ครั้งเดียวแล้วจำไว้
+    return frozenset(FACILITY_MATCHER.values(text))
+
+
+def get_facility_tags(raw_data):
+    """
+    ฟังก์ชันเดียวที่กวาดทุกอย่างจาก JSON
+    Match ทีละรายการด้วย FACILITY_MATCHER (อ่านข้อความรอบเดียว ได้ทุก Tag ที่ตรง) แล้วรวมกัน
+    """
+    found = set()
+    for item in _collect_items(raw_data):
+        found |= _item_tags(item)
+    matched = sorted(found, key=_TAG_ORDER.__getitem__)
+
+    # ส่งออกเฉพาะข้อมูลที่ใช้โชว์หน้า UI
+    return [
+        {
+            "id": tag_id,
+            "label": FACILITY_MAP[tag_id]["label"],
+            "icon": FACILITY_MAP[tag_id]["icon"],
+            "color": FACILITY_MAP[tag_id]["color"]
+        }
+        for tag_id in matched
+    ]
+
+
+def get_facility_tags_many(raw_items):
+    """
+    Bulk: facilities JSON หลายพันหลัง -> [tags] ตามลำดับเดิม
+    (ใช้ตอน Retag ทั้งตารางหลังแก้ FACILITY_MAP)
+    """
+    # Villa ของเจ้าของเดียวกันมักมี facilities ชุดเดียวกันเป๊ะ -> String ซ้ำคำนวณครั้งเดียว
+    seen = {}
+    results = []
+    for raw_data in raw_items:
+        if isinstance(raw_data, str):
+            if raw_data not in seen:
+                seen[raw_data] = get_facility_tags(raw_data)
+            results.append([dict(tag) for tag in seen[raw_data]])
+        else:
+            results.append(get_facility_tags(raw_data))
+    return results
@@ -22,4 +22,27 @@ def get_guest_data(raw_guests, bedrooms, price_daily):
     return {
         "max_guests": final_guests,
         "price_per_person": price_pp
-    }
\ No newline at end of file
+    }
+
+def get_guest_data_many(raw_guests, bedrooms, price_daily):
+    """
+    get_guest_data แบบทั้งคอลัมน์ (NumPy) สำหรับ Retag ทั้งตาราง
+    รับ Sequence 3 ชุดยาวเท่ากัน (None ได้) -> (max_guests: int64[], price_per_person: float64[] โดย NaN = None)
+    """
+    import numpy as np
+
+    guests = np.array([g if g is not None else 0 for g in raw_guests], dtype=np.int64)
+    beds = np.array([b if b is not None else 0 for b in bedrooms], dtype=np.int64)
+    price = np.array([p if p is not None else 0 for p in price_daily], dtype=np.float64)
+
+    # 1. เกลาจำนวนแขก (กติกาเดียวกับ get_guest_data)
+    guests = np.where(guests > 0, guests, 0)
+    beds = np.where(beds > 0, beds, 1)
+    guests = np.where((guests <= 0) | (guests < beds), beds * 2, guests)
+    guests = np.where((beds == 1) & (guests > 6), 4, guests)
+
+    # 2. ราคาต่อคน (np.round ปัดเศษ .5 เข้าเลขคู่เหมือน round() ของ Python)
+    price_pp = np.full(len(guests), np.nan)
+    has_price = (price != 0) & (guests > 0)
+    price_pp[has_price] = np.round(price[has_price] / guests[has_price])
+    return guests, price_pp
@@ -0,0 +1,118 @@
+# scraper/utils/enrichment/matcher.py
+"""
+Aho–Corasick: หา Keyword ทุกคำในข้อความด้วยการอ่านข้อความรอบเดียว
+(แทนการวน `keyword in text` ทีละคำ ซึ่งช้าลงตามจำนวน Keyword x ความยาวข้อความ)
+
+กติกากัน False Positive:
+- Keyword ภาษาอังกฤษสั้นๆ (<= short_len ตัว เช่น "bar", "spa", "gym") ต้องจบคำ
+  ("minibar" ยังนับ แต่ "barbecue" / "spacious" ไม่นับ)
+- Match ที่อยู่ข้างในคำที่ยาวกว่าของ Tag อื่นไม่นับ (ภาษาไทยไม่มีเว้นวรรค: "บาร์" ใน "บาร์บีคิว" = bbq ไม่ใช่ bar)
+"""
+
+
+def _is_word_char(ch):
+    return ch.isascii() and (ch.isalnum() or ch == "_")
+
+
+class KeywordMatcher:
+    def __init__(self, keywords=None, short_len=4):
+        """keywords: {keyword: value} (value = สิ่งที่คืนเมื่อเจอคำนี้ เช่น tag id)"""
+        self.short_len = short_len
+        self._goto = [{}]     # state -> {char: state}
+        self._fail = [0]
+        self._out = [[]]      # state -> [keyword index] ที่จบตรง state นี้ (รวมตาม fail link แล้ว)
+        self._delta = []      # state -> {char: state} แบบเต็ม (ตาม fail link ล่วงหน้าแล้ว ไม่ต้องวนตอน match)
+        self.keywords = []    # index -> (keyword, value, needs_boundary)
+        self._built = False
+        for keyword, value in (keywords or {}).items():
+            self.add(keyword, value)
+
+    def add(self, keyword, value):
+        keyword = keyword.lower()
+        if not keyword: return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        needs_boundary = keyword.isascii() and len(keyword) <= self.short_len and _is_word_char(keyword[-1])
+        self._out[state].append(len(self.keywords))
+        self.keywords.append((keyword, value, needs_boundary))
+        self._built = False
+
+    def build(self):
+        """ต่อ fail link แบบ BFS (เรียกเองอัตโนมัติตอน match ครั้งแรกหลัง add)"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # DFA: ทุก state รู้ปลายทางของทุกตัวอักษรที่อยู่ใน Keyword (ตัวอื่น -> root)
+        # ลูปตอน match เหลือ dict lookup ครั้งเดียวต่อตัวอักษร
+        # (BFS: fail state ตื้นกว่าเสมอ -> คำนวณเสร็จก่อนแล้ว)
+        self._delta = [None] * len(self._goto)
+        self._delta[0] = dict(self._goto[0])
+        for state in queue:
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """(start, end, keyword, value) ของทุก Keyword ที่เจอ (ซ้อนกันได้) ตามกติกาเรื่องจบคำ"""
+        if not self._built: self.build()
+        delta, out, keywords = self._delta, self._out, self.keywords
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not out[state]: continue
+            for index in out[state]:
+                keyword, value, needs_boundary = keywords[index]
+                end = i + 1
+                if needs_boundary and end < len(text) and _is_word_char(text[end]):
+                    continue
+                yield end - len(keyword), end, keyword, value
+
+    def values(self, text):
+        """value ทั้งหมดที่เจอใน text (ตัด Match ที่อยู่ข้างในคำที่ยาวกว่าของ value อื่นทิ้ง)"""
+        matches = sorted(self.iter_matches(text.lower()), key=lambda m: (m[0], -m[1]))
+        found = set()
+        # ช่วงของคำที่ยาวที่สุดที่ครอบตำแหน่งนี้อยู่ (เรียงตาม start แล้ว -> ตัวก่อนหน้าครอบได้เท่านั้น)
+        cover_end, cover_value, cover_start = -1, None, -1
+        for start, end, _, value in matches:
+            covered = end <= cover_end and (start, end) != (cover_start, cover_end)
+            if covered and cover_value != value:
+                continue
+            found.add(value)
+            if end > cover_end:
+                cover_start, cover_end, cover_value = start, end, value
+        return found
+
+    def longest(self, text):
+        """Match ที่ยาวที่สุดแบบไม่ซ้อนกัน ไล่จากซ้ายไปขวา -> [(start, end, keyword, value)]"""
+        matches = sorted(self.iter_matches(text.lower()), key=lambda m: (m[0], -m[1]))
+        picked, last_end = [], 0
+        for match in matches:
+            if match[0] >= last_end:
+                picked.append(match)
+                last_end = match[1]
+        return picked
+
+    def best(self, text):
+        """Match ที่ยาวที่สุดใน text (ยาวเท่ากัน -> ตัวซ้ายสุด) หรือ None"""
+        return max(self.iter_matches(text.lower()), key=lambda m: (m[1] - m[0], -m[0]), default=None)
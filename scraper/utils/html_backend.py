@@ -0,0 +1,147 @@
+# scraper/utils/html_backend.py
+"""
+Parser Backend สำหรับ BookingParser
+- "lxml": libxml2 + cssselect (ภาษา C เร็วกว่ามาก) ห่อด้วย LxmlNode ให้หน้าตา API เหมือน BeautifulSoup
+- "bs4":  BeautifulSoup + html.parser แบบเดิม (pure Python)
+
+_parse_*_logic ใช้ API ชุดเดียวกันได้ทั้งสองแบบ:
+select / select_one / find / get_text / get / decompose / parent / str()
+"""
+from functools import lru_cache
+
+try:
+    import lxml.etree
+    import lxml.html
+    from cssselect import GenericTranslator
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+BACKENDS = ("lxml", "bs4")
+DEFAULT_BACKEND = "lxml" if HAS_LXML else "bs4"
+
+# Tag ที่ BeautifulSoup ไม่นับเป็น Text ตอน get_text()
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+@lru_cache(maxsize=None)
+def _compiled(selector):
+    # prefix descendant:: ให้เหมือน bs4 (select ไม่นับตัวเอง นับแค่ลูกหลาน)
+    return lxml.etree.XPath(GenericTranslator().css_to_xpath(selector, prefix="descendant::"))
+
+
+def precompile(selectors):
+    """แปลง CSS -> XPath ไว้ล่วงหน้าตอน import (Process ลูกที่ fork ออกไปได้ของที่ Compile แล้วติดไปด้วย)"""
+    if HAS_LXML:
+        for selector in selectors:
+            _compiled(selector)
+
+
+def _iter_text_nodes(el):
+    """(text, tag แม่) ทุกก้อนใต้ el ตามลำดับเอกสาร (ข้าม comment / script / style)"""
+    if el.text:
+        yield el.text, el
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            yield from _iter_text_nodes(child)
+        if child.tail:
+            yield child.tail, el
+
+
+def _iter_all_strings(el):
+    """เหมือน _iter_text_nodes แต่นับ comment / script / style ด้วย (find(string=) ของ bs4 เห็นทุก String)"""
+    if el.text:
+        yield el.text, el
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _iter_all_strings(child)
+        elif child.tag is lxml.etree.Comment and child.text:
+            yield child.text, el   # Comment ของ bs4 มี parent เป็น Tag ที่ครอบอยู่
+        if child.tail:
+            yield child.tail, el
+
+
+class LxmlString(str):
+    """ผลของ find(string=...) -> str ที่รู้ว่า Tag แม่คือใคร (เหมือน NavigableString)"""
+    parent = None
+
+
+class LxmlNode:
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def __bool__(self):
+        # Tag ของ bs4 เป็น True เสมอ (ส่วน lxml element ว่างจะเป็น False)
+        return True
+
+    def __str__(self):
+        return lxml.html.tostring(self.el, encoding="unicode", with_tail=False)
+
+    @property
+    def name(self):
+        return self.el.tag
+
+    @property
+    def parent(self):
+        parent = self.el.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    def select(self, selector):
+        return [LxmlNode(el) for el in _compiled(selector)(self.el)]
+
+    def select_one(self, selector):
+        found = _compiled(selector)(self.el)
+        return LxmlNode(found[0]) if found else None
+
+    def get(self, key, default=None):
+        return self.el.get(key, default)
+
+    def get_text(self, separator="", strip=False):
+        strings = (text for text, _ in _iter_text_nodes(self.el))
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = [s for s in strings if s]
+        return separator.join(strings)
+
+    def find(self, name=None, class_=None, string=None):
+        if string is not None:
+            return self._find_string(string)
+        path = f"descendant::{name or '*'}"
+        if class_:
+            path += f"[contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')]"
+        found = self.el.xpath(path)
+        return LxmlNode(found[0]) if found else None
+
+    def _find_string(self, pattern):
+        match = pattern.search if hasattr(pattern, "search") else (lambda s: s == pattern)
+        for text, owner in _iter_all_strings(self.el):
+            if match(text):
+                result = LxmlString(text)
+                result.parent = LxmlNode(owner)
+                return result
+        return None
+
+    def decompose(self):
+        # drop_tree เก็บ tail (ข้อความต่อท้าย) ไว้ให้ parent เหมือน bs4
+        self.el.drop_tree()
+
+
+def make_document(html, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "lxml":
+        if not HAS_LXML:
+            raise ImportError("lxml backend needs `lxml` and `cssselect` installed")
+        if not html or not html.strip():
+            html = "<html></html>"
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # str ที่มี <?xml encoding=...?> ต้องส่งเป็น bytes
+            root = lxml.html.document_fromstring(html.encode("utf-8"))
+        return LxmlNode(root)
+    if backend == "bs4":
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "html.parser")
+    raise ValueError(f"Unknown parser backend: {backend}")
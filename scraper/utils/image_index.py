@@ -0,0 +1,46 @@
+# scraper/utils/image_index.py
+"""
+Image Index: ตัวตนของรูป Booking ข้ามทุก Villa (Photo ID จากชื่อไฟล์ .../max500/123456789.jpg?k=...)
+- Villa หลายหลังของเจ้าของเดียวกันใช้รูปชุดเดียวกัน -> เก็บรูปละแถวเดียวใน "BookingImage"
+- Villa อ้างถึงรูปผ่าน imageIds (ลำดับตาม Gallery) ส่วน images เหลือแค่ URL ที่ไม่มี Photo ID (ไม่ใช่รูป Hotel ของ Booking)
+  URL เต็มประกอบกลับด้วย image_urls() (หน้าเว็บทำแบบเดียวกันใน web/src/lib/images.ts)
+- Photo ID ที่รู้จักแล้ว (โหลดตอนเริ่ม + ที่เขียนไปในรอบนี้) ไม่ต้องส่งไปเขียนซ้ำ
+"""
+import re
+
+_PHOTO_RE = re.compile(r'/images/hotel/([^/]+)/(\d+)\.jpg')
+
+
+def parse_photo_url(url):
+    """URL รูป Booking -> (photo_id, size เช่น "max500") หรือ None ถ้าไม่ใช่รูป Hotel ของ Booking"""
+    match = _PHOTO_RE.search(url)
+    if not match: return None
+    return int(match.group(2)), match.group(1)
+
+
+def extra_urls(urls):
+    """URL ที่ไม่มี Photo ID (ต้องเก็บใน images ต่อ เพราะไม่มีแถวใน BookingImage)"""
+    return [url for url in urls if parse_photo_url(url) is None]
+
+
+def image_urls(image_ids, urls_by_id, extra=()):
+    """imageIds + {photoId: url จาก BookingImage} (+ images ที่เหลือ) -> URL ของ Gallery ตามลำดับ"""
+    urls = [urls_by_id[photo_id] for photo_id in image_ids if photo_id in urls_by_id]
+    return list(dict.fromkeys([*urls, *extra]))
+
+
+class ImageIndex:
+    def __init__(self):
+        self.known = set()
+        self.stats = {"new": 0, "skipped": 0}
+
+    def unseen(self, records):
+        """ตัดรูปที่อยู่ใน Index แล้วทิ้ง เหลือแค่ที่ต้องเขียนใหม่"""
+        fresh = [record for record in records if record["photoId"] not in self.known]
+        self.stats["new"] += len(fresh)
+        self.stats["skipped"] += len(records) - len(fresh)
+        return fresh
+
+    def mark(self, photo_ids):
+        """เรียกหลังเขียนลง DB สำเร็จ (หรือตอนโหลด ID ที่มีอยู่แล้วตอนเริ่ม)"""
+        self.known.update(photo_ids)
@@ -0,0 +1,254 @@
+# scraper/utils/metrics.py
+"""
+Metrics: Counter / Gauge / Histogram แบบเบาๆ (ไม่ต้องลง prometheus_client)
+- timer(): จับเวลาแต่ละ Stage (ใช้ได้ทั้งโค้ด sync และครอบ await)
+- serve(port): เปิด /metrics เป็น Prometheus text บน 127.0.0.1 (Thread แยก ไม่กวน Event Loop)
+- summary() / dump_json(): สรุป count / total / p50 / p95 / max ตอนจบรอบรัน
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# วินาที: ครอบตั้งแต่ Sub-parser (ms) ถึง Navigation (หลายสิบวิ)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# เก็บค่าดิบล่าสุดไว้คิด p50/p95 ใน summary (Bucket ของ Prometheus หยาบเกินไป)
+_RESERVOIR = 2048
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs: return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name, self.help = name, help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        if key not in self.values:
+            with self._lock:
+                self.values.setdefault(key, 0)
+        self.values[key] += amount
+
+    def _snapshot(self):
+        # Thread ของ /metrics อ่านขณะ Event Loop เพิ่ม Label ใหม่ -> copy ใต้ Lock ก่อนวนลูป
+        with self._lock:
+            return list(self.values.items())
+
+    def render(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._snapshot()]
+
+    def summary(self):
+        return {_format_labels(key) or "total": value for key, value in self._snapshot()}
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help="", fn=None):
+        self.name, self.help = name, help
+        self.fn = fn   # อ่านค่าสดตอน render (เช่น limiter.limit)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        if key in self.values:
+            self.values[key] = value
+        else:
+            with self._lock:
+                self.values[key] = value
+
+    def _current(self):
+        if self.fn is not None:
+            return [((), self.fn())]
+        with self._lock:
+            return list(self.values.items())
+
+    def render(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._current()]
+
+    def summary(self):
+        return {_format_labels(key) or "value": value for key, value in self._current()}
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series = {}   # label key -> {"counts": [...], "sum": float, "count": int, "max": float, "recent": [...]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        s = self.series.get(key)
+        if s is None:
+            with self._lock:
+                s = self.series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0, "max": 0.0, "recent": []})
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                s["counts"][i] += 1
+                break
+        s["sum"] += value
+        s["count"] += 1
+        s["max"] = max(s["max"], value)
+        s["recent"].append(value)
+        if len(s["recent"]) > _RESERVOIR:
+            with self._lock:
+                del s["recent"][:len(s["recent"]) - _RESERVOIR]
+
+    def _snapshot(self):
+        with self._lock:
+            return [(key, dict(s, counts=list(s["counts"]), recent=list(s["recent"]))) for key, s in self.series.items()]
+
+    def render(self):
+        lines = []
+        for key, s in self._snapshot():
+            cumulative = 0
+            for bound, n in zip(self.buckets, s["counts"]):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {s['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {s['sum']:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {s['count']}")
+        return lines
+
+    def summary(self):
+        out = {}
+        for key, s in self._snapshot():
+            recent = sorted(s["recent"])
+            pick = lambda q: recent[int(q * (len(recent) - 1))] if recent else 0.0
+            out[_format_labels(key) or "all"] = {
+                "count": s["count"],
+                "total": round(s["sum"], 3),
+                "mean": round(s["sum"] / s["count"], 4) if s["count"] else 0.0,
+                "p50": round(pick(0.5), 4),
+                "p95": round(pick(0.95), 4),
+                "max": round(s["max"], 4),
+            }
+        return out
+
+
+class Registry:
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.started_at = time.time()
+
+    def _get(self, cls, name, help, **kwargs):
+        name = self.prefix + name
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = cls(name, help, **kwargs)
+        return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help="", fn=None):
+        gauge = self._get(Gauge, name, help)
+        if fn is not None: gauge.fn = fn
+        return gauge
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """with METRICS.timer("stage_seconds", stage="goto"): await page.goto(...)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(time.perf_counter() - started, **labels)
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            if metric.help: lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        with self._lock:
+            metrics = list(self.metrics.items())
+        return {
+            "started_at": self.started_at,
+            "elapsed_seconds": round(time.time() - self.started_at, 1),
+            "metrics": {name: metric.summary() for name, metric in metrics},
+        }
+
+    def dump_json(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def serve(self, port, host="127.0.0.1"):
+        """เปิด HTTP /metrics (port 0 / None = ปิด) คืนค่า False ถ้าเปิดไม่ได้ (เช่น Port ชน)"""
+        if not port or self._server: return bool(self._server)
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"   ⚠️ Metrics port {port} unavailable: {e}")
+            return False
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"   📊 Metrics on http://{host}:{port}/metrics")
+        return True
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def print_summary(registry, stage_metric):
+    """พิมพ์ตารางเวลาแต่ละ Stage เรียงตามเวลารวม (ดูว่าคอขวดอยู่ที่ Browser / Parser / DB)"""
+    hist = registry.metrics.get(registry.prefix + stage_metric)
+    if not hist or not hist.series: return
+    print("⏱️  Stage timings (total / p50 / p95 / count):")
+    rows = sorted(hist.summary().items(), key=lambda item: -item[1]["total"])
+    for label, s in rows:
+        print(f"   {label:<40} {s['total']:>9.2f}s {s['p50']:>8.3f}s {s['p95']:>8.3f}s {s['count']:>7}")
+
+
+METRICS = Registry(prefix="scraper_")
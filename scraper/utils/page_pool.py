@@ -0,0 +1,125 @@
+# scraper/utils/page_pool.py
+"""
+Page Pool: ใช้ Tab เดิมซ้ำแทนการ new_page() / close() ทุก Villa
+- Tab ใหม่ถูก setup (เช่น stealth script) ครั้งเดียวตอนเปิด
+- Tab ถูกปิดทิ้งเมื่อใช้ครบ max_navigations หรือพัง
+- Context ถูกเปลี่ยนใหม่ทั้งก้อนเมื่อเปิด Tab ครบ max_pages_per_context
+  หรือ JS Heap ของ Tab เกิน max_heap_mb (Cookie/Cache/Memory สะสมไม่บวมไปเรื่อยๆ)
+"""
+import asyncio
+
+
+class PagePool:
+    def __init__(self, new_context, setup_page=None, size=5, warm=None,
+                 max_navigations=30, max_pages_per_context=150, max_heap_mb=None):
+        self.new_context = new_context      # async () -> BrowserContext
+        self.setup_page = setup_page        # async (page) -> None
+        self.size = size                    # เก็บ Tab ว่างไว้ได้สูงสุดเท่านี้
+        self.warm = size if warm is None else warm # เปิดรอไว้ตอน start()
+        self.max_navigations = max_navigations
+        self.max_pages_per_context = max_pages_per_context
+        self.max_heap_mb = max_heap_mb
+
+        self.context = None
+        self._idle = []
+        self._uses = {}        # page -> จำนวนครั้งที่ใช้ไปแล้ว
+        self._owner = {}       # page -> context ที่เปิด page นี้
+        self._live = {}        # context -> จำนวน page ที่ยังเปิดอยู่
+        self._pages_opened = 0
+        self._lock = asyncio.Lock()
+        self.stats = {"pages_opened": 0, "pages_recycled": 0, "contexts_opened": 0}
+
+    async def start(self):
+        await self._open_context()
+        # อุ่น Tab ไว้ก่อนเลย (setup เสร็จแล้ว พร้อมใช้)
+        pages = [await self._open_page() for _ in range(self.warm)]
+        self._idle.extend(pages)
+
+    async def acquire(self):
+        async with self._lock:
+            while self._idle:
+                page = self._idle.pop()
+                if not page.is_closed():
+                    return page
+                await self._retire(page)
+            return await self._open_page()
+
+    async def release(self, page, healthy=True):
+        """คืน Tab เข้า Pool (healthy=False = พัง/ค้าง ให้ปิดทิ้งเลย)"""
+        async with self._lock:
+            self._uses[page] = self._uses.get(page, 0) + 1
+            if healthy and self.max_heap_mb and await self._heap_mb(page) > self.max_heap_mb:
+                print(f"      ♻️ JS heap over {self.max_heap_mb} MB. Rotating browser context...")
+                await self._open_context()
+
+            stale = self._owner.get(page) is not self.context
+            worn_out = self._uses[page] >= self.max_navigations
+            if not healthy or stale or worn_out or page.is_closed() or len(self._idle) >= self.size:
+                await self._retire(page)
+            else:
+                self._idle.append(page)
+
+    async def close(self):
+        async with self._lock:
+            for page in self._idle:
+                await self._retire(page)
+            self._idle = []
+            for context in list(self._live):
+                await context.close()
+            self._live = {}
+
+    async def _open_context(self):
+        old = self.context
+        self.context = await self.new_context()
+        self._live[self.context] = 0
+        self._pages_opened = 0
+        self.stats["contexts_opened"] += 1
+
+        if old is not None:
+            # Tab ว่างของ Context เก่าปิดได้เลย ส่วนที่ยังใช้อยู่จะถูกปิดตอน release()
+            for page in [p for p in self._idle if self._owner.get(p) is old]:
+                self._idle.remove(page)
+                await self._retire(page)
+            if self._live.get(old) == 0:
+                await self._close_context(old)
+
+    async def _open_page(self):
+        if self._pages_opened >= self.max_pages_per_context:
+            print(f"      ♻️ {self._pages_opened} pages opened in this context. Rotating browser context...")
+            await self._open_context()
+        page = await self.context.new_page()
+        if self.setup_page:
+            await self.setup_page(page)
+        self._owner[page] = self.context
+        self._live[self.context] += 1
+        self._pages_opened += 1
+        self.stats["pages_opened"] += 1
+        return page
+
+    async def _retire(self, page):
+        context = self._owner.pop(page, None)
+        self._uses.pop(page, None)
+        self.stats["pages_recycled"] += 1
+        try:
+            await page.close()
+        except Exception:
+            pass
+        if context is not None and context in self._live:
+            self._live[context] -= 1
+            if context is not self.context and self._live[context] <= 0:
+                await self._close_context(context)
+
+    async def _close_context(self, context):
+        self._live.pop(context, None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    async def _heap_mb(page):
+        try:
+            used = await page.evaluate("performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return used / (1024 * 1024)
+        except Exception:
+            return 0
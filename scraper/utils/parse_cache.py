@@ -0,0 +1,81 @@
+# scraper/utils/parse_cache.py
+"""
+Parse Cache: จำผลลัพธ์ของ BookingParser ตาม Hash ของ HTML (Content-addressed)
+- HTML เดิม (หลัง Normalize) + Parser รุ่นเดิม + Backend เดิม = ไม่ต้อง Parse ใหม่
+- เก็บใน SQLite ไฟล์เดียว ตัดของที่ไม่ได้ใช้นานสุดทิ้งเมื่อขนาดเกิน max_bytes
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# ส่วนที่เปลี่ยนทุกครั้งที่โหลดแต่ไม่มีผลกับผลลัพธ์ของ Parser (script, style, comment, session id)
+_VOLATILE_BLOCKS = re.compile(r'<(script|style|noscript)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.S | re.I)
+_VOLATILE_PARAMS = re.compile(r'(?:[?&;](?:amp;)?)(?:sid|srpvid|aid|label|ucfs|arphpl)=[^&"\'\s>]*', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class ParseCache:
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            "digest TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS parsed_accessed ON parsed (accessed_at)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(html, parser_version="", backend=""):
+        """Key = HTML (หลัง Normalize) + รุ่นของ Parser + Backend -> แก้ Parser / สลับ Backend แล้วของเก่าไม่ถูกใช้ต่อ"""
+        normalized = _VOLATILE_BLOCKS.sub('', html)
+        normalized = _VOLATILE_PARAMS.sub('', normalized)
+        normalized = _WHITESPACE.sub(' ', normalized)
+        digest = hashlib.sha256(f"{parser_version}\0{backend}\0".encode('utf-8'))
+        digest.update(normalized.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, digest):
+        row = self.conn.execute("SELECT data FROM parsed WHERE digest = ?", (digest,)).fetchone()
+        if not row:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute("UPDATE parsed SET accessed_at = ? WHERE digest = ?", (time.time(), digest))
+        return json.loads(row[0])
+
+    def put(self, digest, data):
+        blob = json.dumps(data, ensure_ascii=False)
+        size = len(blob.encode('utf-8'))
+        with self.conn:
+            old = self.conn.execute("SELECT size FROM parsed WHERE digest = ?", (digest,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parsed (digest, data, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (digest, blob, size, time.time())
+            )
+        self.total_bytes += size - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # ลบตัวที่ไม่ได้ใช้นานสุดจนเหลือ 90% ของเพดาน (กัน evict ถี่ทุกครั้งที่ put)
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT digest, size FROM parsed ORDER BY accessed_at").fetchall()
+        doomed = []
+        for digest, size in rows:
+            if self.total_bytes <= target: break
+            doomed.append((digest,))
+            self.total_bytes -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM parsed WHERE digest = ?", doomed)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,177 @@
+# scraper/utils/resource_blocker.py
+"""
+Resource Blocker: ตัด Request ที่ Parser ไม่ได้ใช้ทิ้งที่ Network Layer ของ Chromium (CDP Fetch ต่อ Tab)
+- ไม่ใช้ context.route("**/*"): Route ทำให้ทุก Request วิ่งผ่าน Python และปิด HTTP Cache ของ Browser
+  (JS/CSS ของ Booking ต้องโหลดใหม่ทุกหน้า) -> Fetch.enable จับเฉพาะ Request ที่เข้าข่ายโดนตัด
+  (ตามชนิดจริงของ Chromium / Domain / Pattern) ที่เหลือไม่ผ่าน Python เลย
+- รูป/วิดีโอ/ฟอนต์: เราอ่าน URL รูปจาก src/data-src อยู่แล้ว ไม่ต้องโหลดตัวไฟล์
+- Analytics/Ads: ไม่มีผลกับเนื้อหา
+- allow_patterns: URL ที่ต้องปล่อยผ่านเสมอ (เช่น JS ของ Booking ที่ใช้ Render facility-group-container)
+- Byte ที่ประหยัดได้: ไฟล์ที่โดนตัดไม่มีขนาดจริงให้วัด -> ใช้ค่าเฉลี่ยต่อชนิด
+  วัดจริงได้ด้วยโหมด measure (ไม่ตัดอะไร N หน้าแรก จด encodedDataLength ของ Request ที่จะโดนตัด แล้วค่อยเริ่มตัด)
+"""
+import asyncio
+import json
+import os
+from fnmatch import fnmatchcase
+from urllib.parse import urlsplit
+
+# ชื่อชนิดใน Profile -> resourceType ของ CDP
+RESOURCE_TYPES = {"image": "Image", "media": "Media", "font": "Font", "stylesheet": "Stylesheet", "script": "Script"}
+
+DEFAULT_PROFILE = {
+    "block_types": ["image", "media", "font"],
+    "block_domains": [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+        "googleadservices.com", "facebook.net", "connect.facebook", "bat.bing.com", "clarity.ms",
+        "hotjar.com", "criteo.com", "criteo.net", "scorecardresearch.com", "tiktok.com",
+        "analytics.twitter.com", "adsrvr.org", "taboola.com", "outbrain.com",
+    ],
+    "block_patterns": [],  # Glob เพิ่มเติมทั้ง URL (เช่น "*bstatic.com/*/lottie/*.json")
+    "allow_patterns": [
+        "bstatic.com/psb/capla/static/js",  # JS bundle ของหน้า Hotel (Render Facilities)
+        "bstatic.com/static/js",
+        "/dml/graphql",
+    ],
+}
+
+# ขนาดเฉลี่ยโดยประมาณต่อ Request (ใช้เมื่อยังไม่เคยวัดด้วยโหมด measure)
+ESTIMATED_BYTES = {"image": 60_000, "media": 400_000, "font": 35_000, "script": 40_000, "stylesheet": 20_000}
+_FALLBACK_BYTES = 5_000
+
+
+def _empty_stats():
+    return {"blocked": 0, "saved": 0, "bytes": 0, "by_type": {}}
+
+
+def load_sizes(path):
+    """ค่าเฉลี่ยที่วัดไว้ {ชนิด: bytes} (ไม่มีไฟล์ = {})"""
+    if not path or not os.path.exists(path): return {}
+    with open(path, encoding="utf-8") as f:
+        return {kind: int(size) for kind, size in json.load(f).items()}
+
+
+class ResourceBlocker:
+    def __init__(self, profile=None, sizes_path=None, measure_pages=0):
+        profile = profile or DEFAULT_PROFILE
+        self.block_types = frozenset(profile.get("block_types", []))
+        self.block_domains = tuple(profile.get("block_domains", []))
+        self.block_patterns = tuple(profile.get("block_patterns", []))
+        self.allow_patterns = tuple(profile.get("allow_patterns", []))
+        # Request ที่ Chromium ต้องหยุดถาม Python (นอกนั้นวิ่งตามปกติ Cache ไม่เสีย)
+        self.fetch_patterns = [{"urlPattern": "*", "resourceType": RESOURCE_TYPES[kind]}
+                               for kind in sorted(self.block_types) if kind in RESOURCE_TYPES]
+        self.fetch_patterns += [{"urlPattern": f"*{domain}*"} for domain in self.block_domains]
+        self.fetch_patterns += [{"urlPattern": pattern} for pattern in self.block_patterns]
+
+        self.sizes_path = sizes_path
+        self.sizes = {**ESTIMATED_BYTES, **load_sizes(sizes_path)}
+        self.measure_left = measure_pages  # > 0 = ยังอยู่ในช่วงวัดขนาด (ยังไม่ตัด)
+        self.blocking = measure_pages <= 0
+        self.measured = {}  # ชนิด -> [จำนวน, bytes] ของ Request ที่จะโดนตัด (โหมด measure)
+        self._watched = {}  # (page, requestId) -> ชนิด (โหมด measure)
+
+        self.stats = {}   # page -> {"blocked": n, "saved": ประมาณ, "bytes": โหลดจริง, "by_type": {...}}
+        self.total = {"blocked": 0, "saved": 0, "bytes": 0}
+        self.sessions = {}  # page -> CDPSession (เก็บไว้ไม่ให้โดน GC / Detach เอง)
+
+    def should_block(self, url, resource_type):
+        """resource_type = ชื่อชนิดตัวเล็ก ("image", "xhr", ...)"""
+        if any(pattern in url for pattern in self.allow_patterns):
+            return False
+        if resource_type in self.block_types:
+            return True
+        host = urlsplit(url).hostname or ""
+        if any(domain in host for domain in self.block_domains):
+            return True
+        return any(fnmatchcase(url, pattern) for pattern in self.block_patterns)
+
+    async def install(self, page):
+        """เรียกครั้งเดียวตอนเปิด Tab (PagePool setup_page) คืนค่า False ถ้า Browser ไม่รองรับ CDP"""
+        try:
+            session = await page.context.new_cdp_session(page)
+            await session.send("Network.enable")
+            if self.blocking:
+                await session.send("Fetch.enable", {"patterns": self.fetch_patterns})
+        except Exception as e:
+            print(f"      ⚠️ Resource blocking unavailable on this page: {e}")
+            return False
+        session.on("Fetch.requestPaused", lambda event: asyncio.ensure_future(self._on_paused(page, session, event)))
+        session.on("Network.requestWillBeSent", lambda event: self._on_request(page, event))
+        session.on("Network.loadingFinished", lambda event: self._on_finished(page, event))
+        page.on("close", lambda _: self._forget(page))
+        self.sessions[page] = session
+        return True
+
+    async def _on_paused(self, page, session, event):
+        request_id = event["requestId"]
+        kind = (event.get("resourceType") or "Other").lower()
+        try:
+            if not self.should_block(event["request"]["url"], kind):
+                await session.send("Fetch.continueRequest", {"requestId": request_id})
+                return
+            self._tally(page, kind)
+            await session.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+        except Exception:
+            pass  # Tab ปิดไปก่อน Request นี้จะได้คำตอบ
+
+    def _tally(self, page, kind):
+        size = self.sizes.get(kind, _FALLBACK_BYTES)
+        entry = self.stats.setdefault(page, _empty_stats())
+        entry["blocked"] += 1
+        entry["saved"] += size
+        entry["by_type"][kind] = entry["by_type"].get(kind, 0) + 1
+        self.total["blocked"] += 1
+        self.total["saved"] += size
+
+    def _on_request(self, page, event):
+        if self.blocking: return
+        kind = (event.get("type") or "Other").lower()
+        if self.should_block(event["request"]["url"], kind):
+            self._watched[(page, event["requestId"])] = kind
+
+    def _on_finished(self, page, event):
+        size = int(event.get("encodedDataLength") or 0)
+        self.stats.setdefault(page, _empty_stats())["bytes"] += size
+        self.total["bytes"] += size
+        kind = self._watched.pop((page, event.get("requestId")), None)
+        if kind:
+            count_bytes = self.measured.setdefault(kind, [0, 0])
+            count_bytes[0] += 1
+            count_bytes[1] += size
+
+    def _forget(self, page):
+        self.sessions.pop(page, None)
+        self.stats.pop(page, None)
+        for key in [key for key in self._watched if key[0] is page]:
+            del self._watched[key]
+
+    def pop_stats(self, page):
+        """สถิติของ page นี้ตั้งแต่ pop ครั้งก่อน (เรียกหลังจบแต่ละ villa) saved = ประมาณจากชนิด / bytes = โหลดจริง"""
+        if self.measure_left > 0:
+            self.measure_left -= 1
+        return self.stats.pop(page, _empty_stats())
+
+    @property
+    def ready_to_block(self):
+        """วัดครบจำนวนหน้าแล้วแต่ยังไม่เริ่มตัด"""
+        return not self.blocking and self.measure_left <= 0
+
+    async def start_blocking(self):
+        """จบโหมด measure: บันทึกค่าเฉลี่ยที่วัดได้ แล้วเปิด Fetch ให้ทุก Tab ที่เปิดอยู่"""
+        if self.blocking: return
+        self.blocking = True
+        averages = {kind: count_bytes[1] // count_bytes[0] for kind, count_bytes in self.measured.items() if count_bytes[0]}
+        self.sizes.update(averages)
+        self._watched.clear()
+        if self.sizes_path and averages:
+            merged = {**load_sizes(self.sizes_path), **averages}  # ชนิดที่รอบนี้ไม่เจอ ใช้ค่าที่วัดไว้ครั้งก่อน
+            os.makedirs(os.path.dirname(self.sizes_path) or ".", exist_ok=True)
+            with open(self.sizes_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2, sort_keys=True)
+        print(f"📏 Measured blocked resource sizes {averages} -> blocking enabled")
+        for session in list(self.sessions.values()):
+            try:
+                await session.send("Fetch.enable", {"patterns": self.fetch_patterns})
+            except Exception:
+                pass  # Tab ปิดไปแล้ว
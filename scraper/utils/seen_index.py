@@ -0,0 +1,94 @@
+# scraper/utils/seen_index.py
+"""
+Seen-ID Index: จำว่า villa ไหนเพิ่งถูกเก็บไปแล้ว (มี TTL ต่อรายการ)
+- MemorySeenIndex: อยู่ใน RAM อย่างเดียว (หายตอนปิดโปรแกรม)
+- SQLiteSeenIndex: เขียนลงไฟล์ SQLite รันใหม่ก็ยังจำได้
+"""
+import os
+import sqlite3
+import time
+
+
+def villa_key(slug_or_url):
+    """
+    Identity กลางของ villa (ใช้ร่วมกันทั้ง JSON engine และ HTML engine)
+    รับได้ทั้ง pageName, slug หรือ URL เต็ม -> คืน slug ตัวเล็กล้วน
+    """
+    if not slug_or_url: return ""
+    key = str(slug_or_url).split('?')[0].split('#')[0].rstrip('/')
+    key = key.split('/')[-1]
+    for suffix in ('.th.html', '.en-gb.html', '.html'):
+        if key.endswith(suffix):
+            key = key[:-len(suffix)]
+            break
+    return key.strip().lower()
+
+
+class MemorySeenIndex:
+    def __init__(self, ttl_hours=12):
+        self.ttl = ttl_hours * 3600
+        self.entries = {}  # key -> seen_at (epoch)
+
+    def __contains__(self, key):
+        return self.is_fresh(key)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_fresh(self, key):
+        seen_at = self.entries.get(key)
+        return seen_at is not None and time.time() - seen_at < self.ttl
+
+    def mark(self, keys):
+        now = time.time()
+        for key in keys:
+            self.entries[key] = now
+
+    def close(self):
+        pass
+
+
+class SQLiteSeenIndex(MemorySeenIndex):
+    """
+    Write-through: โหลดรายการที่ยังไม่หมดอายุขึ้น RAM ตอนเปิด แล้ว mark() เขียนลงไฟล์ทันที
+    รายการที่หมดอายุแล้วจะถูกลบตอนเปิด (ไฟล์ไม่บวมไปเรื่อยๆ)
+    """
+    def __init__(self, path, ttl_hours=12, max_entries=500_000):
+        super().__init__(ttl_hours)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+
+        cutoff = time.time() - self.ttl
+        with self.conn:
+            self.conn.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+            # กันไฟล์โตเกิน: เก็บไว้แค่ max_entries ตัวล่าสุด
+            self.conn.execute(
+                "DELETE FROM seen WHERE key NOT IN (SELECT key FROM seen ORDER BY seen_at DESC LIMIT ?)",
+                (max_entries,)
+            )
+        self.entries = dict(self.conn.execute("SELECT key, seen_at FROM seen"))
+
+    def mark(self, keys):
+        keys = list(keys)
+        if not keys: return
+        super().mark(keys)
+        now = self.entries[keys[0]]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO seen (key, seen_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET seen_at = excluded.seen_at",
+                [(key, now) for key in keys]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def open_seen_index(backend="sqlite", path=None, ttl_hours=12):
+    if backend == "memory" or not path:
+        return MemorySeenIndex(ttl_hours)
+    if backend == "sqlite":
+        return SQLiteSeenIndex(path, ttl_hours)
+    raise ValueError(f"Unknown seen-index backend: {backend}")
@@ -0,0 +1,241 @@
+# scraper/utils/spatial.py
+"""
+Spatial Index ของพิกัด Villa (ตอบ "Villa ในรัศมี 5 km" / "10 หลังที่ใกล้ที่สุด" โดยไม่ต้อง Scan ทั้งตาราง)
+- Grid แบบ Geohash: แบ่งโลกเป็นช่อง cell_deg องศา -> Query ดูแค่ช่องรอบๆ จุด
+- แก้ทีละหลังได้ (upsert / remove) ไม่ต้อง Build ใหม่ทั้งก้อน
+- Snapshot ลงไฟล์ .npz (โหลดกลับเร็ว) + เวลาล่าสุดที่ Sync กับ DB ไว้ทำ Incremental Update
+- Reverse Geocode: Gazetteer (ตำบลที่ใกล้สุด) ถ้ามีไฟล์ ไม่มีก็ยืม District จาก Villa ข้างเคียงที่รู้แล้ว
+Model-free: ตัวนี้ไม่แตะ DB (ดู nearby.py)
+"""
+import math
+import os
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from utils.enrichment.gazetteer import StringTable
+
+EARTH_KM = 6371.0
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """ระยะจากจุด (lat, lng) ไปทุกจุดใน lats / lngs (NumPy array) หน่วย km"""
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    def __init__(self, cell_deg=0.05):
+        # 0.05 องศา ~ 5.5 km: รัศมีที่ใช้บ่อย (1-10 km) ดูแค่ไม่กี่ช่อง
+        self.cell_deg = cell_deg
+        self.points = {}                # villa_id -> (lat, lng)
+        self.labels = {}                # villa_id -> (district, province) ไว้ Reverse Geocode
+        self.cells = defaultdict(set)   # (row, col) -> {villa_id}
+        self.synced_at = None           # updatedAt ล่าสุดที่ดึงจาก DB (epoch seconds)
+        self._bounds = None             # (min_row, max_row, min_col, max_col) ของช่องที่มีข้อมูล
+        self._arrays = {}               # (row, col) -> (ids, lats, lngs) NumPy ของช่องนั้น (สร้างตอน Query, ล้างเมื่อช่องเปลี่ยน)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, villa_id):
+        return villa_id in self.points
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    # --- แก้ไข ---
+    def upsert(self, villa_id, lat, lng, district=None, province=None):
+        """เพิ่ม / ย้ายจุด (lat หรือ lng เป็น None = ลบออก)"""
+        if lat is None or lng is None:
+            self.remove(villa_id)
+            return
+        old = self.points.get(villa_id)
+        if old is not None:
+            old_cell = self._cell(*old)
+            if old_cell != self._cell(lat, lng):
+                self.cells[old_cell].discard(villa_id)
+                if not self.cells[old_cell]: del self.cells[old_cell]
+            self._arrays.pop(old_cell, None)
+        self.points[villa_id] = (float(lat), float(lng))
+        cell = self._cell(lat, lng)
+        self.cells[cell].add(villa_id)
+        self._arrays.pop(cell, None)
+        self._bounds = None
+        if district or province:
+            self.labels[villa_id] = (district, province)
+        else:
+            self.labels.pop(villa_id, None)
+
+    def remove(self, villa_id):
+        old = self.points.pop(villa_id, None)
+        self.labels.pop(villa_id, None)
+        if old is None: return
+        cell = self._cell(*old)
+        self.cells[cell].discard(villa_id)
+        if not self.cells[cell]: del self.cells[cell]
+        self._arrays.pop(cell, None)
+        self._bounds = None
+
+    # --- Query ---
+    def _ring(self, center, radius):
+        """ช่องที่อยู่ห่างจาก center เป็นวง radius ช่องพอดี (radius 0 = ช่องตัวเอง)"""
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for d in range(-radius, radius + 1):
+            yield row - radius, col + d
+            yield row + radius, col + d
+        for d in range(-radius + 1, radius):
+            yield row + d, col - radius
+            yield row + d, col + radius
+
+    def _cell_arrays(self, cell):
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            ids = list(self.cells[cell])
+            coords = np.array([self.points[villa_id] for villa_id in ids], dtype=np.float64).reshape(-1, 2)
+            arrays = self._arrays[cell] = (np.array(ids, dtype=np.int64), coords[:, 0], coords[:, 1])
+        return arrays
+
+    def _candidates(self, cells):
+        parts = [self._cell_arrays(cell) for cell in cells if cell in self.cells]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def _cell_km(self, lat, span_km=0.0):
+        """ความกว้างช่องที่แคบที่สุด (km) ในช่วง ±span_km จากละติจูดนี้ (แนวตะวันออก-ตะวันตกหดตาม cos)"""
+        lat = min(abs(lat) + self.cell_deg + math.degrees(span_km / EARTH_KM), 89.0)
+        return math.radians(self.cell_deg) * EARTH_KM * math.cos(math.radians(lat))
+
+    def _max_ring(self, center):
+        """วงไกลสุดที่ยังมีช่องที่มีข้อมูล"""
+        if self._bounds is None:
+            rows = [r for r, _ in self.cells]
+            cols = [c for _, c in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        min_row, max_row, min_col, max_col = self._bounds
+        row, col = center
+        return max(row - min_row, max_row - row, col - min_col, max_col - col, 0)
+
+    def within(self, lat, lng, km):
+        """[(villa_id, km)] ทุกหลังในรัศมี km เรียงใกล้ -> ไกล"""
+        rows = int(math.ceil(km / (math.radians(self.cell_deg) * EARTH_KM)))
+        cols = int(math.ceil(km / max(self._cell_km(lat, km), 1e-6)))
+        row, col = self._cell(lat, lng)
+        cells = [(r, c) for r in range(row - rows, row + rows + 1) for c in range(col - cols, col + cols + 1)]
+        ids, lats, lngs = self._candidates(cells)
+        dist = haversine_km(lat, lng, lats, lngs)
+        keep = dist <= km
+        order = np.argsort(dist[keep], kind="stable")
+        return list(zip(ids[keep][order].tolist(), dist[keep][order].tolist()))
+
+    def nearest(self, lat, lng, k=10, exclude=(), max_km=None):
+        """[(villa_id, km)] k หลังที่ใกล้ที่สุด (ขยายวงช่องออกไปจนแน่ใจว่าไม่มีหลังที่ใกล้กว่าตกหล่น)"""
+        if not self.points or k <= 0: return []
+        exclude = np.array(list(exclude), dtype=np.int64)
+        center = self._cell(lat, lng)
+        cell_km = self._cell_km(lat)
+        ids, dists = [], []
+        for radius in range(self._max_ring(center) + 1):
+            ring_ids, lats, lngs = self._candidates(self._ring(center, radius))
+            if len(ring_ids):
+                ring_dist = haversine_km(lat, lng, lats, lngs)
+                if len(exclude):
+                    keep = ~np.isin(ring_ids, exclude)
+                    ring_ids, ring_dist = ring_ids[keep], ring_dist[keep]
+                ids.append(ring_ids)
+                dists.append(ring_dist)
+            # ทุกจุดนอกวงนี้ห่างอย่างน้อย radius * cell_km
+            covered = radius * cell_km
+            found = sum(len(d) for d in dists)
+            if found >= k and np.partition(np.concatenate(dists), k - 1)[k - 1] <= covered: break
+            if max_km is not None and covered >= max_km: break
+        if not ids: return []
+        ids, dists = np.concatenate(ids), np.concatenate(dists)
+        if max_km is not None:
+            keep = dists <= max_km
+            ids, dists = ids[keep], dists[keep]
+        order = np.lexsort((ids, dists))[:k]
+        return list(zip(ids[order].tolist(), dists[order].tolist()))
+
+    def within_many(self, lats, lngs, km):
+        """Batch ของ within (จุดละ List)"""
+        return [self.within(lat, lng, km) for lat, lng in zip(lats, lngs)]
+
+    def nearest_many(self, lats, lngs, k=10, excludes=None, max_km=None):
+        """Batch ของ nearest (excludes: ID ที่ไม่เอาของแต่ละจุด เช่น ตัวเอง)"""
+        excludes = excludes or [()] * len(lats)
+        return [self.nearest(lat, lng, k, exclude, max_km) for lat, lng, exclude in zip(lats, lngs, excludes)]
+
+    def related(self, villa_ids, k=10, max_km=None):
+        """Villa ละ k หลังที่ใกล้ที่สุด (ไม่นับตัวเอง) -> {villa_id: [(id, km)]} สำหรับทำ Related Villas"""
+        known = [villa_id for villa_id in villa_ids if villa_id in self.points]
+        lats = [self.points[villa_id][0] for villa_id in known]
+        lngs = [self.points[villa_id][1] for villa_id in known]
+        results = self.nearest_many(lats, lngs, k, [(villa_id,) for villa_id in known], max_km)
+        return dict(zip(known, results))
+
+    # --- Reverse Geocode ---
+    def reverse_geocode_many(self, lats, lngs, cleaner=None, k=5, max_km=10.0):
+        """
+        พิกัด -> [{"district", "province", "subDistrict"}] (None ถ้าไม่รู้)
+        1. Gazetteer ของ cleaner (ตำบลที่ใกล้สุด; อำเภอใช้ชื่อใน POSTCODE_MAP ถ้ามี ให้ตรงกับที่เว็บใช้)
+        2. ไม่มี Gazetteer / ไม่เจอ -> District ที่ Villa ข้างเคียง (k หลัง ในรัศมี max_km) ใช้มากที่สุด
+        """
+        results = [{"district": None, "province": None, "subDistrict": None} for _ in lats]
+        gazetteer = getattr(cleaner, "gazetteer", None)
+        if gazetteer is not None and gazetteer.available and len(lats):
+            tambons, _ = gazetteer.nearest_many(lats, lngs)
+            for result, tambon in zip(results, tambons.tolist()):
+                if tambon < 0: continue
+                place = gazetteer.place(tambon)
+                curated = cleaner.POSTCODE_MAP.get(gazetteer.postcode(tambon))
+                # ข้อมูลไม่มีชื่ออังกฤษ -> district ว่างไว้ ให้ Villa ข้างเคียงโหวตแทน (ชื่อในเว็บเป็นอังกฤษ)
+                result["district"], result["province"] = curated or (
+                    gazetteer.name("amphoe", place.amphoe, fallback=False) or None,
+                    gazetteer.name("province", place.province, fallback=False) or None)
+                result["subDistrict"] = gazetteer.name("tambon", tambon, fallback=False) or None
+
+        for result, lat, lng in zip(results, lats, lngs):
+            if result["district"]: continue
+            votes = Counter(self.labels[villa_id] for villa_id, _ in self.nearest(lat, lng, k, max_km=max_km)
+                            if villa_id in self.labels)
+            if votes:
+                result["district"], result["province"] = votes.most_common(1)[0][0]
+        return results
+
+    # --- Snapshot ---
+    def save(self, path):
+        ids = np.array(list(self.points), dtype=np.int64)
+        coords = np.array([self.points[villa_id] for villa_id in ids.tolist()], dtype=np.float64).reshape(-1, 2)
+        labels = [self.labels.get(villa_id, (None, None)) for villa_id in ids.tolist()]
+        district_blob, district_offsets = StringTable.pack([d or "" for d, _ in labels])
+        province_blob, province_offsets = StringTable.pack([p or "" for _, p in labels])
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp, ids=ids, lat=coords[:, 0], lng=coords[:, 1],
+            district_blob=district_blob, district_offsets=district_offsets,
+            province_blob=province_blob, province_offsets=province_offsets,
+            meta=np.array([self.cell_deg, self.synced_at if self.synced_at is not None else np.nan]),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            cell_deg, synced_at = npz["meta"].tolist()
+            index = cls(cell_deg)
+            districts = StringTable(npz["district_blob"], npz["district_offsets"])
+            provinces = StringTable(npz["province_blob"], npz["province_offsets"])
+            for i, (villa_id, lat, lng) in enumerate(zip(npz["ids"].tolist(), npz["lat"].tolist(), npz["lng"].tolist())):
+                index.upsert(villa_id, lat, lng, districts[i] or None, provinces[i] or None)
+        index.synced_at = None if math.isnan(synced_at) else synced_at
+        return index
@@ -4,6 +4,7 @@ import Link from 'next/link';
 
 import { MapPin, ChevronRight, Star, Sparkles, Home as HomeIcon } from 'lucide-react';
 import { prisma } from '@/lib/prisma';
+import { withImageUrls } from '@/lib/images';
 import HeroSlider from '@/components/HeroSlider';
 import { Button } from "@/components/ui/button";
 
@@ -18,7 +19,7 @@ export const metadata = {
 
 export default async function LandingPage() {
     // 🚀 Parallel Data Fetching: ดึงข้อมูล 3 ส่วนพร้อมกันให้เร็วที่สุด
-    const [allScoops, latestVillas] = await Promise.all([
+    const [allScoops, newVillas] = await Promise.all([
         // 1. ดึง Scoop ทั้งหมด
         prisma.scoop.findMany(),
 
@@ -31,6 +32,7 @@ export default async function LandingPage() {
                 title: true,
                 slug: true,
                 images: true,
+                imageIds: true,
                 priceDaily: true,
                 province: true,
                 bedrooms: true,
@@ -39,6 +41,8 @@ export default async function LandingPage() {
             }
         })
     ]);
+    // การ์ดใช้รูปแรกรูปเดียว
+    const latestVillas = await withImageUrls(newVillas, 1);
 
     // Logic: สุ่ม Scoop สำหรับ Hero Slider (5 อัน)
     const shuffledScoops = [...allScoops]; // Removed Math.random to fix "impure function" error
@@ -147,7 +151,7 @@ export default async function LandingPage() {
                                     {/* Image Area */}
                                     <div className="aspect-[4/3] relative overflow-hidden bg-slate-100">
                                         <img
-                                            src={(villa.images as string[])[0] || "/placeholder.jpg"}
+                                            src={villa.images[0] || "/placeholder.jpg"}
                                             alt={villa.title}
                                             className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-500"
                                         />
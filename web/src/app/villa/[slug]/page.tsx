@@ -3,6 +3,7 @@
 import React from 'react';
 import { notFound } from "next/navigation";
 import { prisma } from "@/lib/prisma";
+import { withImageUrls } from "@/lib/images";
 import Link from 'next/link';
 import {
     MapPin, Users, Bed, Bath, Star, ArrowUpRight,
@@ -23,11 +24,12 @@ export async function generateMetadata({ params }: { params: Promise<{ slug: str
     const villa = await prisma.villa.findUnique({ where: { slug } });
 
     if (!villa) return { title: 'Villa Not Found' };
+    const [{ images }] = await withImageUrls([villa], 1);
     return {
         title: `${villa.title} | PoolVillaFinder`,
         description: villa.description?.slice(0, 160) || `พูลวิลล่าสวยๆ ใน ${villa.province}`,
         openGraph: {
-            images: (villa.images as string[])?.[0] || '',
+            images: images[0] || '',
         }
     };
 }
@@ -78,7 +80,7 @@ export default async function VillaDetailPage({ params }: { params: Promise<{ sl
 
 
     // 2. แปลงข้อมูล (Casting)
-    const images = (villa.images as string[]) || [];
+    const [{ images }] = await withImageUrls([villa]);
 
 
 
@@ -126,6 +128,7 @@ export default async function VillaDetailPage({ params }: { params: Promise<{ sl
             title: true,
             slug: true,
             images: true,
+            imageIds: true,
             priceDaily: true,
             bedrooms: true,
             maxGuests: true,
@@ -155,9 +158,10 @@ export default async function VillaDetailPage({ params }: { params: Promise<{ sl
     });
 
     // 4. Sort & Slice (เรียงคะแนนจากมากไปน้อย แล้วตัดมา 5 อันดับแรก)
-    const relatedVillas = scoredVillas
+    // การ์ดใช้รูปแรกรูปเดียว (ประกอบ URL เฉพาะ 5 หลังที่จะโชว์)
+    const relatedVillas = await withImageUrls(scoredVillas
         .sort((a, b) => b.score - a.score)
-        .slice(0, 5);
+        .slice(0, 5), 1);
 
     return (
         <div className="min-h-screen bg-white pb-20 font-sans text-slate-900">
@@ -0,0 +1,26 @@
+// src/lib/images.ts
+// รูปของ Villa: รูป Booking เก็บเป็น imageIds (URL อยู่ใน BookingImage 1 แถวต่อรูป)
+// ส่วน images เหลือแค่ URL ที่ไม่มี Photo ID -> ประกอบ Gallery กลับที่นี่ (ตรงกับ image_urls ใน scraper/utils/image_index.py)
+import { prisma } from '@/lib/prisma';
+
+type WithImages = { images: unknown; imageIds?: unknown };
+
+// ดึง URL ของหลาย Villa ใน Query เดียว (limit = เอาแค่ N รูปแรกต่อหลัง เช่นการ์ดใช้รูปเดียว)
+export async function withImageUrls<T extends WithImages>(villas: T[], limit?: number): Promise<(T & { images: string[] })[]> {
+    const idsOf = (villa: T) => ((villa.imageIds as number[]) || []).slice(0, limit);
+    const ids = [...new Set(villas.flatMap(idsOf))];
+
+    const rows = ids.length
+        ? await prisma.bookingImage.findMany({
+            where: { photoId: { in: ids.map((id) => BigInt(id)) } },
+            select: { photoId: true, url: true },
+        })
+        : [];
+    const urlById = new Map(rows.map((row) => [row.photoId.toString(), row.url]));
+
+    return villas.map((villa) => {
+        const urls = idsOf(villa).map((id) => urlById.get(String(id))).filter((url): url is string => !!url);
+        const extra = (villa.images as string[]) || [];
+        return { ...villa, images: [...new Set([...urls, ...extra])].slice(0, limit) };
+    });
+}